@@ -0,0 +1,61 @@
+from collections import namedtuple
+from uuid import uuid4
+from sqlalchemy import or_
+from sqlalchemy.exc import IntegrityError
+from api.models.user import UserModel
+
+UserMatch = namedtuple("UserMatch", ["by_username", "by_email_address"])
+
+
+class UserExists(Exception):
+    """
+    Raised by register_user when the username or the email address
+    is taken, field is "username" or "email_address"
+    """
+
+    def __init__(self, field):
+        super().__init__(field)
+        self.field = field
+
+
+def find_user(db_session, username, email_address):
+    """
+    Returning the UserMatch of the users with the username and with
+    the email address, found in one query over both unique indexes
+    """
+    users = db_session.query(UserModel).filter(
+        or_(
+            UserModel.username == username,
+            UserModel.email_address == email_address,
+        )
+    ).limit(2).all()
+    by_username = next(
+        (user for user in users if user.username == username), None
+    )
+    by_email_address = next(
+        (user for user in users if user.email_address == email_address), None
+    )
+    return UserMatch(by_username, by_email_address)
+
+
+def register_user(db_session, user, attempts=3):
+    """
+    Returning the user dict with its new user_uuid, inserted without
+    reading first. A unique violation is looked up once to raise
+    UserExists for the username or the email address, or retried
+    with a new user_uuid when neither of them is taken.
+    """
+    for _ in range(attempts):
+        new_user = dict(user, user_uuid=str(uuid4()))
+        db_session.add(UserModel(**new_user))
+        try:
+            db_session.commit()
+            return new_user
+        except IntegrityError:
+            db_session.rollback()
+        match = find_user(db_session, user["username"], user["email_address"])
+        if match.by_username:
+            raise UserExists("username")
+        if match.by_email_address:
+            raise UserExists("email_address")
+    raise RuntimeError("Could not generate a unique user_uuid")
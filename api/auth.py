@@ -0,0 +1,48 @@
+import hmac
+from functools import wraps
+from flask import current_app, jsonify, make_response, request
+
+
+def token_rejection(config_name):
+    """
+    Returning the 404 response while the config_name token is not
+    configured, the 401 response when the request has no
+    'Authorization: Bearer' header holding it, or None
+    """
+    token = current_app.config[config_name]
+    if not token:
+        return make_response(
+            jsonify({"message": "Not found", "code": 404}), 404
+        )
+    scheme, _, given = request.headers.get(
+        "Authorization", ""
+    ).partition(" ")
+    if scheme.lower() != "bearer" or not hmac.compare_digest(
+        given.encode(), token.encode()
+    ):
+        response = make_response(
+            jsonify({"message": "Not authorized", "code": 401}), 401
+        )
+        response.headers["WWW-Authenticate"] = "Bearer"
+        return response
+    return None
+
+
+def token_required(config_name):
+    """
+    Allowing the view only to requests with an 'Authorization: Bearer'
+    header holding the config_name token, the view answers 404 while
+    the token is not configured
+    """
+
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            rejection = token_rejection(config_name)
+            if rejection is not None:
+                return rejection
+            return view(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
@@ -1,5 +1,6 @@
 from flask import Blueprint, make_response, jsonify
 from flask_restful import Api
+from .conditional import add_body_etag
 from .resources.user import (
     UsersResource,
     UserResource,
@@ -12,13 +13,17 @@ from .resources.hacker_news_top_story import (
     HackerNewsTopStoriesResourse,
     HackerNewsTopStoryResource,
     HackerNewsTopStoryCommentsResource,
+    HackerNewsTopStoryCommentsBatchResource,
     HackerNewsTopStoryCommentResource,
+    HackerNewsTopStoriesUpsertResource,
 )
 from .resources.hacker_news_new_story import (
     HackerNewsNewStoriesResource,
     HackerNewsNewStoryResource,
     HackerNewsNewStoryCommentsResource,
+    HackerNewsNewStoryCommentsBatchResource,
     HackerNewsNewStoryCommentResource,
+    HackerNewsNewStoriesUpsertResource,
 )
 from .resources.blog_news import (
     BlogNewsStoriesResource,
@@ -31,6 +36,8 @@ api_bp = Blueprint("api", __name__, url_prefix="/api")
 
 api = Api(api_bp)
 
+api_bp.after_request(add_body_etag)
+
 
 @api_bp.route("/")
 def api_home_page():
@@ -75,6 +82,16 @@ api.add_resource(
     "/hackernews/topstories/<int:story_id>/comments",
     methods=["GET", "POST"]
 )
+api.add_resource(
+    HackerNewsTopStoriesUpsertResource,
+    "/hackernews/topstories/upsert",
+    methods=["POST"]
+)
+api.add_resource(
+    HackerNewsTopStoryCommentsBatchResource,
+    "/hackernews/topstories/comments",
+    methods=["POST"]
+)
 api.add_resource(
     HackerNewsTopStoryCommentResource,
     "/hackernews/topstories/<int:story_id>/comments/<int:comment_id>",
@@ -95,6 +112,16 @@ api.add_resource(
     "/hackernews/newstories/<int:story_id>/comments",
     methods=["GET", "POST"]
 )
+api.add_resource(
+    HackerNewsNewStoriesUpsertResource,
+    "/hackernews/newstories/upsert",
+    methods=["POST"]
+)
+api.add_resource(
+    HackerNewsNewStoryCommentsBatchResource,
+    "/hackernews/newstories/comments",
+    methods=["POST"]
+)
 api.add_resource(
     HackerNewsNewStoryCommentResource,
     "/hackernews/newstories/<int:story_id>/comments/<int:comment_id>",
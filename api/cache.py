@@ -0,0 +1,212 @@
+import json
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+from urllib.parse import urlencode
+from flask import current_app, g, request
+
+
+class MemoryCache(object):
+    """
+    In-process LRU response cache with a TTL, holding at most
+    max_entries bodies and a tag -> keys index for invalidation
+    """
+
+    def __init__(self, max_entries=1024, ttl=30):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._tags = {}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, body, tags = entry
+            if expires_at <= time.monotonic():
+                self._remove(key)
+                return None
+            self._entries.move_to_end(key)
+            return body
+
+    def set(self, key, body, tags):
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (time.monotonic() + self.ttl, body, tags)
+            for tag in tags:
+                self._tags.setdefault(tag, set()).add(key)
+            while len(self._entries) > self.max_entries:
+                self._remove(next(iter(self._entries)))
+
+    def invalidate(self, tags):
+        with self._lock:
+            for tag in tags:
+                for key in list(self._tags.get(tag, ())):
+                    self._remove(key)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._tags.clear()
+
+    def _remove(self, key):
+        _, _, tags = self._entries.pop(key)
+        for tag in tags:
+            keys = self._tags.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._tags[tag]
+
+
+class SharedCache(object):
+    """
+    Response cache shared between workers, stored in a redis-like client
+    (get, set with ex, delete, sadd, smembers, expire, scan_iter) under
+    a key prefix
+    """
+
+    CLEAR_BATCH_SIZE = 500
+
+    def __init__(self, client, ttl=30, prefix="flask_backend:cache:"):
+        self.client = client
+        self.ttl = ttl
+        self.prefix = prefix
+
+    def get(self, key):
+        return self.client.get(self.prefix + key)
+
+    def set(self, key, body, tags):
+        self.client.set(self.prefix + key, body, ex=self.ttl)
+        for tag in tags:
+            self.client.sadd(self.prefix + "tag:" + tag, self.prefix + key)
+            self.client.expire(self.prefix + "tag:" + tag, self.ttl)
+
+    def invalidate(self, tags):
+        for tag in tags:
+            tag_key = self.prefix + "tag:" + tag
+            keys = self.client.smembers(tag_key)
+            self.client.delete(tag_key, *keys)
+
+    def clear(self):
+        # SCAN walks the keyspace in steps instead of blocking redis
+        # like KEYS, the keys are deleted in batches as they are found
+        keys = []
+        for key in self.client.scan_iter(
+            match=self.prefix + "*", count=self.CLEAR_BATCH_SIZE
+        ):
+            keys.append(key)
+            if len(keys) >= self.CLEAR_BATCH_SIZE:
+                self.client.delete(*keys)
+                keys = []
+        if keys:
+            self.client.delete(*keys)
+
+
+def create_cache(app_config):
+    """
+    Returning the RESPONSE_CACHE_BACKEND response cache of the config:
+    "memory", "redis" or None when the cache is disabled
+    """
+    backend = app_config["RESPONSE_CACHE_BACKEND"]
+    if backend == "memory":
+        return MemoryCache(
+            app_config["RESPONSE_CACHE_MAX_ENTRIES"],
+            app_config["RESPONSE_CACHE_TTL"],
+        )
+    if backend == "redis":
+        import redis
+        return SharedCache(
+            redis.Redis.from_url(app_config["RESPONSE_CACHE_REDIS_URL"]),
+            app_config["RESPONSE_CACHE_TTL"],
+        )
+    return None
+
+
+def cache_key():
+    """
+    Returning the cache key of the request, its path with sorted arguments
+    """
+    args = sorted(request.args.items(multi=True))
+    return f"{request.path}?{urlencode(args)}"
+
+
+def add_cache_tags(*tags):
+    """
+    Tagging the response of the current request, only tagged responses
+    are cached by cached_response
+    """
+    g.cache_tags = getattr(g, "cache_tags", set()) | set(tags)
+
+
+def invalidate_cache_tags(*tags):
+    """
+    Dropping every cached response tagged with one of the tags
+    """
+    cache = current_app.extensions.get("response_cache")
+    if cache is not None:
+        cache.invalidate(tags)
+
+
+def response_to_cached(response):
+    """
+    Returning the cache value of a response, a JSON line with
+    its validators followed by the body
+    """
+    validators = {
+        "etag": response.get_etag()[0],
+        "last_modified": response.headers.get("Last-Modified"),
+    }
+    return json.dumps(validators).encode() + b"\n" + response.get_data()
+
+
+def cached_to_response(cached):
+    """
+    Returning the response of a cache value, or a 304 when
+    If-None-Match holds its ETag
+    """
+    validators, body = cached.split(b"\n", 1)
+    validators = json.loads(validators)
+    status = 200
+    if validators["etag"] and validators["etag"] in request.if_none_match:
+        body, status = b"", 304
+    response = current_app.response_class(
+        body, status=status, mimetype="application/json"
+    )
+    if validators["etag"]:
+        response.set_etag(validators["etag"])
+    if validators["last_modified"]:
+        response.headers["Last-Modified"] = validators["last_modified"]
+    return response
+
+
+def cached_response(view):
+    """
+    Serving the GET view from the response cache, and caching its
+    200 responses that were tagged with add_cache_tags
+    """
+
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        cache = current_app.extensions.get("response_cache")
+        if cache is None:
+            return view(*args, **kwargs)
+        key = cache_key()
+        cached = cache.get(key)
+        if cached is not None:
+            return cached_to_response(cached)
+        g.cache_tags = set()
+        response = view(*args, **kwargs)
+        if (
+            isinstance(response, current_app.response_class)
+            and response.status_code == 200
+            and g.cache_tags
+        ):
+            cache.set(key, response_to_cached(response), g.cache_tags)
+        return response
+
+    return wrapper
@@ -0,0 +1,169 @@
+from datetime import datetime
+from functools import wraps
+from hashlib import sha1
+from flask import current_app, request
+from marshmallow import ValidationError
+from sqlalchemy import desc, func
+from api.cache import cache_key
+from api.pagination import keyset_paginate, paginate
+
+
+def table_version(db_session, model, columns, *criteria):
+    """
+    Returning scalar subqueries of the rows matching the criteria,
+    their count and the max() of every column, which move together
+    with every insert, update or delete of those rows
+    """
+    subqueries = [
+        db_session.query(func.count()).select_from(model)
+        .filter(*criteria).as_scalar()
+    ]
+    for column in columns:
+        subqueries.append(
+            db_session.query(func.max(column)).filter(*criteria).as_scalar()
+        )
+    return subqueries
+
+
+def fetch_version(db_session, *subqueries):
+    """
+    Returning the values of the version subqueries in one SELECT
+    """
+    return tuple(db_session.query(*subqueries).one())
+
+
+def page_version(db_session, story_model, comment_model, per_page=30):
+    """
+    Returning the version and last modified time of the story page of
+    the request, or None for arguments the view rejects. The rows of
+    the page are selected over the (parsed_time, id) index like the
+    page itself, with only the columns that move when a story or its
+    comment count is written, so the cost does not grow with the table.
+    The comments of those stories are added when the page includes them.
+    """
+    key_columns = [story_model.parsed_time, story_model.id]
+    query = db_session.query(
+        story_model.id,
+        story_model.hn_id,
+        story_model.parsed_time,
+        story_model.local_comment_count,
+    )
+    try:
+        if "cursor" in request.args:
+            page = keyset_paginate(
+                query, key_columns, request.args["cursor"], per_page
+            )
+            total = None
+        else:
+            page_number = int(request.args.get("pagenumber"))
+            if page_number <= 0:
+                return None
+            page = paginate(
+                query.order_by(*[desc(column) for column in key_columns]),
+                page_number,
+                per_page,
+            )
+            total = page.total
+    except (TypeError, ValueError, ValidationError):
+        return None
+    version = (
+        [tuple(row) for row in page.items],
+        page.has_next,
+        page.has_previous,
+        total,
+    )
+    times = [row.parsed_time for row in page.items]
+    if request.args.get("include") == "comments" and page.items:
+        comments = fetch_version(
+            db_session,
+            *table_version(
+                db_session,
+                comment_model,
+                [comment_model.parsed_time, comment_model.updated_time],
+                comment_model.parent.in_([row.hn_id for row in page.items]),
+            ),
+        )
+        version += (comments,)
+        times.extend(comments[1:])
+    return version, latest(*times)
+
+
+def latest(*values):
+    """
+    Returning the most recent of the datetime or unix time values
+    """
+    times = [
+        datetime.utcfromtimestamp(value) if isinstance(value, int) else value
+        for value in values
+        if value is not None
+    ]
+    return max(times) if times else None
+
+
+def etag_for(version):
+    """
+    Returning a strong ETag of the request path, arguments and version
+    """
+    return sha1(f"{cache_key()}|{version!r}".encode()).hexdigest()
+
+
+def not_modified(etag, last_modified=None):
+    """
+    Returning a 304 response with the validators of the resource
+    """
+    response = current_app.response_class(status=304)
+    response.set_etag(etag)
+    if last_modified is not None:
+        response.last_modified = last_modified
+    return response
+
+
+def conditional_response(version_of):
+    """
+    Answering GET requests with 304 before the view runs when
+    If-None-Match holds the ETag of version_of(**view_kwargs).
+    version_of returns (version, last_modified), or None when there
+    is no resource. If-Modified-Since is not evaluated, hard deletes
+    do not move Last-Modified, so the ETag is the only validator.
+    """
+
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            resource_version = version_of(**kwargs)
+            if resource_version is None:
+                return view(*args, **kwargs)
+            version, last_modified = resource_version
+            etag = etag_for(version)
+            if etag in request.if_none_match:
+                return not_modified(etag, last_modified)
+            response = view(*args, **kwargs)
+            if (
+                isinstance(response, current_app.response_class)
+                and response.status_code == 200
+            ):
+                response.set_etag(etag)
+                if last_modified is not None:
+                    response.last_modified = last_modified
+            return response
+
+        return wrapper
+
+    return decorator
+
+
+def add_body_etag(response):
+    """
+    Adding an ETag of the body to GET responses without validators,
+    and turning them into 304 when If-None-Match matches it
+    """
+    if (
+        request.method == "GET"
+        and response.status_code == 200
+        and not response.direct_passthrough
+        and not response.is_streamed
+        and "ETag" not in response.headers
+    ):
+        response.add_etag()
+        response.make_conditional(request)
+    return response
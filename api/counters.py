@@ -0,0 +1,40 @@
+from sqlalchemy import case, func
+
+
+def change_comment_counts(db_session, story_key, deltas):
+    """
+    Adding the {story_id: delta} deltas to the local_comment_count of
+    the stories whose story_key column holds story_id, with one UPDATE
+    in the current transaction
+    """
+    story_model = story_key.class_
+    deltas = {story_id: delta for story_id, delta in deltas.items() if delta}
+    if not deltas:
+        return
+    db_session.query(story_model).filter(story_key.in_(list(deltas))).update(
+        {
+            story_model.local_comment_count:
+                story_model.local_comment_count
+                + case(deltas, value=story_key, else_=0)
+        },
+        synchronize_session=False,
+    )
+
+
+def reconcile_comment_counts(db_session, story_key, comment_model):
+    """
+    Returning the number of stories whose local_comment_count did not
+    match their comment rows, after setting it to the counted rows
+    """
+    story_model = story_key.class_
+    count = db_session.query(func.count(comment_model.id)).filter(
+        comment_model.parent == story_key
+    ).as_scalar()
+    repaired = db_session.query(story_model).filter(
+        story_model.local_comment_count != count
+    ).update(
+        {story_model.local_comment_count: count},
+        synchronize_session=False,
+    )
+    db_session.commit()
+    return repaired
@@ -0,0 +1,132 @@
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from flask import current_app
+from passlib.hash import argon2
+from werkzeug.exceptions import TooManyRequests
+
+
+class HashingBusy(TooManyRequests):
+    """
+    Raised when the password hasher already holds max_pending calls,
+    answered with 429 and a Retry-After header
+    """
+
+    def __init__(self, retry_after=1):
+        super().__init__(retry_after=retry_after)
+        self.data = {"message": "Too many sign in requests", "code": 429}
+
+
+def pool_executor(max_workers):
+    """
+    Returning a pool of max_workers processes, or of max_workers native
+    threads in gevent patched workers, where a process pool can not be
+    waited for. argon2 releases the GIL, so the threads hash in
+    parallel while the hub serves the other greenlets.
+    """
+    try:
+        from gevent import monkey
+    except ImportError:
+        return ProcessPoolExecutor(max_workers)
+    if monkey.is_module_patched("threading"):
+        from gevent.threadpool import ThreadPoolExecutor
+        return ThreadPoolExecutor(max_workers)
+    return ProcessPoolExecutor(max_workers)
+
+
+def _hash(password, settings):
+    return argon2.using(**settings).hash(password)
+
+
+def _verify(password, password_hash):
+    return argon2.verify(password, password_hash)
+
+
+def _verify_and_update(password, password_hash, settings):
+    handler = argon2.using(**settings)
+    if not handler.verify(password, password_hash):
+        return False, None
+    if handler.needs_update(password_hash):
+        return True, handler.hash(password)
+    return True, None
+
+
+class PasswordHasher(object):
+    """
+    argon2 hashing and verifying in a pool of max_workers processes
+    (threads in gevent workers), so the CPU and memory heavy calls do
+    not hold the request workers.
+    At most max_pending calls are queued or running, more raise
+    HashingBusy. max_workers=0 hashes in the calling thread.
+    """
+
+    def __init__(self, max_workers=2, max_pending=16, **settings):
+        self.max_workers = max_workers
+        self.settings = {
+            name: value for name, value in settings.items()
+            if value is not None
+        }
+        self._pending = threading.BoundedSemaphore(max_pending)
+        self._lock = threading.Lock()
+        self._executor = None
+        self._pid = None
+
+    def executor(self):
+        """
+        Returning the process pool of the current process, created on
+        first use so forked workers never share the pool of the master
+        """
+        with self._lock:
+            if self._executor is None or self._pid != os.getpid():
+                self._executor = pool_executor(self.max_workers)
+                self._pid = os.getpid()
+            return self._executor
+
+    def hash(self, password):
+        return self._call(_hash, password, self.settings)
+
+    def verify(self, password, password_hash):
+        return self._call(_verify, password, password_hash)
+
+    def verify_and_update(self, password, password_hash):
+        """
+        Returning (valid, new_hash), new_hash is the password hashed
+        with the current settings when the password is valid and
+        password_hash was made with other argon2 parameters, else None
+        """
+        return self._call(
+            _verify_and_update, password, password_hash, self.settings
+        )
+
+    def _call(self, func, *args):
+        if not self._pending.acquire(blocking=False):
+            raise HashingBusy()
+        try:
+            if not self.max_workers:
+                return func(*args)
+            return self.executor().submit(func, *args).result()
+        finally:
+            self._pending.release()
+
+
+def create_hasher(app_config):
+    """
+    Returning the PasswordHasher of the PASSWORD_HASH_* config
+    """
+    return PasswordHasher(
+        app_config["PASSWORD_HASH_WORKERS"],
+        app_config["PASSWORD_HASH_MAX_PENDING"],
+        time_cost=app_config["PASSWORD_HASH_TIME_COST"],
+        memory_cost=app_config["PASSWORD_HASH_MEMORY_COST"],
+        parallelism=app_config["PASSWORD_HASH_PARALLELISM"],
+    )
+
+
+def hash_password(password):
+    return current_app.extensions["password_hasher"].hash(password)
+
+
+def verify_and_update_password(password, password_hash):
+    return current_app.extensions["password_hasher"].verify_and_update(
+        password, password_hash
+    )
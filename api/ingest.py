@@ -0,0 +1,157 @@
+from collections import Counter
+from datetime import datetime
+from flask import jsonify, make_response
+from marshmallow import ValidationError
+from sqlalchemy import func, literal_column
+from sqlalchemy.dialects.postgresql import insert
+from api.serialization import json_response
+from api.counters import change_comment_counts
+
+REFRESHED_COLUMNS = ("parsed_time", "score", "descendants", "kids")
+
+
+def uniform_rows(rows):
+    """
+    Returning the rows with the same keys, a multi-row VALUES
+    needs the same columns in every row
+    """
+    columns = set().union(*rows)
+    return [{column: row.get(column) for column in columns} for row in rows]
+
+
+def add_comments(db_session, story_model, comment_model, batch_schema, data):
+    """
+    Returning (results, story_ids) of adding the data comments to their
+    story_id stories: one result with the status of every comment, and
+    the hn_id of the stories that got comments. Comments are validated
+    by the many batch_schema, their stories found with one IN query and
+    inserted with one multi-row INSERT in one transaction that also
+    adds them to the local_comment_count of their stories.
+    """
+    try:
+        comments = batch_schema.load(data)
+        errors = {}
+    except ValidationError as err:
+        comments = err.valid_data
+        errors = err.messages
+    results = [None] * len(comments)
+    for index, messages in errors.items():
+        results[index] = {"index": index, "status": 400, "errors": messages}
+    story_ids = {
+        comment["story_id"]
+        for comment, result in zip(comments, results)
+        if result is None
+    }
+    if story_ids:
+        story_ids = {
+            hn_id for hn_id, in db_session.query(story_model.hn_id).filter(
+                story_model.hn_id.in_(story_ids)
+            )
+        }
+    rows = []
+    row_indexes = []
+    now = datetime.now()
+    for index, comment in enumerate(comments):
+        if results[index] is not None:
+            continue
+        story_id = comment.pop("story_id")
+        if story_id not in story_ids:
+            results[index] = {
+                "index": index, "status": 404, "message": "Story not found",
+            }
+            continue
+        comment["dead"] = False
+        comment["deleted"] = False
+        comment["descendants"] = 0
+        comment["kids"] = []
+        comment["origin"] = "my_blog"
+        comment["parent"] = story_id
+        comment["time"] = int(now.timestamp())
+        comment["type"] = "comment"
+        comment["parsed_time"] = now
+        rows.append(comment)
+        row_indexes.append(index)
+    if rows:
+        table = comment_model.__table__
+        comment_ids = db_session.execute(
+            table.insert().values(uniform_rows(rows)).returning(table.c.id)
+        ).fetchall()
+        change_comment_counts(
+            db_session,
+            story_model.hn_id,
+            Counter(row["parent"] for row in rows),
+        )
+        db_session.commit()
+        for index, (comment_id,) in zip(row_indexes, comment_ids):
+            results[index] = {"index": index, "status": 201, "id": comment_id}
+    return results, story_ids
+
+
+def upsert_stories(db_session, story_model, stories, chunk_size=500):
+    """
+    Returning {"inserted": N, "updated": N} of storing the stories,
+    HackerNewsStorySchema dicts with an hn_id. Every chunk_size stories
+    go in one INSERT ... ON CONFLICT (hn_id) DO UPDATE that refreshes
+    the REFRESHED_COLUMNS of the stored ones, in one transaction.
+    """
+    # a row can be updated only once by a statement, the last one wins
+    stories = list({story["hn_id"]: story for story in stories}.values())
+    table = story_model.__table__
+    now = datetime.now()
+    counts = {"inserted": 0, "updated": 0}
+    for start in range(0, len(stories), chunk_size):
+        rows = []
+        for story in stories[start:start + chunk_size]:
+            row = dict(story)
+            if row.get("parsed_time") is None:
+                row["parsed_time"] = now
+            rows.append(row)
+        statement = insert(table).values(uniform_rows(rows))
+        statement = statement.on_conflict_do_update(
+            index_elements=[table.c.hn_id],
+            set_={
+                column: func.coalesce(
+                    statement.excluded[column], table.c[column]
+                )
+                for column in REFRESHED_COLUMNS
+            },
+        ).returning(literal_column("xmax = 0"))
+        for inserted, in db_session.execute(statement):
+            counts["inserted" if inserted else "updated"] += 1
+    db_session.commit()
+    return counts
+
+
+def check_batch(data, max_items, name="comments"):
+    """
+    Returning a 400 response when data is not a list of
+    1 to max_items items, else None
+    """
+    if isinstance(data, list) and 0 < len(data) <= max_items:
+        return None
+    return make_response(
+        jsonify(
+            {
+                "message": f"Expected a list of 1 to {max_items} {name}",
+                "code": 400,
+            }
+        ), 400,
+    )
+
+
+def batch_response(results):
+    """
+    Returning the response of the batch results, 201 when every
+    comment was added and 207 with the status of each one otherwise
+    """
+    created = sum(1 for result in results if result["status"] == 201)
+    status = 201 if created == len(results) else 207
+    return json_response(
+        {
+            "message": "Comments added",
+            "created": created,
+            "items": results,
+            "code": status,
+        },
+        status,
+    )
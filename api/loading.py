@@ -0,0 +1,80 @@
+from sqlalchemy import func
+from api.projection import project_schema
+from api.serialization import dump
+
+
+def load_comments(db_session, comment_model, parent_ids, order_by, limit=None):
+    """
+    Returning {parent_id: [comments]} for the parent_ids in one query,
+    with at most limit comments per parent when the limit is given
+    """
+    comments = {parent_id: [] for parent_id in parent_ids}
+    if not parent_ids:
+        return comments
+    query = db_session.query(comment_model).filter(
+        comment_model.parent.in_(parent_ids)
+    )
+    if limit is not None:
+        ranked = db_session.query(
+            comment_model.id,
+            func.row_number().over(
+                partition_by=comment_model.parent,
+                order_by=order_by,
+            ).label("row_number"),
+        ).filter(
+            comment_model.parent.in_(parent_ids)
+        ).subquery()
+        query = query.join(
+            ranked, ranked.c.id == comment_model.id
+        ).filter(ranked.c.row_number <= limit)
+    for comment in query.order_by(comment_model.parent, order_by):
+        comments[comment.parent].append(comment)
+    return comments
+
+
+def dump_stories(
+    db_session,
+    stories,
+    stories_schema,
+    comments_schema,
+    comment_model,
+    story_key,
+    order_by,
+    profile,
+    comments_limit=None,
+):
+    """
+    Returning the stories dumped by stories_schema, which excludes
+    "comments", with a "comments_count" for every story read from
+    its local_comment_count column.
+    Comments are added only for '?include=comments' requests, up to the
+    '&comments_limit=N' argument, or when the endpoint passes its own
+    comments_limit, so list pages never load comment rows by default.
+    A '?fields=a,b' profile dumps only those fields, adding the count
+    only for "comments_count" and the comments of the endpoint
+    comments_limit only for "comments".
+    """
+    parent_ids = [getattr(story, story_key) for story in stories]
+    field_names = profile.get("fields")
+    if field_names is not None:
+        stories_schema = project_schema(stories_schema, field_names)
+    items = dump(stories_schema, stories)
+    with_counts = field_names is None or "comments_count" in field_names
+    include_comments = comments_limit is not None and (
+        field_names is None or "comments" in field_names
+    )
+    if profile.get("include") == "comments":
+        include_comments = True
+        comments_limit = profile.get("comments_limit")
+    if include_comments:
+        comments = load_comments(
+            db_session, comment_model, parent_ids, order_by, comments_limit
+        )
+    for item, story, parent_id in zip(items, stories, parent_ids):
+        if with_counts:
+            item["comments_count"] = story.local_comment_count
+        if include_comments:
+            item["comments"] = dump(
+                comments_schema, comments[parent_id]
+            )
+    return items
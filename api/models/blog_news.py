@@ -5,6 +5,7 @@ from sqlalchemy import (
     JSON,
     Boolean,
     ForeignKey,
+    Index,
 )
 from sqlalchemy.orm import relationship
 from db import flask_backend_Base as Base
@@ -38,9 +39,12 @@ class BlogNewsStory(Base):
         backref="blog_news_story",
         order_by="desc(BlogNewsStoryComment.id)",
         cascade="all,delete",
-        lazy='subquery'
+        lazy='select'
     )
     origin = Column(String)
+    local_comment_count = Column(
+        Integer, nullable=False, default=0, server_default="0"
+    )
 
 
 class BlogNewsStoryComment(Base):
@@ -65,3 +69,27 @@ class BlogNewsStoryComment(Base):
     parts = Column(JSON)
     descendants = Column(Integer)
     origin = Column(String)
+
+
+Index(
+    "ix_blog_news_story_time_id",
+    BlogNewsStory.time.desc(),
+    BlogNewsStory.id.desc(),
+)
+Index(
+    "ix_blog_news_story_by_time_id",
+    BlogNewsStory.by,
+    BlogNewsStory.time.desc(),
+    BlogNewsStory.id.desc(),
+)
+Index(
+    "ix_blog_news_story_comment_parent_id",
+    BlogNewsStoryComment.parent,
+    BlogNewsStoryComment.id.desc(),
+)
+Index(
+    "ix_blog_news_story_comment_by_time_id",
+    BlogNewsStoryComment.by,
+    BlogNewsStoryComment.time.desc(),
+    BlogNewsStoryComment.id.desc(),
+)
@@ -6,6 +6,7 @@ from sqlalchemy import (
     DateTime,
     Boolean,
     ForeignKey,
+    Index,
 )
 from sqlalchemy.orm import relationship
 from db import hacker_news_Base as Base
@@ -36,11 +37,14 @@ class HackerNewsTopStory(Base):
         "HackerNewsTopStoryComment",
         backref="hacker_news_top_story",
         order_by="desc(HackerNewsTopStoryComment.parsed_time)",
-        lazy='subquery'
+        lazy='select'
     )
     #
     origin = Column(String)
     parsed_time = Column(DateTime)
+    local_comment_count = Column(
+        Integer, nullable=False, default=0, server_default="0"
+    )
 
 
 class HackerNewsTopStoryComment(Base):
@@ -93,10 +97,13 @@ class HackerNewsNewStory(Base):
         "HackerNewsNewStoryComment",
         backref="hacker_news_new_story",
         order_by="desc(HackerNewsNewStoryComment.parsed_time)",
-        lazy='subquery'
+        lazy='select'
     )
     origin = Column(String)
     parsed_time = Column(DateTime)
+    local_comment_count = Column(
+        Integer, nullable=False, default=0, server_default="0"
+    )
 
 
 class HackerNewsNewStoryComment(Base):
@@ -123,3 +130,25 @@ class HackerNewsNewStoryComment(Base):
     origin = Column(String)
     parsed_time = Column(DateTime)
     updated_time = Column(DateTime)
+
+
+Index(
+    "ix_hacker_news_top_story_parsed_time_id",
+    HackerNewsTopStory.parsed_time.desc(),
+    HackerNewsTopStory.id.desc(),
+)
+Index(
+    "ix_hacker_news_top_story_comment_parent_parsed_time",
+    HackerNewsTopStoryComment.parent,
+    HackerNewsTopStoryComment.parsed_time.desc(),
+)
+Index(
+    "ix_hacker_news_new_story_parsed_time_id",
+    HackerNewsNewStory.parsed_time.desc(),
+    HackerNewsNewStory.id.desc(),
+)
+Index(
+    "ix_hacker_news_new_story_comment_parent_parsed_time",
+    HackerNewsNewStoryComment.parent,
+    HackerNewsNewStoryComment.parsed_time.desc(),
+)
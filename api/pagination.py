@@ -0,0 +1,168 @@
+import json
+import math
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from binascii import Error as BinasciiError
+from collections import namedtuple
+from datetime import datetime
+from marshmallow import ValidationError
+from sqlalchemy import asc, desc, func, tuple_, DateTime
+
+Page = namedtuple(
+    "Page",
+    [
+        "items",
+        "has_next",
+        "has_previous",
+        "next_page",
+        "previous_page",
+        "pages",
+        "total",
+    ],
+)
+KeysetPage = namedtuple(
+    "KeysetPage",
+    [
+        "items",
+        "has_next",
+        "has_previous",
+        "next_cursor",
+        "previous_cursor",
+    ],
+)
+
+
+def encode_cursor(row, columns, direction):
+    """
+    Returning an opaque cursor, built from the row values
+    of the ordering columns and the paging direction
+    """
+    values = []
+    for column in columns:
+        value = getattr(row, column.key)
+        if isinstance(value, datetime):
+            value = value.isoformat()
+        values.append(value)
+    payload = json.dumps({"d": direction, "v": values}, separators=(",", ":"))
+    return urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor, columns):
+    """
+    Returning (direction, values) from the opaque cursor,
+    raising ValidationError if the cursor is malformed
+    """
+    try:
+        padding = "=" * (-len(cursor) % 4)
+        payload = json.loads(urlsafe_b64decode(cursor + padding))
+        direction = payload["d"]
+        values = payload["v"]
+        if direction not in ("next", "previous"):
+            raise ValueError(direction)
+        if len(values) != len(columns):
+            raise ValueError(values)
+        values = [
+            datetime.fromisoformat(value)
+            if isinstance(column.type, DateTime) else int(value)
+            for column, value in zip(columns, values)
+        ]
+    except (
+        BinasciiError,
+        KeyError,
+        TypeError,
+        ValueError,
+        UnicodeDecodeError,
+    ):
+        raise ValidationError({"cursor": ["Not a valid cursor."]})
+    return direction, values
+
+
+def keyset_paginate(query, columns, cursor=None, per_page=30):
+    """
+    Returning a KeysetPage of the query ordered by columns descending.
+    Rows are selected with a row-value comparison against the cursor
+    instead of OFFSET, and no COUNT query is issued, so every page
+    costs the same index range scan no matter how deep it is.
+    Rows with a NULL in any of the columns are left out, NULL never
+    compares in the row value and could not be put in a cursor.
+    """
+    key = tuple_(*columns)
+    query = query.filter(
+        *[
+            column.isnot(None)
+            for column in columns
+            if column.expression.nullable
+        ]
+    )
+    if cursor:
+        direction, values = decode_cursor(cursor, columns)
+    else:
+        direction, values = "next", None
+    if direction == "next":
+        if values is not None:
+            query = query.filter(key < tuple_(*values))
+        query = query.order_by(*[desc(column) for column in columns])
+    else:
+        query = query.filter(key > tuple_(*values))
+        query = query.order_by(*[asc(column) for column in columns])
+    rows = query.limit(per_page + 1).all()
+    has_more = len(rows) > per_page
+    rows = rows[:per_page]
+    if direction == "next":
+        has_next = has_more
+        has_previous = values is not None
+    else:
+        rows.reverse()
+        has_next = True
+        has_previous = has_more
+    next_cursor = None
+    previous_cursor = None
+    if rows and has_next:
+        next_cursor = encode_cursor(rows[-1], columns, "next")
+    if rows and has_previous:
+        previous_cursor = encode_cursor(rows[0], columns, "previous")
+    return KeysetPage(
+        items=rows,
+        has_next=has_next,
+        has_previous=has_previous,
+        next_cursor=next_cursor,
+        previous_cursor=previous_cursor,
+    )
+
+
+def paginate(query, page_number, per_page=30, max_items=500):
+    """
+    Returning a Page of the first max_items rows of the ordered query.
+    The page is fetched with LIMIT/OFFSET and the total is counted over
+    at most max_items primary keys, the count is skipped when the
+    page itself shows where the rows end.
+    """
+    offset = (page_number - 1) * per_page
+    items = []
+    if offset < max_items:
+        items = query.limit(min(per_page, max_items - offset)).offset(
+            offset
+        ).all()
+    if items and len(items) < per_page:
+        total = offset + len(items)
+    else:
+        entity = query.column_descriptions[0]["entity"]
+        bounded_query = (
+            query.order_by(None)
+            .with_entities(*entity.__mapper__.primary_key)
+            .limit(max_items)
+            .subquery()
+        )
+        total = query.session.query(func.count()).select_from(
+            bounded_query
+        ).scalar()
+    has_next = offset + len(items) < total
+    has_previous = page_number > 1
+    return Page(
+        items=items,
+        has_next=has_next,
+        has_previous=has_previous,
+        next_page=page_number + 1 if has_next else None,
+        previous_page=page_number - 1 if has_previous else None,
+        pages=int(math.ceil(total / float(per_page))),
+        total=total,
+    )
@@ -0,0 +1,61 @@
+from functools import lru_cache
+from flask import request
+from marshmallow import ValidationError
+from sqlalchemy.orm import load_only
+
+EXTRA_FIELDS = ("comments_count", "comments")
+# columns that extra fields are read from
+EXTRA_FIELD_COLUMNS = {"comments_count": "local_comment_count"}
+
+
+def requested_fields(schema):
+    """
+    Returning the sorted field names of the '?fields=a,b' argument,
+    or None when the argument is not given, raising ValidationError
+    for names that the schema does not dump
+    """
+    value = request.args.get("fields")
+    if value is None:
+        return None
+    names = {name.strip() for name in value.split(",") if name.strip()}
+    if not names:
+        raise ValidationError({"fields": ["Field may not be empty."]})
+    unknown = names - set(schema.dump_fields) - set(EXTRA_FIELDS)
+    if unknown:
+        raise ValidationError(
+            {"fields": [f"Unknown field {name}." for name in sorted(unknown)]}
+        )
+    return tuple(sorted(names))
+
+
+def project_query(query, model, field_names, required):
+    """
+    Returning the query loading only the columns of field_names and
+    the required columns (primary, cursor and comment keys), or the
+    query unchanged when every field is requested
+    """
+    if field_names is None:
+        return query
+    wanted = set(field_names) | set(required) | {
+        EXTRA_FIELD_COLUMNS[name]
+        for name in field_names
+        if name in EXTRA_FIELD_COLUMNS
+    }
+    columns = [
+        column.key
+        for column in model.__mapper__.column_attrs
+        if column.key in wanted
+    ]
+    return query.options(load_only(*columns))
+
+
+@lru_cache(maxsize=256)
+def project_schema(schema, field_names):
+    """
+    Returning a copy of the schema that dumps only field_names
+    """
+    return type(schema)(
+        many=schema.many,
+        only=[name for name in field_names if name in schema.dump_fields],
+        exclude=schema.exclude,
+    )
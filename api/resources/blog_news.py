@@ -1,4 +1,4 @@
-from flask import request, jsonify, make_response, g
+from flask import request, jsonify, make_response, g, current_app
 from flask_restful import Resource
 from api.models.blog_news import BlogNewsStory, BlogNewsStoryComment
 from api.schemas.blog_news import (
@@ -7,17 +7,30 @@ from api.schemas.blog_news import (
     NewsPaginationSchema,
     StoryIdSchema,
     CommentIdSchema,
+    LoadProfileSchema,
 )
 from sqlalchemy import desc
-from sqlalchemy_pagination import paginate
+from api.pagination import paginate, keyset_paginate
+from api.loading import dump_stories
+from api.projection import project_query, requested_fields
+from api.serialization import dump, json_response
+from api.counters import change_comment_counts
 from marshmallow import ValidationError
 import time
 
+STORY_KEY_COLUMNS = ("id", "time")
+#
 news_pagination_schema = NewsPaginationSchema()
 story_id_schema = StoryIdSchema()
 comment_id_schema = CommentIdSchema()
+load_profile_schema = LoadProfileSchema()
 story_schema = BlogNewsStorySchema()
 stories_schema = BlogNewsStorySchema(many=True)
+stories_page_schema = BlogNewsStorySchema(
+    many=True,
+    exclude=["comments"],
+)
+comments_schema = BlogNewsCommentSchema(many=True)
 add_story_schema = BlogNewsStorySchema(
     exclude=[
         "id",
@@ -102,18 +115,50 @@ edit_comment_schema = BlogNewsCommentSchema(
 )
 
 
+def dump_story_page(stories, profile, comments_limit=None):
+    """
+    Returning blognews stories dumped with the comments
+    load profile of the request
+    """
+    return dump_stories(
+        g.flask_backend_session,
+        stories,
+        stories_page_schema,
+        comments_schema,
+        BlogNewsStoryComment,
+        "id",
+        desc(BlogNewsStoryComment.id),
+        profile,
+        comments_limit,
+    )
+
+
 class BlogNewsStoriesResource(Resource):
     @classmethod
     def get(cls):
         """
         Getting GET requests on the '/api/blognews/?pagenumber=N'
-        endpoint, and returning a list of blognews stories
+        endpoint, and returning a list of blognews stories.
+        Requests with a '?cursor=' argument are paged by cursor instead.
         """
+        if "cursor" in request.args:
+            return cls.get_cursor_page()
         try:
             pagenumber = {"pagenumber": request.args.get("pagenumber")}
             incoming_pagination = news_pagination_schema.load(pagenumber)
         except ValidationError as err:
             return err.messages, 400
+        try:
+            profile = {
+                "include": request.args.get("include"),
+                "comments_limit": request.args.get("comments_limit"),
+            }
+            incoming_profile = load_profile_schema.load(profile)
+            incoming_profile["fields"] = requested_fields(
+                stories_page_schema
+            )
+        except ValidationError as err:
+            return err.messages, 400
         if incoming_pagination["pagenumber"] <= 0:
             return make_response(
                 jsonify(
@@ -125,8 +170,17 @@ class BlogNewsStoriesResource(Resource):
                 400,
             )
         db_session = g.flask_backend_session
-        blognews_stories = db_session.query(BlogNewsStory).all()
-        if not blognews_stories:
+        page = paginate(
+            project_query(
+                db_session.query(BlogNewsStory),
+                BlogNewsStory,
+                incoming_profile["fields"],
+                STORY_KEY_COLUMNS,
+            ).order_by(desc(BlogNewsStory.time)),
+            incoming_pagination["pagenumber"],
+            30,
+        )
+        if not page.total:
             return make_response(
                 jsonify(
                     {
@@ -135,20 +189,11 @@ class BlogNewsStoriesResource(Resource):
                     }
                 ), 404,
             )
-        page = paginate(
-            db_session.query(
-                BlogNewsStory
-            ).order_by(desc(BlogNewsStory.time))
-            .limit(500)
-            .from_self(),
-            incoming_pagination["pagenumber"],
-            30,
-        )
         result_page = {
             "current_page": incoming_pagination["pagenumber"],
             "has_next": page.has_next,
             "has_previous": page.has_previous,
-            "items": stories_schema.dump(page.items),
+            "items": dump_story_page(page.items, incoming_profile),
             "next_page": page.next_page,
             "previous_page": page.previous_page,
             "pages": page.pages,
@@ -163,7 +208,59 @@ class BlogNewsStoriesResource(Resource):
                     }
                 ), 404,
             )
-        return jsonify(result_page)
+        return json_response(result_page)
+
+    @classmethod
+    def get_cursor_page(cls):
+        """
+        Returning a page with 30 blognews stories that follows
+        the '/api/blognews/?cursor=C' cursor, an empty cursor
+        returns the first page.
+        """
+        try:
+            profile = {
+                "include": request.args.get("include"),
+                "comments_limit": request.args.get("comments_limit"),
+            }
+            incoming_profile = load_profile_schema.load(profile)
+            incoming_profile["fields"] = requested_fields(
+                stories_page_schema
+            )
+        except ValidationError as err:
+            return err.messages, 400
+        cursor = request.args.get("cursor")
+        db_session = g.flask_backend_session
+        try:
+            page = keyset_paginate(
+                project_query(
+                    db_session.query(BlogNewsStory),
+                    BlogNewsStory,
+                    incoming_profile["fields"],
+                    STORY_KEY_COLUMNS,
+                ),
+                [BlogNewsStory.time, BlogNewsStory.id],
+                cursor,
+                30,
+            )
+        except ValidationError as err:
+            return err.messages, 400
+        if not page.items and not cursor:
+            return make_response(
+                jsonify(
+                    {
+                        "message": "No blog stories found",
+                        "code": 404
+                    }
+                ), 404,
+            )
+        result_page = {
+            "has_next": page.has_next,
+            "has_previous": page.has_previous,
+            "items": dump_story_page(page.items, incoming_profile),
+            "next_cursor": page.next_cursor,
+            "previous_cursor": page.previous_cursor,
+        }
+        return json_response(result_page)
 
     @classmethod
     def post(cls):
@@ -208,22 +305,44 @@ class BlogNewsStoryResource(Resource):
     def get(cls, story_id):
         """
         Getting GET requests on the '/api/blog_news/<story_id>'
-        endpoint, and returning a blognews story
+        endpoint, and returning a blognews story with its first
+        comments, or '?include=comments&comments_limit=N' comments
         """
         try:
             story_id = {"story_id": story_id}
             incoming_story_id = story_id_schema.load(story_id)
         except ValidationError as err:
             return err.messages, 400
+        try:
+            profile = {
+                "include": request.args.get("include"),
+                "comments_limit": request.args.get("comments_limit"),
+            }
+            incoming_profile = load_profile_schema.load(profile)
+            incoming_profile["fields"] = requested_fields(
+                stories_page_schema
+            )
+        except ValidationError as err:
+            return err.messages, 400
         db_session = g.flask_backend_session
-        story = db_session.query(BlogNewsStory).filter(
+        story = project_query(
+            db_session.query(BlogNewsStory),
+            BlogNewsStory,
+            incoming_profile["fields"],
+            STORY_KEY_COLUMNS,
+        ).filter(
             BlogNewsStory.id == incoming_story_id["story_id"]
         ).first()
         if not story:
             return make_response(
                 jsonify({"message": "Story not found", "code": 404}), 404
             )
-        return make_response(jsonify(story_schema.dump(story)), 200)
+        result_story = dump_story_page(
+            [story],
+            incoming_profile,
+            current_app.config["STORY_COMMENTS_LIMIT"],
+        )[0]
+        return json_response(result_story)
 
     @classmethod
     def delete(cls, story_id):
@@ -319,7 +438,7 @@ class BlogNewsStoryCommentsResource(Resource):
             .order_by(desc(BlogNewsStoryComment.time))
             .all()
         )
-        return jsonify(stories_schema.dump(comments))
+        return json_response(dump(stories_schema, comments))
 
     @classmethod
     def post(cls, story_id):
@@ -354,6 +473,9 @@ class BlogNewsStoryCommentsResource(Resource):
         incoming_comment["type"] = "comment"
         comment_data = BlogNewsStoryComment(**incoming_comment)
         db_session.add(comment_data)
+        change_comment_counts(
+            db_session, BlogNewsStory.id, {incoming_story_id["story_id"]: 1}
+        )
         db_session.commit()
         return make_response(jsonify(
             {
@@ -396,7 +518,7 @@ class BlogNewsStoryCommentResource(Resource):
             return make_response(
                 jsonify({"message": "Comment not found", "code": 404}), 404
             )
-        return make_response(jsonify(story_schema.dump(comment)), 200)
+        return json_response(dump(story_schema, comment))
 
     @classmethod
     def delete(cls, story_id, comment_id):
@@ -430,9 +552,11 @@ class BlogNewsStoryCommentResource(Resource):
             return make_response(
                 jsonify({"message": "Comment not found", "code": 404}), 404
             )
-        db_session.query(BlogNewsStoryComment).filter(
+        parent = comment.parent
+        deleted = db_session.query(BlogNewsStoryComment).filter(
             BlogNewsStoryComment.id == incoming_comment_id["comment_id"]
         ).delete()
+        change_comment_counts(db_session, BlogNewsStory.id, {parent: -deleted})
         db_session.commit()
         return make_response(jsonify(
             {
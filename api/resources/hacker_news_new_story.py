@@ -1,4 +1,4 @@
-from flask import request, jsonify, make_response, g
+from flask import request, jsonify, make_response, g, current_app
 from flask_restful import Resource
 from api.models.hacker_news import (
     HackerNewsNewStory,
@@ -10,19 +10,51 @@ from api.schemas.hacker_news import (
     CommentIdSchema,
     PageNumberSchema,
     StoryIdSchema,
+    LoadProfileSchema,
+    HackerNewsCommentBatchSchema,
+    HackerNewsStoryUpsertSchema,
 )
 from sqlalchemy import desc
-from sqlalchemy_pagination import paginate
+from api.pagination import paginate, keyset_paginate
+from api.loading import dump_stories
+from api.cache import (
+    cached_response,
+    add_cache_tags,
+    invalidate_cache_tags,
+)
+from api.conditional import (
+    conditional_response,
+    fetch_version,
+    page_version,
+    latest,
+    table_version,
+)
+from api.projection import project_query, requested_fields
+from api.serialization import dump, json_response
+from api.ingest import (
+    add_comments,
+    batch_response,
+    check_batch,
+    upsert_stories,
+)
+from api.auth import token_required
+from api.counters import change_comment_counts
 from marshmallow import ValidationError
 import time
 from datetime import datetime
 
+STORY_KEY_COLUMNS = ("id", "hn_id", "parsed_time")
+CACHE_TAG = "hackernews:newstories"
+#
 page_number_schema = PageNumberSchema()
 comment_id_schema = CommentIdSchema()
 story_id_schema = StoryIdSchema()
+load_profile_schema = LoadProfileSchema()
 #
-stories_schema = HackerNewsStorySchema(many=True)
-story_schema = HackerNewsStorySchema()
+stories_page_schema = HackerNewsStorySchema(
+    many=True,
+    exclude=["comments"],
+)
 #
 comments_schema = HackerNewsCommentSchema(many=True)
 add_comment_schema = HackerNewsStorySchema(
@@ -47,6 +79,14 @@ add_comment_schema = HackerNewsStorySchema(
         "origin",
     ],
 )
+add_comments_schema = HackerNewsCommentBatchSchema(
+    many=True,
+    exclude=add_comment_schema.exclude,
+)
+upsert_stories_schema = HackerNewsStoryUpsertSchema(
+    many=True,
+    exclude=["id", "comments", "updated_time"],
+)
 edit_comment_schema = HackerNewsStorySchema(
     exclude=[
         "id",
@@ -71,20 +111,93 @@ edit_comment_schema = HackerNewsStorySchema(
 )
 
 
+def dump_story_page(stories, profile, comments_limit=None):
+    """
+    Returning hacker_news new_stories dumped with the comments
+    load profile of the request
+    """
+    return dump_stories(
+        g.hacker_news_session,
+        stories,
+        stories_page_schema,
+        comments_schema,
+        HackerNewsNewStoryComment,
+        "hn_id",
+        desc(HackerNewsNewStoryComment.parsed_time),
+        profile,
+        comments_limit,
+    )
+
+
+def stories_version():
+    """
+    Returning the version and last modified time of the
+    hacker_news new_stories pages
+    """
+    return page_version(
+        g.hacker_news_session, HackerNewsNewStory, HackerNewsNewStoryComment
+    )
+
+
+def story_version(story_id):
+    """
+    Returning the version and last modified time of a
+    hacker_news new_stories story and its comments
+    """
+    db_session = g.hacker_news_session
+    version = fetch_version(
+        db_session,
+        *table_version(
+            db_session,
+            HackerNewsNewStory,
+            [HackerNewsNewStory.parsed_time],
+            HackerNewsNewStory.hn_id == story_id,
+        ),
+        *table_version(
+            db_session,
+            HackerNewsNewStoryComment,
+            [
+                HackerNewsNewStoryComment.parsed_time,
+                HackerNewsNewStoryComment.updated_time,
+            ],
+            HackerNewsNewStoryComment.parent == story_id,
+        ),
+    )
+    if not version[0]:
+        return None
+    return version, latest(version[1], version[3], version[4])
+
+
 class HackerNewsNewStoriesResource(Resource):
     @classmethod
+    @cached_response
+    @conditional_response(stories_version)
     def get(cls):
         """
         Getting GET requests on the
         '/api/hackernews/newstories/?pagenumber=N'
         endpoint, and returning a page with 30 hacker_news
         new_stories from database.
+        Requests with a '?cursor=' argument are paged by cursor instead.
         """
+        if "cursor" in request.args:
+            return cls.get_cursor_page()
         try:
             pagenumber = {"pagenumber": request.args.get("pagenumber")}
             incoming_pagination = page_number_schema.load(pagenumber)
         except ValidationError as err:
             return err.messages, 400
+        try:
+            profile = {
+                "include": request.args.get("include"),
+                "comments_limit": request.args.get("comments_limit"),
+            }
+            incoming_profile = load_profile_schema.load(profile)
+            incoming_profile["fields"] = requested_fields(
+                stories_page_schema
+            )
+        except ValidationError as err:
+            return err.messages, 400
         if incoming_pagination["pagenumber"] <= 0:
             return make_response(
                 jsonify(
@@ -96,8 +209,17 @@ class HackerNewsNewStoriesResource(Resource):
                 400,
             )
         db_session = g.hacker_news_session
-        stories = db_session.query(HackerNewsNewStory).all()
-        if not stories:
+        page = paginate(
+            project_query(
+                db_session.query(HackerNewsNewStory),
+                HackerNewsNewStory,
+                incoming_profile["fields"],
+                STORY_KEY_COLUMNS,
+            ).order_by(desc(HackerNewsNewStory.parsed_time)),
+            incoming_pagination["pagenumber"],
+            30,
+        )
+        if not page.total:
             return make_response(
                 jsonify(
                     {
@@ -106,20 +228,15 @@ class HackerNewsNewStoriesResource(Resource):
                     }
                 ), 404,
             )
-        page = paginate(
-            db_session.query(HackerNewsNewStory).order_by(
-                desc(HackerNewsNewStory.parsed_time)
-            )
-            .limit(500)
-            .from_self(),
-            incoming_pagination["pagenumber"],
-            30,
+        add_cache_tags(
+            CACHE_TAG,
+            *[f"{CACHE_TAG}:{story.hn_id}" for story in page.items]
         )
         result_page = {
             "current_page": incoming_pagination["pagenumber"],
             "has_next": page.has_next,
             "has_previous": page.has_previous,
-            "items": stories_schema.dump(page.items),
+            "items": dump_story_page(page.items, incoming_profile),
             "next_page": page.next_page,
             "previous_page": page.previous_page,
             "pages": page.pages,
@@ -134,25 +251,101 @@ class HackerNewsNewStoriesResource(Resource):
                     }
                 ), 404,
             )
-        return jsonify(result_page)
+        return json_response(result_page)
+
+    @classmethod
+    def get_cursor_page(cls):
+        """
+        Returning a page with 30 hacker_news new_stories that follows
+        the '/api/hackernews/newstories/?cursor=C' cursor, an empty
+        cursor returns the first page.
+        """
+        try:
+            profile = {
+                "include": request.args.get("include"),
+                "comments_limit": request.args.get("comments_limit"),
+            }
+            incoming_profile = load_profile_schema.load(profile)
+            incoming_profile["fields"] = requested_fields(
+                stories_page_schema
+            )
+        except ValidationError as err:
+            return err.messages, 400
+        cursor = request.args.get("cursor")
+        db_session = g.hacker_news_session
+        try:
+            page = keyset_paginate(
+                project_query(
+                    db_session.query(HackerNewsNewStory),
+                    HackerNewsNewStory,
+                    incoming_profile["fields"],
+                    STORY_KEY_COLUMNS,
+                ),
+                [HackerNewsNewStory.parsed_time, HackerNewsNewStory.id],
+                cursor,
+                30,
+            )
+        except ValidationError as err:
+            return err.messages, 400
+        if not page.items and not cursor:
+            return make_response(
+                jsonify(
+                    {
+                        "message": "No hackernews newstories found",
+                        "code": 404
+                    }
+                ), 404,
+            )
+        add_cache_tags(
+            CACHE_TAG,
+            *[f"{CACHE_TAG}:{story.hn_id}" for story in page.items]
+        )
+        result_page = {
+            "has_next": page.has_next,
+            "has_previous": page.has_previous,
+            "items": dump_story_page(page.items, incoming_profile),
+            "next_cursor": page.next_cursor,
+            "previous_cursor": page.previous_cursor,
+        }
+        return json_response(result_page)
 
 
 class HackerNewsNewStoryResource(Resource):
     @classmethod
+    @cached_response
+    @conditional_response(story_version)
     def get(cls, story_id):
         """
         Getting GET requests on the
         '/api/hackernews/newstories/<story_id>'
-        endpoint, and returning a hacker_news new_stories`s story with comments
+        endpoint, and returning a hacker_news new_stories`s story with
+        its first comments, or '?include=comments&comments_limit=N'
+        comments
         """
         try:
             story_id = {"story_id": story_id}
             incoming_story_id = story_id_schema.load(story_id)
         except ValidationError as err:
             return err.messages, 400
+        try:
+            profile = {
+                "include": request.args.get("include"),
+                "comments_limit": request.args.get("comments_limit"),
+            }
+            incoming_profile = load_profile_schema.load(profile)
+            incoming_profile["fields"] = requested_fields(
+                stories_page_schema
+            )
+        except ValidationError as err:
+            return err.messages, 400
         db_session = g.hacker_news_session
         story = (
-            db_session.query(HackerNewsNewStory).filter(
+            project_query(
+                db_session.query(HackerNewsNewStory),
+                HackerNewsNewStory,
+                incoming_profile["fields"],
+                STORY_KEY_COLUMNS,
+            ).filter(
                 HackerNewsNewStory.hn_id == incoming_story_id["story_id"],
             )
             .order_by(HackerNewsNewStory.parsed_time)
@@ -162,11 +355,19 @@ class HackerNewsNewStoryResource(Resource):
             return make_response(
                 jsonify({"message": "Story not found", "code": 404}), 404
             )
-        return make_response(jsonify(story_schema.dump(story)), 200)
+        add_cache_tags(f"{CACHE_TAG}:{story.hn_id}")
+        result_story = dump_story_page(
+            [story],
+            incoming_profile,
+            current_app.config["STORY_COMMENTS_LIMIT"],
+        )[0]
+        return json_response(result_story)
 
 
 class HackerNewsNewStoryCommentsResource(Resource):
     @classmethod
+    @cached_response
+    @conditional_response(story_version)
     def get(cls, story_id):
         """
         Getting GET requests on the
@@ -186,6 +387,7 @@ class HackerNewsNewStoryCommentsResource(Resource):
             return make_response(
                 jsonify({"message": "Story not found", "code": 404}), 404
             )
+        add_cache_tags(f"{CACHE_TAG}:{story.hn_id}")
         comments = (
             db_session.query(HackerNewsNewStoryComment).filter(
                 HackerNewsNewStoryComment.parent ==
@@ -194,7 +396,7 @@ class HackerNewsNewStoryCommentsResource(Resource):
             .order_by(desc(HackerNewsNewStoryComment.parsed_time))
             .all()
         )
-        return make_response(jsonify(comments_schema.dump(comments)), 200)
+        return json_response(dump(comments_schema, comments))
 
     def post(cls, story_id):
         """
@@ -232,7 +434,13 @@ class HackerNewsNewStoryCommentsResource(Resource):
                             )[:-3]
         comment_data = HackerNewsNewStoryComment(**incoming_comment)
         db_session.add(comment_data)
+        change_comment_counts(
+            db_session,
+            HackerNewsNewStory.hn_id,
+            {incoming_story["story_id"]: 1},
+        )
         db_session.commit()
+        invalidate_cache_tags(f"{CACHE_TAG}:{incoming_story['story_id']}")
         return make_response(jsonify(
             {
                 "message": "Comment added",
@@ -241,6 +449,70 @@ class HackerNewsNewStoryCommentsResource(Resource):
         ), 201,)
 
 
+class HackerNewsNewStoriesUpsertResource(Resource):
+    @classmethod
+    @token_required("INGEST_API_TOKEN")
+    def post(cls):
+        """
+        Getting POST requests on the
+        '/api/hackernews/newstories/upsert' endpoint from the parser, and
+        adding or refreshing a list of hackernews newstories stories
+        by their hn_id
+        """
+        stories = request.get_json()
+        response = check_batch(
+            stories, current_app.config["STORIES_UPSERT_MAX_ITEMS"], "stories"
+        )
+        if response is not None:
+            return response
+        try:
+            incoming_stories = upsert_stories_schema.load(stories)
+        except ValidationError as err:
+            return err.messages, 400
+        counts = upsert_stories(
+            g.hacker_news_session,
+            HackerNewsNewStory,
+            incoming_stories,
+            current_app.config["STORIES_UPSERT_CHUNK_SIZE"],
+        )
+        invalidate_cache_tags(
+            CACHE_TAG,
+            *[f"{CACHE_TAG}:{story['hn_id']}" for story in incoming_stories]
+        )
+        return make_response(
+            jsonify({"message": "Stories upserted", "code": 200, **counts}),
+            200,
+        )
+
+
+class HackerNewsNewStoryCommentsBatchResource(Resource):
+    @classmethod
+    def post(cls):
+        """
+        Getting POST requests on the
+        '/api/hackernews/newstories/comments' endpoint, and adding a list
+        of comments, each with its story_id, to hackernews newstories
+        stories in one transaction
+        """
+        comments = request.get_json()
+        response = check_batch(
+            comments, current_app.config["COMMENTS_BATCH_MAX_ITEMS"]
+        )
+        if response is not None:
+            return response
+        results, story_ids = add_comments(
+            g.hacker_news_session,
+            HackerNewsNewStory,
+            HackerNewsNewStoryComment,
+            add_comments_schema,
+            comments,
+        )
+        invalidate_cache_tags(
+            *[f"{CACHE_TAG}:{story_id}" for story_id in story_ids]
+        )
+        return batch_response(results)
+
+
 class HackerNewsNewStoryCommentResource(Resource):
     @classmethod
     def patch(cls, story_id, comment_id):
@@ -279,6 +551,7 @@ class HackerNewsNewStoryCommentResource(Resource):
             return make_response(
                 jsonify({"message": "Comment not found", "code": 404}), 404
             )
+        parent = comment.parent
         db_session.query(HackerNewsNewStoryComment).filter(
             HackerNewsNewStoryComment.id ==
             incoming_comment_id["comment_id"]
@@ -292,6 +565,7 @@ class HackerNewsNewStoryCommentResource(Resource):
             }
         )
         db_session.commit()
+        invalidate_cache_tags(f"{CACHE_TAG}:{parent}")
         return make_response(jsonify(
             {
                 "message": "Comment updated",
@@ -332,11 +606,16 @@ class HackerNewsNewStoryCommentResource(Resource):
             return make_response(
                 jsonify({"message": "Comment not found", "code": 404}), 404
             )
-        db_session.query(HackerNewsNewStoryComment).filter(
+        parent = comment.parent
+        deleted = db_session.query(HackerNewsNewStoryComment).filter(
             HackerNewsNewStoryComment.id ==
             incoming_comment_id["comment_id"]
         ).delete()
+        change_comment_counts(
+            db_session, HackerNewsNewStory.hn_id, {parent: -deleted}
+        )
         db_session.commit()
+        invalidate_cache_tags(f"{CACHE_TAG}:{parent}")
         return make_response(jsonify(
             {
                 "message": "Comment deleted",
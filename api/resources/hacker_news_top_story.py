@@ -1,4 +1,4 @@
-from flask import request, jsonify, make_response, g
+from flask import request, jsonify, make_response, g, current_app
 from flask_restful import Resource
 from api.models.hacker_news import (
     HackerNewsTopStory,
@@ -10,19 +10,51 @@ from api.schemas.hacker_news import (
     CommentIdSchema,
     PageNumberSchema,
     StoryIdSchema,
+    LoadProfileSchema,
+    HackerNewsCommentBatchSchema,
+    HackerNewsStoryUpsertSchema,
 )
 from sqlalchemy import desc
-from sqlalchemy_pagination import paginate
+from api.pagination import paginate, keyset_paginate
+from api.loading import dump_stories
+from api.cache import (
+    cached_response,
+    add_cache_tags,
+    invalidate_cache_tags,
+)
+from api.conditional import (
+    conditional_response,
+    fetch_version,
+    page_version,
+    latest,
+    table_version,
+)
+from api.projection import project_query, requested_fields
+from api.serialization import dump, json_response
+from api.ingest import (
+    add_comments,
+    batch_response,
+    check_batch,
+    upsert_stories,
+)
+from api.auth import token_required
+from api.counters import change_comment_counts
 from marshmallow import ValidationError
 import time
 from datetime import datetime
 
+STORY_KEY_COLUMNS = ("id", "hn_id", "parsed_time")
+CACHE_TAG = "hackernews:topstories"
+#
 page_number_schema = PageNumberSchema()
 comment_id_schema = CommentIdSchema()
 story_id_schema = StoryIdSchema()
+load_profile_schema = LoadProfileSchema()
 #
-stories_schema = HackerNewsStorySchema(many=True)
-story_schema = HackerNewsStorySchema()
+stories_page_schema = HackerNewsStorySchema(
+    many=True,
+    exclude=["comments"],
+)
 #
 comments_schema = HackerNewsCommentSchema(many=True)
 add_comment_schema = HackerNewsStorySchema(
@@ -47,6 +79,14 @@ add_comment_schema = HackerNewsStorySchema(
         "origin",
     ],
 )
+add_comments_schema = HackerNewsCommentBatchSchema(
+    many=True,
+    exclude=add_comment_schema.exclude,
+)
+upsert_stories_schema = HackerNewsStoryUpsertSchema(
+    many=True,
+    exclude=["id", "comments", "updated_time"],
+)
 edit_comment_schema = HackerNewsStorySchema(
     exclude=[
         "id",
@@ -71,20 +111,93 @@ edit_comment_schema = HackerNewsStorySchema(
 )
 
 
+def dump_story_page(stories, profile, comments_limit=None):
+    """
+    Returning hacker_news top_stories dumped with the comments
+    load profile of the request
+    """
+    return dump_stories(
+        g.hacker_news_session,
+        stories,
+        stories_page_schema,
+        comments_schema,
+        HackerNewsTopStoryComment,
+        "hn_id",
+        desc(HackerNewsTopStoryComment.parsed_time),
+        profile,
+        comments_limit,
+    )
+
+
+def stories_version():
+    """
+    Returning the version and last modified time of the
+    hacker_news top_stories pages
+    """
+    return page_version(
+        g.hacker_news_session, HackerNewsTopStory, HackerNewsTopStoryComment
+    )
+
+
+def story_version(story_id):
+    """
+    Returning the version and last modified time of a
+    hacker_news top_stories story and its comments
+    """
+    db_session = g.hacker_news_session
+    version = fetch_version(
+        db_session,
+        *table_version(
+            db_session,
+            HackerNewsTopStory,
+            [HackerNewsTopStory.parsed_time],
+            HackerNewsTopStory.hn_id == story_id,
+        ),
+        *table_version(
+            db_session,
+            HackerNewsTopStoryComment,
+            [
+                HackerNewsTopStoryComment.parsed_time,
+                HackerNewsTopStoryComment.updated_time,
+            ],
+            HackerNewsTopStoryComment.parent == story_id,
+        ),
+    )
+    if not version[0]:
+        return None
+    return version, latest(version[1], version[3], version[4])
+
+
 class HackerNewsTopStoriesResourse(Resource):
     @classmethod
+    @cached_response
+    @conditional_response(stories_version)
     def get(cls):
         """
         Getting GET requests on the
         '/api/hackernews/topstories/?pagenumber=N'
         endpoint, and returning a page with 30 hacker_news
         top_stories from database.
+        Requests with a '?cursor=' argument are paged by cursor instead.
         """
+        if "cursor" in request.args:
+            return cls.get_cursor_page()
         try:
             pagenumber = {"pagenumber": request.args.get("pagenumber")}
             incoming_pagination = page_number_schema.load(pagenumber)
         except ValidationError as err:
             return err.messages, 400
+        try:
+            profile = {
+                "include": request.args.get("include"),
+                "comments_limit": request.args.get("comments_limit"),
+            }
+            incoming_profile = load_profile_schema.load(profile)
+            incoming_profile["fields"] = requested_fields(
+                stories_page_schema
+            )
+        except ValidationError as err:
+            return err.messages, 400
         if incoming_pagination["pagenumber"] <= 0:
             return make_response(
                 jsonify(
@@ -96,8 +209,17 @@ class HackerNewsTopStoriesResourse(Resource):
                 400,
             )
         db_session = g.hacker_news_session
-        stories = db_session.query(HackerNewsTopStory).all()
-        if not stories:
+        page = paginate(
+            project_query(
+                db_session.query(HackerNewsTopStory),
+                HackerNewsTopStory,
+                incoming_profile["fields"],
+                STORY_KEY_COLUMNS,
+            ).order_by(desc(HackerNewsTopStory.parsed_time)),
+            incoming_pagination["pagenumber"],
+            30,
+        )
+        if not page.total:
             return make_response(
                 jsonify(
                     {
@@ -107,20 +229,15 @@ class HackerNewsTopStoriesResourse(Resource):
                     ),
                 404,
             )
-        page = paginate(
-            db_session.query(HackerNewsTopStory).order_by(desc(
-                HackerNewsTopStory.parsed_time
-            ))
-            .limit(500)
-            .from_self(),
-            incoming_pagination["pagenumber"],
-            30,
+        add_cache_tags(
+            CACHE_TAG,
+            *[f"{CACHE_TAG}:{story.hn_id}" for story in page.items]
         )
         result_page = {
             "current_page": incoming_pagination["pagenumber"],
             "has_next": page.has_next,
             "has_previous": page.has_previous,
-            "items": stories_schema.dump(page.items),
+            "items": dump_story_page(page.items, incoming_profile),
             "next_page": page.next_page,
             "previous_page": page.previous_page,
             "pages": page.pages,
@@ -135,25 +252,102 @@ class HackerNewsTopStoriesResourse(Resource):
                     }
                 ), 404,
             )
-        return jsonify(result_page)
+        return json_response(result_page)
+
+    @classmethod
+    def get_cursor_page(cls):
+        """
+        Returning a page with 30 hacker_news top_stories that follows
+        the '/api/hackernews/topstories/?cursor=C' cursor, an empty
+        cursor returns the first page.
+        """
+        try:
+            profile = {
+                "include": request.args.get("include"),
+                "comments_limit": request.args.get("comments_limit"),
+            }
+            incoming_profile = load_profile_schema.load(profile)
+            incoming_profile["fields"] = requested_fields(
+                stories_page_schema
+            )
+        except ValidationError as err:
+            return err.messages, 400
+        cursor = request.args.get("cursor")
+        db_session = g.hacker_news_session
+        try:
+            page = keyset_paginate(
+                project_query(
+                    db_session.query(HackerNewsTopStory),
+                    HackerNewsTopStory,
+                    incoming_profile["fields"],
+                    STORY_KEY_COLUMNS,
+                ),
+                [HackerNewsTopStory.parsed_time, HackerNewsTopStory.id],
+                cursor,
+                30,
+            )
+        except ValidationError as err:
+            return err.messages, 400
+        if not page.items and not cursor:
+            return make_response(
+                jsonify(
+                    {
+                        "message": "No hackernews topstories found",
+                        "code": 404
+                    }
+                    ),
+                404,
+            )
+        add_cache_tags(
+            CACHE_TAG,
+            *[f"{CACHE_TAG}:{story.hn_id}" for story in page.items]
+        )
+        result_page = {
+            "has_next": page.has_next,
+            "has_previous": page.has_previous,
+            "items": dump_story_page(page.items, incoming_profile),
+            "next_cursor": page.next_cursor,
+            "previous_cursor": page.previous_cursor,
+        }
+        return json_response(result_page)
 
 
 class HackerNewsTopStoryResource(Resource):
     @classmethod
+    @cached_response
+    @conditional_response(story_version)
     def get(cls, story_id):
         """
         Getting GET requests on the
         '/api/hackernews/topstories/<story_id>'
-        endpoint, and returning a hacker_news top_stories`s story with comments
+        endpoint, and returning a hacker_news top_stories`s story with
+        its first comments, or '?include=comments&comments_limit=N'
+        comments
         """
         try:
             story_id = {"story_id": story_id}
             incoming_story_id = story_id_schema.load(story_id)
         except ValidationError as err:
             return err.messages, 400
+        try:
+            profile = {
+                "include": request.args.get("include"),
+                "comments_limit": request.args.get("comments_limit"),
+            }
+            incoming_profile = load_profile_schema.load(profile)
+            incoming_profile["fields"] = requested_fields(
+                stories_page_schema
+            )
+        except ValidationError as err:
+            return err.messages, 400
         db_session = g.hacker_news_session
         story = (
-            db_session.query(HackerNewsTopStory).filter(
+            project_query(
+                db_session.query(HackerNewsTopStory),
+                HackerNewsTopStory,
+                incoming_profile["fields"],
+                STORY_KEY_COLUMNS,
+            ).filter(
                 HackerNewsTopStory.hn_id == incoming_story_id["story_id"],
             )
             .order_by(HackerNewsTopStory.parsed_time)
@@ -163,11 +357,19 @@ class HackerNewsTopStoryResource(Resource):
             return make_response(
                 jsonify({"message": "Story not found", "code": 404}), 404
             )
-        return make_response(jsonify(story_schema.dump(story)), 200)
+        add_cache_tags(f"{CACHE_TAG}:{story.hn_id}")
+        result_story = dump_story_page(
+            [story],
+            incoming_profile,
+            current_app.config["STORY_COMMENTS_LIMIT"],
+        )[0]
+        return json_response(result_story)
 
 
 class HackerNewsTopStoryCommentsResource(Resource):
     @classmethod
+    @cached_response
+    @conditional_response(story_version)
     def get(cls, story_id):
         """
         Getting GET requests on the
@@ -187,6 +389,7 @@ class HackerNewsTopStoryCommentsResource(Resource):
             return make_response(
                 jsonify({"message": "Story not found", "code": 404}), 404
             )
+        add_cache_tags(f"{CACHE_TAG}:{story.hn_id}")
         comments = (
             db_session.query(HackerNewsTopStoryComment).filter(
                 HackerNewsTopStoryComment.parent ==
@@ -195,7 +398,7 @@ class HackerNewsTopStoryCommentsResource(Resource):
             .order_by(desc(HackerNewsTopStoryComment.parsed_time))
             .all()
         )
-        return make_response(jsonify(comments_schema.dump(comments)), 200)
+        return json_response(dump(comments_schema, comments))
 
     def post(cls, story_id):
         """
@@ -233,7 +436,13 @@ class HackerNewsTopStoryCommentsResource(Resource):
         )[:-3]
         comment_data = HackerNewsTopStoryComment(**incoming_comment)
         db_session.add(comment_data)
+        change_comment_counts(
+            db_session,
+            HackerNewsTopStory.hn_id,
+            {incoming_story["story_id"]: 1},
+        )
         db_session.commit()
+        invalidate_cache_tags(f"{CACHE_TAG}:{incoming_story['story_id']}")
         return make_response(jsonify(
             {
                 "message": "Comment added",
@@ -242,6 +451,70 @@ class HackerNewsTopStoryCommentsResource(Resource):
         ), 201,)
 
 
+class HackerNewsTopStoriesUpsertResource(Resource):
+    @classmethod
+    @token_required("INGEST_API_TOKEN")
+    def post(cls):
+        """
+        Getting POST requests on the
+        '/api/hackernews/topstories/upsert' endpoint from the parser, and
+        adding or refreshing a list of hackernews topstories stories
+        by their hn_id
+        """
+        stories = request.get_json()
+        response = check_batch(
+            stories, current_app.config["STORIES_UPSERT_MAX_ITEMS"], "stories"
+        )
+        if response is not None:
+            return response
+        try:
+            incoming_stories = upsert_stories_schema.load(stories)
+        except ValidationError as err:
+            return err.messages, 400
+        counts = upsert_stories(
+            g.hacker_news_session,
+            HackerNewsTopStory,
+            incoming_stories,
+            current_app.config["STORIES_UPSERT_CHUNK_SIZE"],
+        )
+        invalidate_cache_tags(
+            CACHE_TAG,
+            *[f"{CACHE_TAG}:{story['hn_id']}" for story in incoming_stories]
+        )
+        return make_response(
+            jsonify({"message": "Stories upserted", "code": 200, **counts}),
+            200,
+        )
+
+
+class HackerNewsTopStoryCommentsBatchResource(Resource):
+    @classmethod
+    def post(cls):
+        """
+        Getting POST requests on the
+        '/api/hackernews/topstories/comments' endpoint, and adding a list
+        of comments, each with its story_id, to hackernews topstories
+        stories in one transaction
+        """
+        comments = request.get_json()
+        response = check_batch(
+            comments, current_app.config["COMMENTS_BATCH_MAX_ITEMS"]
+        )
+        if response is not None:
+            return response
+        results, story_ids = add_comments(
+            g.hacker_news_session,
+            HackerNewsTopStory,
+            HackerNewsTopStoryComment,
+            add_comments_schema,
+            comments,
+        )
+        invalidate_cache_tags(
+            *[f"{CACHE_TAG}:{story_id}" for story_id in story_ids]
+        )
+        return batch_response(results)
+
+
 class HackerNewsTopStoryCommentResource(Resource):
     @classmethod
     def patch(cls, story_id, comment_id):
@@ -279,6 +552,7 @@ class HackerNewsTopStoryCommentResource(Resource):
             return make_response(
                 jsonify({"message": "Comment not found", "code": 404}), 404
             )
+        parent = comment.parent
         db_session.query(HackerNewsTopStoryComment).filter(
             HackerNewsTopStoryComment.id == incoming_comment_id["comment_id"]
         ).update(
@@ -290,6 +564,7 @@ class HackerNewsTopStoryCommentResource(Resource):
             }
         )
         db_session.commit()
+        invalidate_cache_tags(f"{CACHE_TAG}:{parent}")
         return make_response(jsonify(
             {
                 "message": "Comment updated",
@@ -329,10 +604,15 @@ class HackerNewsTopStoryCommentResource(Resource):
             return make_response(
                 jsonify({"message": "Comment not found", "code": 404}), 404
             )
-        db_session.query(HackerNewsTopStoryComment).filter(
+        parent = comment.parent
+        deleted = db_session.query(HackerNewsTopStoryComment).filter(
             HackerNewsTopStoryComment.id == incoming_comment_id["comment_id"]
         ).delete()
+        change_comment_counts(
+            db_session, HackerNewsTopStory.hn_id, {parent: -deleted}
+        )
         db_session.commit()
+        invalidate_cache_tags(f"{CACHE_TAG}:{parent}")
         return make_response(jsonify(
             {
                 "message": "Comment deleted",
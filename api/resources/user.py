@@ -1,4 +1,12 @@
-from flask import request, jsonify, make_response, g
+import json
+from flask import (
+    request,
+    jsonify,
+    make_response,
+    g,
+    current_app,
+    stream_with_context,
+)
 from flask_restful import Resource
 from api.models.user import UserModel
 from api.models.blog_news import BlogNewsStory, BlogNewsStoryComment
@@ -6,45 +14,93 @@ from api.schemas.user import (
     UserSchema,
     UserSigninSchema,
     UserPasswordUpdateSchema,
-    UsernameSchema
+    UsernameSchema,
+    UsersFormatSchema,
 )
 from api.schemas.blog_news import (
     BlogNewsStorySchema,
     StoryIdSchema,
-    NewsPaginationSchema
+    NewsPaginationSchema,
+    LoadProfileSchema,
 )
+from api.serialization import dump, json_response
 from marshmallow import ValidationError
-from sqlalchemy_pagination import paginate
+from api.pagination import paginate, keyset_paginate
+from api.resources.blog_news import dump_story_page
 from sqlalchemy import desc
-from passlib.hash import argon2
-from sqlalchemy.exc import IntegrityError
-from uuid import uuid4
+from api.hashing import hash_password, verify_and_update_password
+from api.accounts import find_user, register_user, UserExists
+from api.user_cache import find_cached_user, invalidate_cached_user
 
 user_register_schema = UserSchema()
-users_schema = UserSchema(many=True)
+user_public_schema = UserSchema(exclude=("password",))
+users_public_schema = UserSchema(many=True, exclude=("password",))
+users_format_schema = UsersFormatSchema()
 user_signin_schema = UserSigninSchema()
 user_password_schema = UserPasswordUpdateSchema()
 username_schema = UsernameSchema()
 blognews_stories_schema = BlogNewsStorySchema(many=True)
-blognews_story_schema = BlogNewsStorySchema()
 story_id_schema = StoryIdSchema()
 news_pagination_schema = NewsPaginationSchema()
+load_profile_schema = LoadProfileSchema()
+
+
+def stream_users(query, batch_size=1000):
+    """
+    Yielding every user of the query as a JSON line, read through a
+    server-side cursor batch_size rows at a time, so the memory stays
+    the same however many users there are
+    """
+    users = query.execution_options(stream_results=True).yield_per(batch_size)
+    for user in users:
+        yield json.dumps(
+            dump(user_public_schema, user), separators=(",", ":")
+        ) + "\n"
 
 
 class UsersResource(Resource):
     @classmethod
     def get(cls):
         """
-        Getting GET requests on the '/api/users' endpoint, and returning a list
-        with all users in database.
+        Getting GET requests on the '/api/users/?cursor=C' endpoint, and
+        returning a page with 30 users, newest first, without passwords,
+        an empty or missing cursor returns the first page.
+        Requests with '?format=ndjson' stream every user instead.
         """
+        try:
+            users_format = {"format": request.args.get("format", "json")}
+            incoming_format = users_format_schema.load(users_format)
+        except ValidationError as err:
+            return err.messages, 400
         db_session = g.flask_backend_session
-        users = db_session.query(UserModel).all()
-        if not users:
+        if incoming_format["format"] == "ndjson":
+            return current_app.response_class(
+                stream_with_context(
+                    stream_users(
+                        db_session.query(UserModel).order_by(UserModel.id)
+                    )
+                ),
+                mimetype="application/x-ndjson",
+            )
+        cursor = request.args.get("cursor")
+        try:
+            page = keyset_paginate(
+                db_session.query(UserModel), [UserModel.id], cursor, 30,
+            )
+        except ValidationError as err:
+            return err.messages, 400
+        if not page.items and not cursor:
             return make_response(
                 jsonify({"message": "users not found", "code": 404}), 404
             )
-        return users_schema.dump(users)
+        result_page = {
+            "has_next": page.has_next,
+            "has_previous": page.has_previous,
+            "items": dump(users_public_schema, page.items),
+            "next_cursor": page.next_cursor,
+            "previous_cursor": page.previous_cursor,
+        }
+        return json_response(result_page)
 
     @classmethod
     def post(cls):
@@ -57,50 +113,34 @@ class UsersResource(Resource):
         except ValidationError as err:
             return err.messages, 400
         db_session = g.flask_backend_session
-        user_username = db_session.query(UserModel).filter_by(
-            username=user["username"]
-        ).first()
-        user_email = db_session.query(UserModel).filter_by(
-            email_address=user["email_address"]
-        ).first()
-        if user_username:
-            return make_response(
-                jsonify(
-                    {
-                        "message": "User with this username already exist"
-                    }
-                ), 400
-            )
-        if user_email:
-            return make_response(
-                jsonify({"message": "User with this email already exist"}), 400
-            )
-        user["password"] = argon2.hash(user["password"])
-        ###
-        flag = True
-        while flag:
-            try:
-                user["user_uuid"] = str(uuid4())
-                user["origin"] = "my_blog"
-                db_session.add(UserModel(**user))
-                db_session.commit()
+        user.pop("user_uuid", None)
+        user["password"] = hash_password(user["password"])
+        user["origin"] = "my_blog"
+        try:
+            user = register_user(db_session, user)
+        except UserExists as err:
+            if err.field == "username":
                 return make_response(
                     jsonify(
                         {
-                            "message": (
-                                f"Registration succesfull "
-                                f"{user['username']}"
-                            ),
-                            "username": user["username"],
-                            "user_uuid": user["user_uuid"],
-                            "origin": user["origin"],
+                            "message": "User with this username already exist"
                         }
-                    ),
-                    201,
+                    ), 400
                 )
-                flag = False
-            except IntegrityError:
-                db_session.rollback()
+            return make_response(
+                jsonify({"message": "User with this email already exist"}), 400
+            )
+        return make_response(
+            jsonify(
+                {
+                    "message": f"Registration succesfull {user['username']}",
+                    "username": user["username"],
+                    "user_uuid": user["user_uuid"],
+                    "origin": user["origin"],
+                }
+            ),
+            201,
+        )
 
 
 class UserResource(Resource):
@@ -108,23 +148,21 @@ class UserResource(Resource):
     def get(cls, username):
         """
         Getting GET requests on the '/api/users/<username>' endpoint, and
-        returning the user from the database.
+        returning the user, without its password, from the user cache
+        or the database.
         """
         try:
             username = {"username": username}
             incoming_username = username_schema.load(username)
         except ValidationError as err:
             return err.messages, 400
-        db_session = g.flask_backend_session
-        user = db_session.query(UserModel).filter(
-            UserModel.username == incoming_username['username']
-        ).first()
+        user = find_cached_user("username", incoming_username["username"])
         if not user:
             return make_response(
                 jsonify({"message": "user not found", "code": 404}), 404
             )
         return make_response(
-            jsonify(user_register_schema.dump(user))
+            jsonify(user_public_schema.dump(user))
         )
 
     @classmethod
@@ -154,10 +192,12 @@ class UserResource(Resource):
             UserModel.user_uuid == incoming_username['username']
         ).update(
             {
-                "password": argon2.hash(incoming_user["password"])
+                "password": hash_password(incoming_user["password"])
             }
         )
+        user_id = user.id
         db_session.commit()
+        invalidate_cached_user(user_id)
         return make_response(
             jsonify(
                 {
@@ -186,8 +226,10 @@ class UserResource(Resource):
             return make_response(
                 jsonify({"message": "user not found", "code": 404}), 404
             )
+        user_id = user.id
         db_session.delete(user)
         db_session.commit()
+        invalidate_cached_user(user_id)
         return make_response(jsonify(
             {
                 "message": "User deleted",
@@ -196,6 +238,18 @@ class UserResource(Resource):
         ), 200,)
 
 
+def check_password(user, password):
+    """
+    Returning True when the password is the user`s password, and
+    rehashing it when its hash was made with other argon2 parameters
+    """
+    valid, new_hash = verify_and_update_password(password, user.password)
+    if new_hash is not None:
+        user.password = new_hash
+        g.flask_backend_session.commit()
+    return valid
+
+
 class UserLogin(Resource):
     @classmethod
     def post(cls):
@@ -210,15 +264,14 @@ class UserLogin(Resource):
             return err.messages, 400
         ###
         db_session = g.flask_backend_session
-        db_user = db_session.query(UserModel).filter_by(
-            username=incoming_user["username"]
-        ).first()
-        db_email_address = db_session.query(UserModel).filter_by(
-            email_address=incoming_user["email_address"]
-        ).first()
+        db_user, db_email_address = find_user(
+            db_session,
+            incoming_user["username"],
+            incoming_user["email_address"],
+        )
         ###
         if db_user:
-            if argon2.verify(incoming_user["password"], db_user.password):
+            if check_password(db_user, incoming_user["password"]):
                 return make_response(
                     jsonify(
                         {
@@ -234,10 +287,7 @@ class UserLogin(Resource):
                 jsonify({"message": "Username or password Incorect!"}), 400
             )
         elif db_email_address:
-            if argon2.verify(
-                incoming_user["password"],
-                db_email_address.password
-            ):
+            if check_password(db_email_address, incoming_user["password"]):
                 return make_response(
                     jsonify(
                         {
@@ -275,13 +325,24 @@ class UserStories(Resource):
         """
         Getting GET requests on the
         '/api/users/<username>/stories/?pagenumber=N' endpoint,
-        and returning up to 500 user`s stories
+        and returning up to 500 user`s stories.
+        Requests with a '?cursor=' argument are paged by cursor instead.
         """
+        if "cursor" in request.args:
+            return cls.get_cursor_page(username)
         try:
             pagenumber = {"pagenumber": request.args.get("pagenumber")}
             incoming_pagination = news_pagination_schema.load(pagenumber)
         except ValidationError as err:
             return err.messages, 400
+        try:
+            profile = {
+                "include": request.args.get("include"),
+                "comments_limit": request.args.get("comments_limit"),
+            }
+            incoming_profile = load_profile_schema.load(profile)
+        except ValidationError as err:
+            return err.messages, 400
         if incoming_pagination["pagenumber"] <= 0:
             return make_response(
                 jsonify(
@@ -298,29 +359,24 @@ class UserStories(Resource):
         except ValidationError as err:
             return err.messages, 400
         db_session = g.flask_backend_session
-        users_stories = db_session.query(BlogNewsStory).filter(
-            BlogNewsStory.by == incoming_username['username']
-        ).all()
-        if not users_stories:
-            return make_response(
-                jsonify(
-                    {'message': 'stories not found', 'code': 404}
-                ), 404
-            )
         page = paginate(
             db_session.query(BlogNewsStory).filter(
                 BlogNewsStory.by == incoming_username['username']
-            ).order_by(desc(BlogNewsStory.time))
-            .limit(500)
-            .from_self(),
+            ).order_by(desc(BlogNewsStory.time)),
             incoming_pagination["pagenumber"],
             30,
         )
+        if not page.total:
+            return make_response(
+                jsonify(
+                    {'message': 'stories not found', 'code': 404}
+                ), 404
+            )
         result_page = {
             "current_page": incoming_pagination["pagenumber"],
             "has_next": page.has_next,
             "has_previous": page.has_previous,
-            "items": blognews_stories_schema.dump(page.items),
+            "items": dump_story_page(page.items, incoming_profile),
             "next_page": page.next_page,
             "previous_page": page.previous_page,
             "pages": page.pages,
@@ -335,7 +391,55 @@ class UserStories(Resource):
                     }
                 ), 404,
             )
-        return jsonify(result_page)
+        return json_response(result_page)
+
+    @classmethod
+    def get_cursor_page(cls, username):
+        """
+        Returning a page with 30 user`s stories that follows the
+        '/api/users/<username>/stories/?cursor=C' cursor, an empty
+        cursor returns the first page.
+        """
+        try:
+            username = {"username": username}
+            incoming_username = username_schema.load(username)
+        except ValidationError as err:
+            return err.messages, 400
+        try:
+            profile = {
+                "include": request.args.get("include"),
+                "comments_limit": request.args.get("comments_limit"),
+            }
+            incoming_profile = load_profile_schema.load(profile)
+        except ValidationError as err:
+            return err.messages, 400
+        cursor = request.args.get("cursor")
+        db_session = g.flask_backend_session
+        try:
+            page = keyset_paginate(
+                db_session.query(BlogNewsStory).filter(
+                    BlogNewsStory.by == incoming_username['username']
+                ),
+                [BlogNewsStory.time, BlogNewsStory.id],
+                cursor,
+                30,
+            )
+        except ValidationError as err:
+            return err.messages, 400
+        if not page.items and not cursor:
+            return make_response(
+                jsonify(
+                    {'message': 'stories not found', 'code': 404}
+                ), 404
+            )
+        result_page = {
+            "has_next": page.has_next,
+            "has_previous": page.has_previous,
+            "items": dump_story_page(page.items, incoming_profile),
+            "next_cursor": page.next_cursor,
+            "previous_cursor": page.previous_cursor,
+        }
+        return json_response(result_page)
 
 
 class UserStory(Resource):
@@ -344,7 +448,8 @@ class UserStory(Resource):
         """
         Getting GET requests on the
         '/api/users/<username>/stories/<story_id>' endpoint,
-        and returning user`s story by story id
+        and returning user`s story by story id with its first comments,
+        or '?include=comments&comments_limit=N' comments
         """
         try:
             username = {"username": username}
@@ -356,6 +461,14 @@ class UserStory(Resource):
             incoming_story_id = story_id_schema.load(story_id)
         except ValidationError as err:
             return err.messages, 400
+        try:
+            profile = {
+                "include": request.args.get("include"),
+                "comments_limit": request.args.get("comments_limit"),
+            }
+            incoming_profile = load_profile_schema.load(profile)
+        except ValidationError as err:
+            return err.messages, 400
         db_session = g.flask_backend_session
         user_story = db_session.query(BlogNewsStory).filter(
             BlogNewsStory.by == incoming_username['username']
@@ -368,7 +481,12 @@ class UserStory(Resource):
                     {'message': 'story not found', 'code': 404}
                 ), 404
             )
-        return jsonify(blognews_story_schema.dump(user_story))
+        result_story = dump_story_page(
+            [user_story],
+            incoming_profile,
+            current_app.config["STORY_COMMENTS_LIMIT"],
+        )[0]
+        return json_response(result_story)
 
 
 class UserComments(Resource):
@@ -377,8 +495,11 @@ class UserComments(Resource):
         """
         Getting GET requests on the
         '/api/users/<username>/comments/?pagenumber=N' endpoint,
-        and returning up to 500 user' comments
+        and returning up to 500 user' comments.
+        Requests with a '?cursor=' argument are paged by cursor instead.
         """
+        if "cursor" in request.args:
+            return cls.get_cursor_page(username)
         try:
             pagenumber = {"pagenumber": request.args.get("pagenumber")}
             incoming_pagination = news_pagination_schema.load(pagenumber)
@@ -400,29 +521,24 @@ class UserComments(Resource):
         except ValidationError as err:
             return err.messages, 400
         db_session = g.flask_backend_session
-        users_comments = db_session.query(BlogNewsStoryComment).filter(
-            BlogNewsStoryComment.by == incoming_username['username']
-        ).all()
-        if not users_comments:
-            return make_response(
-                jsonify(
-                    {'message': 'comments not found', 'code': 404}
-                ), 404
-            )
         page = paginate(
             db_session.query(BlogNewsStoryComment).filter(
                 BlogNewsStoryComment.by == incoming_username['username']
-            ).order_by(desc(BlogNewsStoryComment.time))
-            .limit(500)
-            .from_self(),
+            ).order_by(desc(BlogNewsStoryComment.time)),
             incoming_pagination["pagenumber"],
             30,
         )
+        if not page.total:
+            return make_response(
+                jsonify(
+                    {'message': 'comments not found', 'code': 404}
+                ), 404
+            )
         result_page = {
             "current_page": incoming_pagination["pagenumber"],
             "has_next": page.has_next,
             "has_previous": page.has_previous,
-            "items": blognews_stories_schema.dump(page.items),
+            "items": dump(blognews_stories_schema, page.items),
             "next_page": page.next_page,
             "previous_page": page.previous_page,
             "pages": page.pages,
@@ -437,4 +553,44 @@ class UserComments(Resource):
                     }
                 ), 404,
             )
-        return jsonify(result_page)
+        return json_response(result_page)
+
+    @classmethod
+    def get_cursor_page(cls, username):
+        """
+        Returning a page with 30 user`s comments that follows the
+        '/api/users/<username>/comments/?cursor=C' cursor, an empty
+        cursor returns the first page.
+        """
+        try:
+            username = {"username": username}
+            incoming_username = username_schema.load(username)
+        except ValidationError as err:
+            return err.messages, 400
+        cursor = request.args.get("cursor")
+        db_session = g.flask_backend_session
+        try:
+            page = keyset_paginate(
+                db_session.query(BlogNewsStoryComment).filter(
+                    BlogNewsStoryComment.by == incoming_username['username']
+                ),
+                [BlogNewsStoryComment.time, BlogNewsStoryComment.id],
+                cursor,
+                30,
+            )
+        except ValidationError as err:
+            return err.messages, 400
+        if not page.items and not cursor:
+            return make_response(
+                jsonify(
+                    {'message': 'comments not found', 'code': 404}
+                ), 404
+            )
+        result_page = {
+            "has_next": page.has_next,
+            "has_previous": page.has_previous,
+            "items": dump(blognews_stories_schema, page.items),
+            "next_cursor": page.next_cursor,
+            "previous_cursor": page.previous_cursor,
+        }
+        return json_response(result_page)
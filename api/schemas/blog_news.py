@@ -1,4 +1,5 @@
 from marshmallow import Schema, fields, validate
+from api.schemas.hacker_news import LoadProfileSchema # noqa
 
 
 class NewsPaginationSchema(Schema):
@@ -13,6 +13,17 @@ class CommentIdSchema(Schema):
     comment_id = fields.Int(required=True)
 
 
+class LoadProfileSchema(Schema):
+    include = fields.Str(
+        allow_none=True,
+        validate=validate.OneOf(["comments"])
+    )
+    comments_limit = fields.Int(
+        allow_none=True,
+        validate=validate.Range(min=0)
+    )
+
+
 class HackerNewsCommentSchema(Schema):
     id = fields.Str()
     hn_id = fields.Str()
@@ -62,3 +73,13 @@ class HackerNewsStorySchema(Schema):
     origin = fields.Str()
     parsed_time = fields.DateTime()
     updated_time = fields.DateTime()
+
+
+class HackerNewsCommentBatchSchema(HackerNewsStorySchema):
+    story_id = fields.Int(required=True)
+
+
+class HackerNewsStoryUpsertSchema(HackerNewsStorySchema):
+    hn_id = fields.Int(required=True)
+    by = fields.Str()
+    text = fields.Str()
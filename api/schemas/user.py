@@ -44,6 +44,13 @@ class UserSchema(Schema):
     origin = fields.Str()
 
 
+class UsersFormatSchema(Schema):
+    format = fields.Str(
+        required=True,
+        validate=validate.OneOf(["json", "ndjson"])
+    )
+
+
 class UserSigninSchema(Schema):
     username = fields.Str(
         required=True,
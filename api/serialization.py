@@ -0,0 +1,169 @@
+from functools import lru_cache
+from flask import current_app, jsonify, make_response, request
+from marshmallow import fields, missing
+from marshmallow.utils import ensure_text_type
+import orjson
+
+ISO_FORMATS = (None, "iso", "iso8601")
+
+
+def _field_source(index, name, field):
+    """
+    Returning the source lines that dump one schema field into data,
+    the field types the schemas use are inlined, the other fields
+    go through field.serialize like Schema.dump does
+    """
+    key = field.data_key if field.data_key is not None else name
+    attribute = field.attribute or name
+    if "." in attribute or field.default is not missing:
+        return [
+            f"value = fields[{index}].serialize({name!r}, obj, accessor)",
+            "if value is not missing:",
+            f"    data[{key!r}] = value",
+        ]
+    field_type = type(field)
+    if field_type is fields.String:
+        dumped = (
+            "value if value is None or type(value) is str "
+            "else ensure_text_type(value)"
+        )
+    elif field_type is fields.Integer and not field.as_string:
+        dumped = "value if value is None else int(value)"
+    elif field_type is fields.Boolean:
+        dumped = (
+            "value if value is None or value is True or value is False "
+            f"else fields[{index}]._serialize(value, {name!r}, obj)"
+        )
+    elif field_type is fields.DateTime and field.format in ISO_FORMATS:
+        dumped = "value if value is None else value.isoformat()"
+    elif (
+        field_type is fields.List
+        and type(field.inner) is fields.Integer
+        and not field.inner.as_string
+    ):
+        dumped = (
+            "value if value is None else "
+            "[each if each is None else int(each) for each in value]"
+        )
+    elif field_type is fields.Nested and not isinstance(field.nested, str):
+        dumped = f"value if value is None else nested[{index}](value)"
+    else:
+        return [
+            f"value = fields[{index}].serialize({name!r}, obj, accessor)",
+            "if value is not missing:",
+            f"    data[{key!r}] = value",
+        ]
+    return [
+        f"value = values.get({attribute!r}, missing)",
+        "if value is missing:",
+        f"    value = getattr(obj, {attribute!r}, missing)",
+        "if value is not missing:",
+        f"    data[{key!r}] = {dumped}",
+    ]
+
+
+@lru_cache(maxsize=1024)
+def compile_schema(schema):
+    """
+    Returning a function that dumps like schema.dump(obj), generated
+    from the schema fields once. Loaded attributes are read from the
+    instance __dict__, skipping the SQLAlchemy attribute descriptors.
+    """
+    if schema._has_processors("pre_dump") or schema._has_processors(
+        "post_dump"
+    ):
+        raise ValueError(f"{type(schema).__name__} has dump processors")
+    dump_fields = list(schema.dump_fields.items())
+    namespace = {
+        "ensure_text_type": ensure_text_type,
+        "missing": missing,
+        "empty": {},
+        "accessor": schema.get_attribute,
+        "fields": [field for _, field in dump_fields],
+        "nested": {},
+    }
+    lines = [
+        "def dump_one(obj):",
+        "    data = {}",
+        "    values = getattr(obj, '__dict__', empty)",
+    ]
+    for index, (name, field) in enumerate(dump_fields):
+        if type(field) is fields.Nested:
+            nested_schema = field.schema
+            nested_dump = compile_schema(nested_schema)
+            if nested_schema.many != (nested_schema.many or field.many):
+                nested_dump = _many(nested_dump)
+            namespace["nested"][index] = nested_dump
+        lines.extend(
+            "    " + line for line in _field_source(index, name, field)
+        )
+    lines.append("    return data")
+    exec(
+        compile(
+            "\n".join(lines), f"<compiled {type(schema).__name__}>", "exec"
+        ),
+        namespace,
+    )
+    dump_one = namespace["dump_one"]
+    return _many(dump_one) if schema.many else dump_one
+
+
+def _many(dump_one):
+    def dump_many(objs):
+        return [dump_one(obj) for obj in objs]
+
+    return dump_many
+
+
+def fast_json_enabled():
+    """
+    Returning True when the endpoint of the request is listed
+    in the FAST_JSON_ENDPOINTS config
+    """
+    endpoints = current_app.config["FAST_JSON_ENDPOINTS"]
+    return "*" in endpoints or request.endpoint in endpoints
+
+
+def dump(schema, obj):
+    """
+    Returning schema.dump(obj), from the compiled schema on the
+    FAST_JSON_ENDPOINTS endpoints
+    """
+    if fast_json_enabled():
+        return compile_schema(schema)(obj)
+    return schema.dump(obj)
+
+
+def encode_json(data):
+    """
+    Returning the jsonify body of data encoded by orjson, or None
+    when orjson could not produce the same bytes: pretty printed
+    output, or non-ASCII text while JSON_AS_ASCII escapes it
+    """
+    config = current_app.config
+    if config["JSONIFY_PRETTYPRINT_REGULAR"] or current_app.debug:
+        return None
+    options = orjson.OPT_SORT_KEYS if config["JSON_SORT_KEYS"] else 0
+    try:
+        body = orjson.dumps(data, option=options)
+    except TypeError:
+        return None
+    if config["JSON_AS_ASCII"] and (not body.isascii() or b"\x7f" in body):
+        return None
+    return body + b"\n"
+
+
+def json_response(data, status=200):
+    """
+    Returning the make_response(jsonify(data), status) response,
+    encoded by orjson on the FAST_JSON_ENDPOINTS endpoints
+    """
+    if fast_json_enabled():
+        body = encode_json(data)
+        if body is not None:
+            return current_app.response_class(
+                body,
+                status=status,
+                mimetype=current_app.config["JSONIFY_MIMETYPE"],
+            )
+    return make_response(jsonify(data), status)
@@ -0,0 +1,108 @@
+import json
+import threading
+from flask import current_app, g
+from api.cache import MemoryCache, SharedCache
+from api.models.user import UserModel
+
+USER_FIELDS = (
+    "id", "username", "user_uuid", "email_address", "is_activated", "origin",
+)
+USER_KEYS = ("username",)
+
+
+class UserCache(object):
+    """
+    Cache of the USER_FIELDS columns of users (never the password hash)
+    found by one of the USER_KEYS, kept in a MemoryCache or a
+    SharedCache backend. The keys of a user are tagged with its id,
+    so one invalidate drops them.
+    """
+
+    def __init__(self, backend):
+        self.backend = backend
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def get(self, key, value):
+        cached = self.backend.get(f"user:{key}:{value}")
+        with self._lock:
+            if cached is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return None if cached is None else json.loads(cached)
+
+    def set(self, user):
+        body = json.dumps(user).encode()
+        tags = {f"user:{user['id']}"}
+        for key in USER_KEYS:
+            if user[key] is not None:
+                self.backend.set(f"user:{key}:{user[key]}", body, tags)
+
+    def invalidate(self, user_id):
+        self.backend.invalidate([f"user:{user_id}"])
+
+    def stats(self):
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses}
+
+
+def create_user_cache(app_config):
+    """
+    Returning the USER_CACHE_BACKEND user cache of the config:
+    "memory", "redis" or None when the cache is disabled
+    """
+    backend = app_config["USER_CACHE_BACKEND"]
+    if backend == "memory":
+        return UserCache(
+            MemoryCache(
+                app_config["USER_CACHE_MAX_ENTRIES"],
+                app_config["USER_CACHE_TTL"],
+            )
+        )
+    if backend == "redis":
+        import redis
+        return UserCache(
+            SharedCache(
+                redis.Redis.from_url(app_config["USER_CACHE_REDIS_URL"]),
+                app_config["USER_CACHE_TTL"],
+                prefix="flask_backend:users:",
+            )
+        )
+    return None
+
+
+def user_fields(user):
+    return {field: getattr(user, field) for field in USER_FIELDS}
+
+
+def find_cached_user(key, value):
+    """
+    Returning the USER_FIELDS dict of the user whose key column
+    (one of the USER_KEYS) is value, from the user cache or
+    the database, or None when there is no such user
+    """
+    cache = current_app.extensions.get("user_cache")
+    if cache is not None:
+        user = cache.get(key, value)
+        if user is not None:
+            return user
+    db_user = g.flask_backend_session.query(UserModel).filter(
+        getattr(UserModel, key) == value
+    ).first()
+    if db_user is None:
+        return None
+    user = user_fields(db_user)
+    if cache is not None:
+        cache.set(user)
+    return user
+
+
+def invalidate_cached_user(user_id):
+    """
+    Dropping the cached user, called after the user is updated or deleted
+    """
+    cache = current_app.extensions.get("user_cache")
+    if cache is not None:
+        cache.invalidate(user_id)
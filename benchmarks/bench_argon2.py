@@ -0,0 +1,110 @@
+"""
+Measuring argon2 hash latency and memory on this host for a grid of
+time_cost, memory_cost (KiB) and parallelism values, with CONCURRENCY
+hashes running at once like a sign in burst on one server:
+
+    python -m benchmarks.bench_argon2 --time-cost 1 2 3 \
+        --memory-cost 32768 65536 102400 --parallelism 1 2 \
+        --concurrency 2 --target-ms 250
+
+Every combination is printed with its p50/p95 latency and the peak
+memory of the hashing processes, and the strongest combination whose
+p95 stays under --target-ms is suggested as PASSWORD_HASH_TIME_COST,
+PASSWORD_HASH_MEMORY_COST and PASSWORD_HASH_PARALLELISM. Set
+--concurrency to PASSWORD_HASH_WORKERS of the expected deployment.
+"""
+import argparse
+import itertools
+import resource
+import time
+from concurrent.futures import ProcessPoolExecutor
+from passlib.hash import argon2
+
+PASSWORD = "benchmark-password"
+
+
+def timed_hash(settings):
+    """
+    Returning the seconds one hash took and the peak memory (KiB)
+    of the hashing process
+    """
+    handler = argon2.using(**settings)
+    start = time.perf_counter()
+    handler.hash(PASSWORD)
+    seconds = time.perf_counter() - start
+    return seconds, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def measure(settings, concurrency, rounds):
+    """
+    Returning the sorted latencies and the peak memory (KiB) of
+    rounds * concurrency hashes, concurrency at a time
+    """
+    latencies = []
+    peak_memory = 0
+    with ProcessPoolExecutor(concurrency) as executor:
+        # warm up the processes so their start is not measured
+        list(executor.map(timed_hash, [settings] * concurrency))
+        for _ in range(rounds):
+            for seconds, memory in executor.map(
+                timed_hash, [settings] * concurrency
+            ):
+                latencies.append(seconds)
+                peak_memory = max(peak_memory, memory)
+    return sorted(latencies), peak_memory
+
+
+def percentile(values, fraction):
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--time-cost", type=int, nargs="+", default=[2, 3])
+    parser.add_argument(
+        "--memory-cost", type=int, nargs="+", default=[65536, 102400]
+    )
+    parser.add_argument("--parallelism", type=int, nargs="+", default=[2])
+    parser.add_argument("--concurrency", type=int, default=2)
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--target-ms", type=float, default=250)
+    args = parser.parse_args()
+    print(
+        f"{'time':>5} {'memory KiB':>11} {'parallel':>9} "
+        f"{'p50 ms':>8} {'p95 ms':>8} {'peak RSS KiB':>13}"
+    )
+    best = None
+    for time_cost, memory_cost, parallelism in itertools.product(
+        args.time_cost, args.memory_cost, args.parallelism
+    ):
+        settings = {
+            "time_cost": time_cost,
+            "memory_cost": memory_cost,
+            "parallelism": parallelism,
+        }
+        latencies, peak_memory = measure(
+            settings, args.concurrency, args.rounds
+        )
+        p50 = percentile(latencies, 0.5) * 1000
+        p95 = percentile(latencies, 0.95) * 1000
+        print(
+            f"{time_cost:>5} {memory_cost:>11} {parallelism:>9} "
+            f"{p50:>8.1f} {p95:>8.1f} {peak_memory:>13}"
+        )
+        strength = time_cost * memory_cost
+        if p95 <= args.target_ms and (best is None or strength > best[0]):
+            best = (strength, settings, p95)
+    if best is None:
+        print(f"No parameters keep p95 under {args.target_ms} ms")
+        return
+    _, settings, p95 = best
+    print(
+        f"Strongest under {args.target_ms} ms (p95 {p95:.1f} ms): "
+        f"PASSWORD_HASH_TIME_COST={settings['time_cost']} "
+        f"PASSWORD_HASH_MEMORY_COST={settings['memory_cost']} "
+        f"PASSWORD_HASH_PARALLELISM={settings['parallelism']}"
+    )
+
+
+if __name__ == "__main__":
+    main()
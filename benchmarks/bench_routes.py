@@ -0,0 +1,745 @@
+"""
+Measuring the latency and throughput of every route of api/bp.py on a
+dataset seeded by benchmarks.dataset, in process through the WSGI app
+or against a real server:
+
+    python -m benchmarks.dataset --config testing --stories 10000 --reset
+    python -m benchmarks.bench_routes --config testing --save base.json
+    python -m benchmarks.bench_routes --config testing --compare base.json
+
+    GUNICORN_WORKERS=4 gunicorn --config gunicorn_conf.py wsgi:app
+    python -m benchmarks.bench_routes --url http://127.0.0.1:4000 \
+        --ingest-token "$INGEST_API_TOKEN"
+
+Every route gets --warmup untimed calls and then --requests calls from
+--concurrency clients, reported with p50/p95/p99 latency, requests per
+second and errors (responses with another status than the route
+expects). --save writes them to a JSON baseline, --compare prints the
+change against one and exits with 1 when a p95 grew or the requests
+per second dropped by more than --tolerance. Write routes change the
+dataset, seed it again before a run that is compared, or pass
+--reads-only. The write routes need postgresql, in process runs on
+another database (like a sqlite:/// stand-in) measure the reads only.
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import threading
+import time
+from collections import namedtuple
+from urllib.error import HTTPError, URLError
+from urllib.request import Request, urlopen
+from uuid import uuid4
+from benchmarks.dataset import BENCH_PASSWORD, create_bench_app
+
+Route = namedtuple(
+    "Route",
+    ["name", "method", "path", "body", "status", "prepare"],
+)
+
+
+def route(name, method, path, body=None, status=200, prepare=None):
+    """
+    Returning a Route, path(ctx, rng, prepared) and body(ctx, rng,
+    prepared) make the request, prepare(client, ctx, rng) runs untimed
+    before it, for example to create the comment a DELETE removes
+    """
+    return Route(name, method, path, body, status, prepare)
+
+
+def story_comment(ctx, rng, prepared):
+    return {"by": rng.choice(ctx["usernames"]), "text": "Benchmark comment"}
+
+
+def blog_story(ctx, rng, prepared):
+    return {
+        "by": rng.choice(ctx["usernames"]),
+        "title": "Benchmark story",
+        "url": "https://example.com/benchmark",
+        "text": "Benchmark story text",
+    }
+
+
+def new_user(ctx, rng, prepared):
+    username = f"bench_{uuid4().hex[:12]}"
+    return {
+        "username": username,
+        "password": BENCH_PASSWORD,
+        "email_address": f"{username}@example.com",
+    }
+
+
+def signin(ctx, rng, prepared):
+    username = rng.choice(ctx["usernames"])
+    return {
+        "username": username,
+        "email_address": f"{username}@example.com",
+        "password": BENCH_PASSWORD,
+    }
+
+
+def comment_batch(kind):
+    def body(ctx, rng, prepared):
+        return [
+            dict(
+                story_comment(ctx, rng, prepared),
+                story_id=rng.choice(ctx[kind]),
+            )
+            for _ in range(10)
+        ]
+    return body
+
+
+def story_upsert(kind):
+    def body(ctx, rng, prepared):
+        return [
+            {
+                "hn_id": story_id,
+                "by": rng.choice(ctx["usernames"]),
+                "title": "Benchmark story",
+                "url": "https://example.com/benchmark",
+                "score": rng.randrange(1000),
+                "time": int(time.time()),
+                "kids": [],
+                "descendants": 0,
+                "type": "story",
+            }
+            for story_id in rng.sample(ctx[kind], min(10, len(ctx[kind])))
+        ]
+    return body
+
+
+def page_items(data):
+    # comment lists are plain arrays, story lists are pages
+    return data if isinstance(data, list) else data.get("items", [])
+
+
+def first_item(client, path):
+    status, data = client.request("GET", path)
+    items = page_items(data)
+    return items[0]["id"] if items else None
+
+
+def added_story_comment(kind):
+    """
+    Returning a prepare that adds a comment to a story of kind and
+    returns the story and the id of the comment
+    """
+    path = "topstories" if kind == "top_stories" else "newstories"
+
+    def prepare(client, ctx, rng):
+        story_id = rng.choice(ctx[kind])
+        client.request(
+            "POST",
+            f"/api/hackernews/{path}/{story_id}/comments",
+            story_comment(ctx, rng, None),
+        )
+        comment_id = first_item(
+            client, f"/api/hackernews/{path}/{story_id}/comments"
+        )
+        return {"story_id": story_id, "comment_id": comment_id}
+    return prepare
+
+
+def existing_story_comment(kind):
+    path = "topstories" if kind == "top_stories" else "newstories"
+
+    def prepare(client, ctx, rng):
+        story_id = rng.choice(ctx[f"{kind}_with_comments"])
+        comment_id = first_item(
+            client, f"/api/hackernews/{path}/{story_id}/comments"
+        )
+        return {"story_id": story_id, "comment_id": comment_id}
+    return prepare
+
+
+def added_blog_story(client, ctx, rng):
+    client.request("POST", "/api/blognews/", blog_story(ctx, rng, None))
+    return {"story_id": first_item(client, "/api/blognews/?cursor=")}
+
+
+def added_blog_comment(client, ctx, rng):
+    story_id = rng.choice(ctx["blog_stories"])["id"]
+    client.request(
+        "POST",
+        f"/api/blognews/{story_id}/comments",
+        story_comment(ctx, rng, None),
+    )
+    comment_id = first_item(client, f"/api/blognews/{story_id}/comments")
+    return {"story_id": story_id, "comment_id": comment_id}
+
+
+def existing_blog_comment(client, ctx, rng):
+    story_id = rng.choice(ctx["blog_stories_with_comments"])
+    comment_id = first_item(client, f"/api/blognews/{story_id}/comments")
+    return {"story_id": story_id, "comment_id": comment_id}
+
+
+def registered_user(client, ctx, rng):
+    user = new_user(ctx, rng, None)
+    client.request("POST", "/api/users", user)
+    return {"username": user["username"]}
+
+
+def hacker_news_routes(kind, path):
+    return [
+        route(
+            f"GET {path} page",
+            "GET",
+            lambda ctx, rng, prepared: (
+                f"/api/hackernews/{path}/"
+                f"?pagenumber={rng.randrange(1, ctx[kind + '_pages'] + 1)}"
+            ),
+        ),
+        route(
+            f"GET {path} cursor",
+            "GET",
+            lambda ctx, rng, prepared: f"/api/hackernews/{path}/?cursor=",
+        ),
+        route(
+            f"GET {path} story",
+            "GET",
+            lambda ctx, rng, prepared: (
+                f"/api/hackernews/{path}/{rng.choice(ctx[kind])}"
+            ),
+        ),
+        route(
+            f"GET {path} comments",
+            "GET",
+            lambda ctx, rng, prepared: (
+                f"/api/hackernews/{path}/"
+                f"{rng.choice(ctx[kind + '_with_comments'])}/comments"
+            ),
+        ),
+        route(
+            f"POST {path} comment",
+            "POST",
+            lambda ctx, rng, prepared: (
+                f"/api/hackernews/{path}/{rng.choice(ctx[kind])}/comments"
+            ),
+            story_comment,
+            status=201,
+        ),
+        route(
+            f"POST {path} comments batch",
+            "POST",
+            lambda ctx, rng, prepared: f"/api/hackernews/{path}/comments",
+            comment_batch(kind),
+            status=201,
+        ),
+        route(
+            f"PATCH {path} comment",
+            "PATCH",
+            lambda ctx, rng, prepared: (
+                f"/api/hackernews/{path}/{prepared['story_id']}"
+                f"/comments/{prepared['comment_id']}"
+            ),
+            lambda ctx, rng, prepared: {"text": "Edited benchmark comment"},
+            prepare=existing_story_comment(kind),
+        ),
+        route(
+            f"DELETE {path} comment",
+            "DELETE",
+            lambda ctx, rng, prepared: (
+                f"/api/hackernews/{path}/{prepared['story_id']}"
+                f"/comments/{prepared['comment_id']}"
+            ),
+            prepare=added_story_comment(kind),
+        ),
+        route(
+            f"POST {path} upsert",
+            "POST",
+            lambda ctx, rng, prepared: f"/api/hackernews/{path}/upsert",
+            story_upsert(kind),
+        ),
+    ]
+
+
+ROUTES = [
+    *hacker_news_routes("top_stories", "topstories"),
+    *hacker_news_routes("new_stories", "newstories"),
+    route(
+        "GET blognews page",
+        "GET",
+        lambda ctx, rng, prepared: "/api/blognews/?pagenumber=1",
+    ),
+    route(
+        "GET blognews story",
+        "GET",
+        lambda ctx, rng, prepared: (
+            f"/api/blognews/{rng.choice(ctx['blog_stories'])['id']}"
+        ),
+    ),
+    route(
+        "POST blognews story",
+        "POST",
+        lambda ctx, rng, prepared: "/api/blognews/",
+        blog_story,
+        status=201,
+    ),
+    route(
+        "PATCH blognews story",
+        "PATCH",
+        lambda ctx, rng, prepared: (
+            f"/api/blognews/{rng.choice(ctx['blog_stories'])['id']}"
+        ),
+        lambda ctx, rng, prepared: {
+            "title": "Edited benchmark story",
+            "url": "https://example.com/edited",
+            "text": "Edited benchmark story text",
+        },
+    ),
+    route(
+        "DELETE blognews story",
+        "DELETE",
+        lambda ctx, rng, prepared: f"/api/blognews/{prepared['story_id']}",
+        prepare=added_blog_story,
+    ),
+    route(
+        "GET blognews comments",
+        "GET",
+        lambda ctx, rng, prepared: (
+            f"/api/blognews/{rng.choice(ctx['blog_stories'])['id']}/comments"
+        ),
+    ),
+    route(
+        "POST blognews comment",
+        "POST",
+        lambda ctx, rng, prepared: (
+            f"/api/blognews/{rng.choice(ctx['blog_stories'])['id']}/comments"
+        ),
+        story_comment,
+        status=201,
+    ),
+    route(
+        "GET blognews comment",
+        "GET",
+        lambda ctx, rng, prepared: (
+            f"/api/blognews/{prepared['story_id']}"
+            f"/comments/{prepared['comment_id']}"
+        ),
+        prepare=existing_blog_comment,
+    ),
+    route(
+        "PATCH blognews comment",
+        "PATCH",
+        lambda ctx, rng, prepared: (
+            f"/api/blognews/{prepared['story_id']}"
+            f"/comments/{prepared['comment_id']}"
+        ),
+        lambda ctx, rng, prepared: {"text": "Edited benchmark comment"},
+        prepare=existing_blog_comment,
+    ),
+    route(
+        "DELETE blognews comment",
+        "DELETE",
+        lambda ctx, rng, prepared: (
+            f"/api/blognews/{prepared['story_id']}"
+            f"/comments/{prepared['comment_id']}"
+        ),
+        prepare=added_blog_comment,
+    ),
+    route(
+        "GET users page",
+        "GET",
+        lambda ctx, rng, prepared: "/api/users?cursor=",
+    ),
+    route(
+        "POST users register",
+        "POST",
+        lambda ctx, rng, prepared: "/api/users",
+        new_user,
+        status=201,
+    ),
+    route(
+        "POST users signin",
+        "POST",
+        lambda ctx, rng, prepared: "/api/users/signin",
+        signin,
+    ),
+    route(
+        "GET user",
+        "GET",
+        lambda ctx, rng, prepared: (
+            f"/api/users/{rng.choice(ctx['usernames'])}"
+        ),
+    ),
+    # the UPDATE of the endpoint filters user_uuid by the username and
+    # writes no row, this measures the lookup and the password hashing
+    route(
+        "PATCH user (no-op update)",
+        "PATCH",
+        lambda ctx, rng, prepared: (
+            f"/api/users/{rng.choice(ctx['usernames'])}"
+        ),
+        lambda ctx, rng, prepared: {"password": BENCH_PASSWORD},
+    ),
+    route(
+        "DELETE user",
+        "DELETE",
+        lambda ctx, rng, prepared: f"/api/users/{prepared['username']}",
+        prepare=registered_user,
+    ),
+    route(
+        "GET user stories",
+        "GET",
+        lambda ctx, rng, prepared: (
+            f"/api/users/{rng.choice(ctx['blog_stories'])['by']}/stories/"
+            "?pagenumber=1"
+        ),
+    ),
+    route(
+        "GET user story",
+        "GET",
+        lambda ctx, rng, prepared: "/api/users/{by}/stories/{id}".format(
+            **rng.choice(ctx["blog_stories"])
+        ),
+    ),
+    route(
+        "GET user comments",
+        "GET",
+        lambda ctx, rng, prepared: (
+            f"/api/users/{rng.choice(ctx['blog_commenters'])}/comments/"
+            "?pagenumber=1"
+        ),
+    ),
+]
+
+
+class WsgiClient(object):
+    """
+    Requests through the WSGI app in this process, one flask
+    test client per thread
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self.headers = {}
+        self._local = threading.local()
+
+    def request(self, method, path, body=None):
+        client = getattr(self._local, "client", None)
+        if client is None:
+            client = self._local.client = self.app.test_client()
+        response = client.open(
+            path,
+            method=method,
+            data=None if body is None else json.dumps(body),
+            content_type="application/json",
+            headers=self.headers,
+        )
+        try:
+            data = json.loads(response.data)
+        except ValueError:
+            data = {}
+        return response.status_code, data
+
+
+class HttpClient(object):
+    """
+    Requests to a real server at base_url
+    """
+
+    def __init__(self, base_url):
+        self.base_url = base_url.rstrip("/")
+        self.headers = {}
+
+    def request(self, method, path, body=None):
+        request = Request(
+            self.base_url + path,
+            data=None if body is None else json.dumps(body).encode(),
+            method=method,
+            headers={"Content-Type": "application/json", **self.headers},
+        )
+        try:
+            with urlopen(request) as response:
+                status, raw = response.status, response.read()
+        except HTTPError as err:
+            status, raw = err.code, err.read()
+        try:
+            data = json.loads(raw)
+        except ValueError:
+            data = {}
+        return status, data
+
+
+def discover(client, users):
+    """
+    Returning the ids the routes pick from, read through the API
+    so in process and server runs see the same dataset
+    """
+    ctx = {"usernames": [f"bench_user_{index}" for index in range(users)]}
+    for kind, path in (
+        ("top_stories", "topstories"), ("new_stories", "newstories")
+    ):
+        status, page = client.request(
+            "GET", f"/api/hackernews/{path}/?pagenumber=1"
+        )
+        if status != 200 or not page.get("items"):
+            raise SystemExit(f"No {path}, seed with benchmarks.dataset")
+        ctx[f"{kind}_pages"] = page.get("pages", 1)
+        ctx[kind] = [story["hn_id"] for story in page["items"]]
+        ctx[f"{kind}_with_comments"] = [
+            story["hn_id"] for story in page["items"]
+            if story.get("comments_count")
+        ] or ctx[kind]
+    status, page = client.request("GET", "/api/blognews/?pagenumber=1")
+    ctx["blog_stories"] = [
+        {"id": story["id"], "by": story["by"]}
+        for story in page.get("items", [])
+    ]
+    if not ctx["blog_stories"]:
+        raise SystemExit("No blog news, seed with benchmarks.dataset")
+    ctx["blog_stories_with_comments"] = [
+        story["id"] for story in page["items"] if story.get("comments_count")
+    ] or [story["id"] for story in ctx["blog_stories"]]
+    commenters = set()
+    for story_id in ctx["blog_stories_with_comments"][:5]:
+        status, comments = client.request(
+            "GET", f"/api/blognews/{story_id}/comments"
+        )
+        for comment in page_items(comments):
+            commenters.add(comment["by"])
+    ctx["blog_commenters"] = sorted(commenters) or ctx["usernames"]
+    return ctx
+
+
+def percentile(values, fraction):
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+
+def call(client, ctx, route, rng):
+    prepared = route.prepare(client, ctx, rng) if route.prepare else None
+    path = route.path(ctx, rng, prepared)
+    body = route.body(ctx, rng, prepared) if route.body else None
+    start = time.perf_counter()
+    status, _ = client.request(route.method, path, body)
+    return time.perf_counter() - start, status == route.status
+
+
+def measure(client, ctx, route, requests, concurrency, warmup, seed):
+    """
+    Returning the latency percentiles (ms), requests per second and
+    errors of requests calls of route from concurrency clients. The
+    requests per second add up the calls each client finished per
+    second of timed calls, so untimed prepare calls are left out.
+    """
+    rng = random.Random(seed)
+    for _ in range(warmup):
+        call(client, ctx, route, rng)
+    latencies = []
+    totals = {"errors": 0, "rps": 0.0}
+    failures = []
+    lock = threading.Lock()
+
+    def run(calls, thread_seed):
+        thread_rng = random.Random(thread_seed)
+        thread_latencies = []
+        thread_errors = 0
+        try:
+            for _ in range(calls):
+                seconds, ok = call(client, ctx, route, thread_rng)
+                thread_latencies.append(seconds)
+                thread_errors += not ok
+        except Exception as err:
+            failures.append(err)
+            return
+        with lock:
+            latencies.extend(thread_latencies)
+            totals["errors"] += thread_errors
+            if thread_latencies:
+                totals["rps"] += len(thread_latencies) / sum(thread_latencies)
+
+    threads = [
+        threading.Thread(
+            target=run,
+            args=(
+                requests // concurrency + (index < requests % concurrency),
+                seed + index + 1,
+            ),
+        )
+        for index in range(concurrency)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    if failures:
+        raise failures[0]
+    latencies.sort()
+    return {
+        "requests": len(latencies),
+        "errors": totals["errors"],
+        "rps": round(totals["rps"], 1),
+        "p50_ms": round(percentile(latencies, 0.5) * 1000, 2),
+        "p95_ms": round(percentile(latencies, 0.95) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 0.99) * 1000, 2),
+    }
+
+
+def compare(results, baseline, tolerance):
+    """
+    Returning the names of the routes whose p95 grew or whose requests
+    per second dropped by more than tolerance against the baseline
+    """
+    regressions = []
+    print(f"{'route':<36} {'p95 ms':>17} {'requests/sec':>19}")
+    for name, result in results.items():
+        base = baseline["routes"].get(name)
+        if base is None:
+            continue
+        p95_change = result["p95_ms"] / base["p95_ms"] - 1
+        rps_change = result["rps"] / base["rps"] - 1
+        regressed = p95_change > tolerance or rps_change < -tolerance
+        if regressed:
+            regressions.append(name)
+        print(
+            f"{name:<36} {result['p95_ms']:>8.2f} {p95_change:>+8.1%} "
+            f"{result['rps']:>10.1f} {rps_change:>+8.1%}"
+            f"{'  REGRESSION' if regressed else ''}"
+        )
+    return regressions
+
+
+def start_server(url, ingest_token):
+    """
+    Returning a gunicorn process serving wsgi:app at url, once it answers
+    """
+    bind = url.split("://", 1)[-1].rstrip("/")
+    server = subprocess.Popen(
+        [sys.executable, "-m", "gunicorn", "--config", "gunicorn_conf.py",
+         "--bind", bind, "wsgi:app"],
+        env=dict(os.environ, INGEST_API_TOKEN=ingest_token),
+    )
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        try:
+            with urlopen(f"{url}/api/blognews/?pagenumber=1"):
+                return server
+        except HTTPError:
+            return server
+        except URLError:
+            time.sleep(0.2)
+    server.terminate()
+    raise SystemExit(f"gunicorn did not start at {url}")
+
+
+def create_client(args):
+    """
+    Returning the client of the --url server or of an app of --config,
+    and the name of its database dialect (None for a server)
+    """
+    if args.url:
+        client = HttpClient(args.url)
+        client.headers["Authorization"] = f"Bearer {args.ingest_token}"
+        return client, None
+    app = create_bench_app(args.config)
+    app.config["INGEST_API_TOKEN"] = args.ingest_token
+    client = WsgiClient(app)
+    client.headers["Authorization"] = f"Bearer {args.ingest_token}"
+    engine = app.extensions["db_sessions"]["hacker_news"].get_bind()
+    return client, engine.dialect.name
+
+
+def selected_routes(args, dialect):
+    routes = []
+    for route in ROUTES:
+        if args.routes and not any(
+            name.lower() in route.name.lower() for name in args.routes
+        ):
+            continue
+        # the write routes store postgresql types, like timestamps
+        # as strings, other databases only serve the reads
+        reads_only = args.reads_only or dialect not in (None, "postgresql")
+        if reads_only and route.method != "GET":
+            continue
+        routes.append(route)
+    return routes
+
+
+def run(args):
+    """
+    Returning the results of every selected route by name
+    """
+    client, dialect = create_client(args)
+    ctx = discover(client, args.users)
+    results = {}
+    print(
+        f"{'route':<36} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} "
+        f"{'requests/sec':>13} {'errors':>7}"
+    )
+    for route in selected_routes(args, dialect):
+        result = measure(
+            client, ctx, route, args.requests, args.concurrency,
+            args.warmup, args.seed,
+        )
+        results[route.name] = result
+        print(
+            f"{route.name:<36} {result['p50_ms']:>8.2f} "
+            f"{result['p95_ms']:>8.2f} {result['p99_ms']:>8.2f} "
+            f"{result['rps']:>13.1f} {result['errors']:>7}"
+        )
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--config", default="testing")
+    parser.add_argument("--url")
+    parser.add_argument("--start-server", action="store_true")
+    parser.add_argument("--ingest-token", default=uuid4().hex)
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=1)
+    parser.add_argument("--warmup", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--routes", nargs="+")
+    parser.add_argument("--reads-only", action="store_true")
+    parser.add_argument("--save")
+    parser.add_argument("--compare")
+    parser.add_argument("--tolerance", type=float, default=0.1)
+    args = parser.parse_args()
+    server = None
+    if args.start_server:
+        args.url = args.url or "http://127.0.0.1:4000"
+        server = start_server(args.url, args.ingest_token)
+    try:
+        results = run(args)
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+    if args.save:
+        with open(args.save, "w") as baseline_file:
+            json.dump(
+                {
+                    "target": args.url or f"wsgi:{args.config}",
+                    "python": platform.python_version(),
+                    "requests": args.requests,
+                    "concurrency": args.concurrency,
+                    "routes": results,
+                },
+                baseline_file,
+                indent=2,
+            )
+    if args.compare:
+        with open(args.compare) as baseline_file:
+            baseline = json.load(baseline_file)
+        if (baseline["requests"], baseline["concurrency"]) != (
+            args.requests, args.concurrency
+        ):
+            print(
+                f"Baseline ran {baseline['requests']} requests from "
+                f"{baseline['concurrency']} clients, the numbers differ "
+                f"with the settings as well"
+            )
+        if compare(results, baseline, args.tolerance):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
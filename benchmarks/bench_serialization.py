@@ -0,0 +1,91 @@
+"""
+Comparing marshmallow dump + jsonify with the compiled schema + orjson
+path on a 30 story hacker_news page with 30 comments per story.
+
+    python -m benchmarks.bench_serialization
+"""
+import timeit
+from datetime import datetime
+from flask import Flask, jsonify
+from api.models.hacker_news import (
+    HackerNewsTopStory,
+    HackerNewsTopStoryComment,
+)
+from api.schemas.hacker_news import HackerNewsStorySchema
+from api.serialization import compile_schema, encode_json
+from config import config
+
+STORIES = 30
+COMMENTS = 30
+NUMBER = 50
+
+
+def loaded(model, **values):
+    """
+    Returning a model instance with every column set, like a row
+    loaded from the database
+    """
+    columns = dict.fromkeys(model.__table__.columns.keys())
+    columns.update(values)
+    return model(**columns)
+
+
+def make_page():
+    parsed_time = datetime(2020, 9, 28, 8, 20, 23, 918000)
+    stories = []
+    for story_id in range(STORIES):
+        story = loaded(
+            HackerNewsTopStory,
+            id=story_id,
+            hn_id=24611558 + story_id,
+            by="story_user",
+            time=1601253055,
+            kids=list(range(COMMENTS)),
+            score=207,
+            title="Story title",
+            url="https://example.com/story",
+            descendants=COMMENTS,
+            origin="hacker_news",
+            parsed_time=parsed_time,
+        )
+        story.comments = [
+            loaded(
+                HackerNewsTopStoryComment,
+                id=comment_id,
+                hn_id=comment_id,
+                by="comment_user",
+                text="Comment text " * 20,
+                parent=story.hn_id,
+                time=1601253055,
+                origin="hacker_news",
+                parsed_time=parsed_time,
+            )
+            for comment_id in range(COMMENTS)
+        ]
+        stories.append(story)
+    return stories
+
+
+def main():
+    app = Flask(__name__)
+    app.config.from_object(config["testing"])
+    schema = HackerNewsStorySchema(many=True)
+    compiled = compile_schema(schema)
+    stories = make_page()
+    assert schema.dump(stories) == compiled(stories)
+    with app.app_context():
+        timings = {
+            "marshmallow dump": lambda: schema.dump(stories),
+            "compiled dump": lambda: compiled(stories),
+            "marshmallow dump + jsonify": lambda: jsonify(
+                schema.dump(stories)
+            ),
+            "compiled dump + orjson": lambda: encode_json(compiled(stories)),
+        }
+        for name, func in timings.items():
+            seconds = timeit.timeit(func, number=NUMBER) / NUMBER
+            print(f"{name:<28} {seconds * 1000:8.2f} ms/page")
+
+
+if __name__ == "__main__":
+    main()
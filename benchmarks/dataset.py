@@ -0,0 +1,340 @@
+"""
+Seeding the databases of a config with a reproducible synthetic
+dataset for the route benchmarks: hacker_news top and new stories,
+blog news stories, their comments and users, all made from the same
+--seed so two runs of the same arguments load the same rows.
+
+    python -m benchmarks.dataset --config testing --stories 10000 --reset
+
+--stories is the number of top stories and of new stories (10k up to
+10M), the number of comments of every story is drawn from a heavy
+tailed distribution like the 'kids' of real HN stories: about a third
+have none, most have a few and some have hundreds. Every user has the
+password BENCH_PASSWORD. The rows are written in chunks of
+--chunk-size, so large datasets never sit in memory. --reset empties
+the tables first, without it seeding refuses tables with rows.
+"""
+import argparse
+import math
+import random
+import time
+from datetime import datetime, timedelta
+from faker import Faker
+from passlib.hash import argon2
+from sqlalchemy import func
+from api.models.blog_news import BlogNewsStory, BlogNewsStoryComment
+from api.models.hacker_news import (
+    HackerNewsNewStory,
+    HackerNewsNewStoryComment,
+    HackerNewsTopStory,
+    HackerNewsTopStoryComment,
+)
+from api.models.user import UserModel
+from config import config
+from db import flask_backend_Base, hacker_news_Base
+from flask_backend import create_app
+from tests.hacker_news_test_data import test_comment_row, test_row
+
+BENCH_PASSWORD = "bench-password"
+# share of stories without comments and the spread of the others,
+# close to the descendants of the HN front page stories
+NO_COMMENTS_SHARE = 0.35
+FANOUT_SIGMA = 1.4
+MAX_COMMENTS = 2000
+FIRST_HN_ID = 30000000
+PARSED_TIME = datetime(2020, 9, 28, 8, 20, 23)
+POOL_SIZE = 500
+
+
+def comment_fanout(rng, mean_comments):
+    """
+    Returning the number of comments of one story, NO_COMMENTS_SHARE
+    of the stories have none and the others follow a lognormal
+    distribution, so the mean over all stories is mean_comments
+    """
+    if mean_comments <= 0 or rng.random() < NO_COMMENTS_SHARE:
+        return 0
+    mean = mean_comments / (1 - NO_COMMENTS_SHARE)
+    mu = math.log(mean) - FANOUT_SIGMA ** 2 / 2
+    return min(MAX_COMMENTS, max(1, int(rng.lognormvariate(mu, FANOUT_SIGMA))))
+
+
+class TextPool(object):
+    """
+    Usernames, titles, urls and paragraphs made by Faker once per
+    seed, rows pick from them, which is far faster than calling
+    Faker for every one of millions of rows
+    """
+
+    def __init__(self, seed, users):
+        fake = Faker()
+        Faker.seed(seed)
+        self.usernames = [f"bench_user_{index}" for index in range(users)]
+        self.titles = [fake.sentence(nb_words=8) for _ in range(POOL_SIZE)]
+        self.urls = [fake.url() for _ in range(POOL_SIZE)]
+        self.texts = [
+            " ".join(fake.paragraphs(nb=3)) for _ in range(POOL_SIZE)
+        ]
+
+
+def story_row(rng, pool, index, hn_id, kids):
+    return dict(
+        test_row,
+        id=index + 1,
+        hn_id=hn_id,
+        by=rng.choice(pool.usernames),
+        kids=kids,
+        descendants=len(kids),
+        score=int(rng.paretovariate(1.2)),
+        title=rng.choice(pool.titles),
+        url=rng.choice(pool.urls),
+        time=int(PARSED_TIME.timestamp()) - index,
+        parsed_time=PARSED_TIME - timedelta(seconds=index),
+        local_comment_count=len(kids),
+    )
+
+
+def comment_row(rng, pool, index, hn_id, parent):
+    return dict(
+        test_comment_row,
+        id=index + 1,
+        hn_id=hn_id,
+        by=rng.choice(pool.usernames),
+        kids=[],
+        parent=parent,
+        text=rng.choice(pool.texts),
+        time=int(PARSED_TIME.timestamp()) - index,
+        parsed_time=PARSED_TIME - timedelta(seconds=index),
+    )
+
+
+class ChunkWriter(object):
+    """
+    Collecting rows per table and inserting them with one executemany
+    per table once a table has chunk_size rows, the tables are written
+    in the order of their first rows so stories go before comments
+    """
+
+    def __init__(self, engine, chunk_size):
+        self.engine = engine
+        self.chunk_size = chunk_size
+        self.rows = {}
+        self.written = {}
+
+    def add(self, model, row):
+        rows = self.rows.setdefault(model, [])
+        rows.append(row)
+        if len(rows) >= self.chunk_size:
+            self.flush()
+
+    def flush(self):
+        for table_model, rows in self.rows.items():
+            if rows:
+                self.engine.execute(table_model.__table__.insert(), rows)
+                self.written[table_model.__tablename__] = (
+                    self.written.get(table_model.__tablename__, 0)
+                    + len(rows)
+                )
+                rows.clear()
+
+
+def seed_hacker_news(writer, rng, pool, story_model, comment_model, args,
+                     first_hn_id):
+    """
+    Writing args.stories stories of story_model with their comments,
+    returning the next free hn_id
+    """
+    comment_index = 0
+    comment_hn_id = first_hn_id + args.stories
+    for index in range(args.stories):
+        story_hn_id = first_hn_id + index
+        fanout = comment_fanout(rng, args.comments_per_story)
+        kids = list(range(comment_hn_id, comment_hn_id + fanout))
+        writer.add(story_model, story_row(rng, pool, index, story_hn_id, kids))
+        for kid in kids:
+            writer.add(
+                comment_model,
+                comment_row(rng, pool, comment_index, kid, story_hn_id),
+            )
+            comment_index += 1
+        comment_hn_id += fanout
+    writer.flush()
+    return comment_hn_id
+
+
+def seed_blog_news(writer, rng, pool, args):
+    comment_index = 0
+    for index in range(args.blog_stories):
+        fanout = comment_fanout(rng, args.comments_per_story)
+        writer.add(
+            BlogNewsStory,
+            {
+                "id": index + 1,
+                "by": rng.choice(pool.usernames),
+                "title": rng.choice(pool.titles),
+                "url": rng.choice(pool.urls),
+                "text": rng.choice(pool.texts),
+                "time": int(PARSED_TIME.timestamp()) - index,
+                "type": "story",
+                "origin": "my_blog",
+                "local_comment_count": fanout,
+            },
+        )
+        for _ in range(fanout):
+            writer.add(
+                BlogNewsStoryComment,
+                {
+                    "id": comment_index + 1,
+                    "by": rng.choice(pool.usernames),
+                    "text": rng.choice(pool.texts),
+                    "parent": index + 1,
+                    "time": int(PARSED_TIME.timestamp()) - comment_index,
+                    "type": "comment",
+                    "origin": "my_blog",
+                },
+            )
+            comment_index += 1
+    writer.flush()
+
+
+def seed_users(writer, pool):
+    # one hash for every user, verifying it costs like any other
+    password_hash = argon2.hash(BENCH_PASSWORD)
+    for index, username in enumerate(pool.usernames):
+        writer.add(
+            UserModel,
+            {
+                "id": index + 1,
+                "username": username,
+                "password": password_hash,
+                "user_uuid": f"bench-{index}",
+                "email_address": f"{username}@example.com",
+                "is_activated": True,
+                "origin": "my_blog",
+            },
+        )
+    writer.flush()
+
+
+def reset_sequences(engine, models):
+    """
+    Moving the id sequences past the seeded ids, so rows the
+    benchmarks insert get new ones
+    """
+    if engine.dialect.name != "postgresql":
+        return
+    for model in models:
+        table = model.__tablename__
+        engine.execute(
+            f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), "
+            f"(SELECT coalesce(max(id), 0) + 1 FROM {table}), false)"
+        )
+
+
+def create_bench_app(config_name):
+    """
+    Returning the app of config_name, binds on sqlite (a stand-in for a
+    host without postgresql) share their connections across the threads
+    of the benchmark clients
+    """
+    app_config = config[config_name]
+    options = {}
+    for bind_key, uri in app_config.SQLALCHEMY_BINDS.items():
+        options[bind_key] = dict(
+            app_config.SQLALCHEMY_BINDS_ENGINE_OPTIONS[bind_key]
+        )
+        if uri and uri.startswith("sqlite"):
+            options[bind_key]["connect_args"] = {"check_same_thread": False}
+    return create_app(config_name=config_name, engine_options=options)
+
+
+def bind_engines(app):
+    sessions = app.extensions["db_sessions"]
+    return (
+        sessions["flask_backend"].get_bind(),
+        sessions["hacker_news"].get_bind(),
+    )
+
+
+def prepare_tables(engine, base, reset):
+    base.metadata.create_all(engine)
+    tables = list(reversed(base.metadata.sorted_tables))
+    if reset:
+        for table in tables:
+            engine.execute(table.delete())
+        return
+    for table in tables:
+        rows = engine.execute(
+            func.count().select().select_from(table)
+        ).scalar()
+        if rows:
+            raise SystemExit(
+                f"{table.name} has {rows} rows, seed with --reset"
+            )
+
+
+def seed(app, args):
+    """
+    Returning {table: rows} written to the databases of the app
+    """
+    rng = random.Random(args.seed)
+    pool = TextPool(args.seed, args.users)
+    flask_backend_engine, hacker_news_engine = bind_engines(app)
+    prepare_tables(flask_backend_engine, flask_backend_Base, args.reset)
+    prepare_tables(hacker_news_engine, hacker_news_Base, args.reset)
+    hacker_news = ChunkWriter(hacker_news_engine, args.chunk_size)
+    next_hn_id = seed_hacker_news(
+        hacker_news, rng, pool, HackerNewsTopStory,
+        HackerNewsTopStoryComment, args, FIRST_HN_ID,
+    )
+    seed_hacker_news(
+        hacker_news, rng, pool, HackerNewsNewStory,
+        HackerNewsNewStoryComment, args, next_hn_id,
+    )
+    flask_backend = ChunkWriter(flask_backend_engine, args.chunk_size)
+    seed_users(flask_backend, pool)
+    seed_blog_news(flask_backend, rng, pool, args)
+    reset_sequences(hacker_news_engine, [
+        HackerNewsTopStory, HackerNewsTopStoryComment,
+        HackerNewsNewStory, HackerNewsNewStoryComment,
+    ])
+    reset_sequences(flask_backend_engine, [
+        UserModel, BlogNewsStory, BlogNewsStoryComment,
+    ])
+    for engine, base in (
+        (flask_backend_engine, flask_backend_Base),
+        (hacker_news_engine, hacker_news_Base),
+    ):
+        if engine.dialect.name == "postgresql":
+            # only the seeded tables, a plain ANALYZE locks the shared
+            # catalogs until the transaction of a test ends
+            for table in base.metadata.sorted_tables:
+                engine.execute(f"ANALYZE {table.name}")
+    return {**hacker_news.written, **flask_backend.written}
+
+
+def dataset_arguments(parser):
+    parser.add_argument("--config", default="testing")
+    parser.add_argument("--stories", type=int, default=10000)
+    parser.add_argument("--comments-per-story", type=float, default=8)
+    parser.add_argument("--blog-stories", type=int, default=1000)
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--chunk-size", type=int, default=5000)
+    parser.add_argument("--reset", action="store_true")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    dataset_arguments(parser)
+    args = parser.parse_args()
+    app = create_bench_app(args.config)
+    start = time.perf_counter()
+    written = seed(app, args)
+    for table, rows in sorted(written.items()):
+        print(f"{table:<32} {rows:>10}")
+    print(f"seeded in {time.perf_counter() - start:.1f} s")
+
+
+if __name__ == "__main__":
+    main()
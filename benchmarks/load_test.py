@@ -0,0 +1,101 @@
+"""
+Load test profile of the read endpoints, run against a server started
+once per worker class to compare them:
+
+    GUNICORN_WORKER_CLASS=sync gunicorn --config gunicorn_conf.py wsgi:app
+    python -m benchmarks.load_test --url http://127.0.0.1:4000
+
+The profile mixes the endpoints like the webportal pages do: list pages,
+story pages with comments and blog news, with CONCURRENCY clients
+sending requests back to back for DURATION seconds. Compare requests
+per second and the p50/p95/p99 latencies, and run it with
+RESPONSE_CACHE_BACKEND=none as well so the database work is measured.
+"""
+import argparse
+import json
+import random
+import threading
+import time
+from urllib.error import HTTPError, URLError
+from urllib.request import urlopen
+
+PROFILE = (
+    (40, "/api/hackernews/topstories/?pagenumber=1"),
+    (15, "/api/hackernews/topstories/?pagenumber=2"),
+    (15, "/api/hackernews/newstories/?pagenumber=1"),
+    (10, "/api/hackernews/topstories/?cursor=&fields=hn_id,title,url"),
+    (10, "/api/hackernews/topstories/{story_id}"),
+    (10, "/api/blognews/?pagenumber=1"),
+)
+
+
+def story_ids(base_url):
+    """
+    Returning the hn_id of the stories on the first topstories page
+    """
+    with urlopen(f"{base_url}/api/hackernews/topstories/?pagenumber=1") as f:
+        return [story["hn_id"] for story in json.load(f)["items"]]
+
+
+def client(base_url, paths, weights, deadline, results, lock):
+    latencies = []
+    errors = 0
+    while time.monotonic() < deadline:
+        path = random.choices(paths, weights)[0]
+        start = time.perf_counter()
+        try:
+            with urlopen(base_url + path) as response:
+                response.read()
+        except HTTPError as err:
+            if err.code >= 500:
+                errors += 1
+        except URLError:
+            errors += 1
+        latencies.append(time.perf_counter() - start)
+    with lock:
+        results["latencies"].extend(latencies)
+        results["errors"] += errors
+
+
+def percentile(values, fraction):
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--url", default="http://127.0.0.1:4000")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--duration", type=int, default=30)
+    args = parser.parse_args()
+    ids = story_ids(args.url) or [0]
+    weights = [weight for weight, _ in PROFILE]
+    paths = [path for _, path in PROFILE]
+    results = {"latencies": [], "errors": 0}
+    lock = threading.Lock()
+    deadline = time.monotonic() + args.duration
+    clients = []
+    for _ in range(args.concurrency):
+        client_paths = [
+            path.format(story_id=random.choice(ids)) for path in paths
+        ]
+        thread = threading.Thread(
+            target=client,
+            args=(args.url, client_paths, weights, deadline, results, lock),
+        )
+        thread.start()
+        clients.append(thread)
+    for thread in clients:
+        thread.join()
+    latencies = sorted(results["latencies"])
+    if not latencies:
+        print("No requests completed")
+        return
+    print(f"requests      {len(latencies)}")
+    print(f"errors        {results['errors']}")
+    print(f"requests/sec  {len(latencies) / args.duration:.1f}")
+    for name, fraction in (("p50", 0.5), ("p95", 0.95), ("p99", 0.99)):
+        print(f"{name:<13} {percentile(latencies, fraction) * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
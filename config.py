@@ -4,11 +4,125 @@ from dotenv import load_dotenv
 load_dotenv()
 
 
+def engine_options(prefix):
+    """
+    Returning create_engine pool options for a database bind, read from
+    the <prefix>_POOL_SIZE, <prefix>_MAX_OVERFLOW, <prefix>_POOL_TIMEOUT,
+    <prefix>_POOL_RECYCLE, <prefix>_POOL_PRE_PING and
+    <prefix>_STATEMENT_TIMEOUT (milliseconds) environment variables
+    """
+    options = {
+        "pool_size": int(os.environ.get(f"{prefix}_POOL_SIZE", 5)),
+        "max_overflow": int(os.environ.get(f"{prefix}_MAX_OVERFLOW", 10)),
+        "pool_timeout": int(os.environ.get(f"{prefix}_POOL_TIMEOUT", 30)),
+        "pool_recycle": int(os.environ.get(f"{prefix}_POOL_RECYCLE", -1)),
+        "pool_pre_ping": (
+            os.environ.get(f"{prefix}_POOL_PRE_PING", "false").lower()
+            in ("1", "true", "yes")
+        ),
+    }
+    statement_timeout = os.environ.get(f"{prefix}_STATEMENT_TIMEOUT")
+    if statement_timeout:
+        options["connect_args"] = {
+            "options": f"-c statement_timeout={int(statement_timeout)}"
+        }
+    return options
+
+
+def optional_int(name):
+    """
+    Returning the integer of the name environment variable,
+    or None when it is not set
+    """
+    value = os.environ.get(name)
+    return int(value) if value else None
+
+
+def replica_uris(prefix):
+    """
+    Returning the read replica URIs of a database bind from the comma
+    separated <prefix>_REPLICA_URIS environment variable
+    """
+    uris = os.environ.get(f"{prefix}_REPLICA_URIS", "")
+    return [uri.strip() for uri in uris.split(",") if uri.strip()]
+
+
 class Config(object):
 
     SECRET_KEY = os.environ.get("SECRET_KEY") or "hard to guess string"
     SQLALCHEMY_TRACK_MODIFICATIONS = False
     POSTGRES_DATABASE_URI = os.environ.get("POSTGRES_DATABASE_URI")
+    STORY_COMMENTS_LIMIT = int(os.environ.get("STORY_COMMENTS_LIMIT", 30))
+    COMMENTS_BATCH_MAX_ITEMS = int(
+        os.environ.get("COMMENTS_BATCH_MAX_ITEMS", 1000)
+    )
+    INGEST_API_TOKEN = os.environ.get("INGEST_API_TOKEN")
+    STORIES_UPSERT_MAX_ITEMS = int(
+        os.environ.get("STORIES_UPSERT_MAX_ITEMS", 5000)
+    )
+    STORIES_UPSERT_CHUNK_SIZE = int(
+        os.environ.get("STORIES_UPSERT_CHUNK_SIZE", 500)
+    )
+    SQLALCHEMY_BINDS_ENGINE_OPTIONS = {
+        "flask_backend": engine_options("FLASK_BACKEND_DATABASE"),
+        "hacker_news": engine_options("HACKER_NEWS_DATABASE"),
+    }
+    SQLALCHEMY_BINDS_REPLICAS = {
+        "flask_backend": replica_uris("FLASK_BACKEND_DATABASE"),
+        "hacker_news": replica_uris("HACKER_NEWS_DATABASE"),
+    }
+    REPLICA_ROUTING = os.environ.get("REPLICA_ROUTING", "round_robin")
+    REPLICA_STICKY_SECONDS = int(os.environ.get("REPLICA_STICKY_SECONDS", 5))
+    RESPONSE_CACHE_BACKEND = os.environ.get("RESPONSE_CACHE_BACKEND", "memory")
+    RESPONSE_CACHE_TTL = int(os.environ.get("RESPONSE_CACHE_TTL", 30))
+    RESPONSE_CACHE_MAX_ENTRIES = int(
+        os.environ.get("RESPONSE_CACHE_MAX_ENTRIES", 1024)
+    )
+    RESPONSE_CACHE_REDIS_URL = os.environ.get("RESPONSE_CACHE_REDIS_URL")
+    USER_CACHE_BACKEND = os.environ.get("USER_CACHE_BACKEND", "memory")
+    USER_CACHE_TTL = int(os.environ.get("USER_CACHE_TTL", 60))
+    USER_CACHE_MAX_ENTRIES = int(
+        os.environ.get("USER_CACHE_MAX_ENTRIES", 4096)
+    )
+    USER_CACHE_REDIS_URL = os.environ.get(
+        "USER_CACHE_REDIS_URL", RESPONSE_CACHE_REDIS_URL
+    )
+    INTERNAL_API_TOKEN = os.environ.get("INTERNAL_API_TOKEN")
+    PASSWORD_HASH_WORKERS = int(os.environ.get("PASSWORD_HASH_WORKERS", 2))
+    PASSWORD_HASH_MAX_PENDING = int(
+        os.environ.get("PASSWORD_HASH_MAX_PENDING", 16)
+    )
+    PASSWORD_HASH_TIME_COST = optional_int("PASSWORD_HASH_TIME_COST")
+    PASSWORD_HASH_MEMORY_COST = optional_int("PASSWORD_HASH_MEMORY_COST")
+    PASSWORD_HASH_PARALLELISM = optional_int("PASSWORD_HASH_PARALLELISM")
+    SQL_INSTRUMENTATION = os.environ.get(
+        "SQL_INSTRUMENTATION", "true"
+    ).lower() in ("1", "true", "yes")
+    SQL_N_PLUS_ONE_THRESHOLD = int(
+        os.environ.get("SQL_N_PLUS_ONE_THRESHOLD", 10)
+    )
+    SQL_REQUEST_LOG = os.environ.get(
+        "SQL_REQUEST_LOG", "false"
+    ).lower() in ("1", "true", "yes")
+    METRICS = os.environ.get(
+        "METRICS", "true"
+    ).lower() in ("1", "true", "yes")
+    METRICS_POOL_INTERVAL = float(
+        os.environ.get("METRICS_POOL_INTERVAL", 5)
+    )
+    PROFILER_ENABLED = os.environ.get(
+        "PROFILER_ENABLED", "false"
+    ).lower() in ("1", "true", "yes")
+    PROFILER_TOKEN = os.environ.get("PROFILER_TOKEN")
+    PROFILER_SAMPLE_RATE = float(os.environ.get("PROFILER_SAMPLE_RATE", 0))
+    PROFILER_INTERVAL = float(os.environ.get("PROFILER_INTERVAL", 0.005))
+    PROFILER_OUTPUT_DIR = os.environ.get("PROFILER_OUTPUT_DIR")
+    PROFILER_MAX_PROFILES = int(os.environ.get("PROFILER_MAX_PROFILES", 100))
+    FAST_JSON_ENDPOINTS = [
+        endpoint
+        for endpoint in os.environ.get("FAST_JSON_ENDPOINTS", "").split(",")
+        if endpoint
+    ]
 
 
 class DevelopmentConfig(Config):
@@ -32,9 +146,29 @@ class TestingConfig(Config):
         "flask_backend": os.environ.get("TEST_FLASK_BACKEND_DATABASE_URI"),
         "hacker_news": os.environ.get("TEST_HACKER_NEWS_DATABASE_URI"),
     }
+    SQLALCHEMY_BINDS_ENGINE_OPTIONS = {
+        "flask_backend": engine_options("TEST_FLASK_BACKEND_DATABASE"),
+        "hacker_news": engine_options("TEST_HACKER_NEWS_DATABASE"),
+    }
+    SQLALCHEMY_BINDS_REPLICAS = {
+        "flask_backend": replica_uris("TEST_FLASK_BACKEND_DATABASE"),
+        "hacker_news": replica_uris("TEST_HACKER_NEWS_DATABASE"),
+    }
+
+
+class ProductionConfig(Config):
+    DEBUG = False
+    TESTING = False
+    ENV = "production"
+    SQLALCHEMY_DATABASE_URI = os.environ.get("FLASK_BACKEND_DATABASE_URI")
+    SQLALCHEMY_BINDS = {
+        "flask_backend": os.environ.get("FLASK_BACKEND_DATABASE_URI"),
+        "hacker_news": os.environ.get("HACKER_NEWS_DATABASE_URI"),
+    }
 
 
 config = {
     "development": DevelopmentConfig,
     "testing": TestingConfig,
+    "production": ProductionConfig,
 }
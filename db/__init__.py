@@ -1,21 +1,59 @@
 from sqlalchemy.orm import scoped_session, sessionmaker
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy import create_engine
+from db.instrument import instrument_engine
+from db.pool import MeasuredQueuePool
+from db.routing import ReplicaSet, RoutingSession
 
 
 flask_backend_Base = declarative_base()
 hacker_news_Base = declarative_base()
 
 
-def create_session(db_uri):
-    engine = create_engine(
-        db_uri
+def create_session(
+    db_uri,
+    replica_uris=None,
+    replica_routing="round_robin",
+    scopefunc=None,
+    **engine_options
+):
+    engine = instrument_engine(
+        create_engine(
+            db_uri,
+            poolclass=MeasuredQueuePool,
+            **engine_options
+        )
+    )
+    if not replica_uris:
+        return scoped_session(
+            sessionmaker(
+                autocommit=False,
+                autoflush=False,
+                bind=engine,
+            ),
+            scopefunc=scopefunc,
+        )
+    replicas = ReplicaSet(
+        [
+            instrument_engine(
+                create_engine(
+                    replica_uri,
+                    poolclass=MeasuredQueuePool,
+                    **engine_options
+                )
+            )
+            for replica_uri in replica_uris
+        ],
+        replica_routing,
     )
     session = scoped_session(
         sessionmaker(
+            class_=RoutingSession,
             autocommit=False,
             autoflush=False,
             bind=engine,
-        )
+            replicas=replicas,
+        ),
+        scopefunc=scopefunc,
     )
     return session
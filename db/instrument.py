@@ -0,0 +1,91 @@
+import re
+import threading
+import time
+from collections import Counter
+from sqlalchemy import event
+
+_local = threading.local()
+# "IN (%(id_1)s, %(id_2)s)" lists of any length share a fingerprint
+IN_LIST = re.compile(r"\((?:%\(\w+\)s(?:, )?)+\)")
+WHITESPACE = re.compile(r"\s+")
+
+
+def fingerprint(statement):
+    """
+    Returning the statement with collapsed whitespace and IN lists,
+    equal for statements that differ only in their parameters
+    """
+    return WHITESPACE.sub(" ", IN_LIST.sub("(?)", statement)).strip()
+
+
+class QueryStats(object):
+    """
+    Statements executed while recording: their count, the seconds
+    spent in the database and how often every fingerprint ran
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.fingerprints = Counter()
+
+    def record(self, statement, seconds):
+        self.count += 1
+        self.duration += seconds
+        self.fingerprints[fingerprint(statement)] += 1
+
+    def duplicates(self):
+        """
+        Returning {fingerprint: count} of the statements that ran
+        more than once, most repeated first
+        """
+        return {
+            statement: count
+            for statement, count in self.fingerprints.most_common()
+            if count > 1
+        }
+
+
+def start_recording():
+    """
+    Returning new QueryStats that collect the statements of the
+    current thread (greenlet under gevent) until stop_recording
+    """
+    _local.stats = QueryStats()
+    return _local.stats
+
+
+def stop_recording():
+    stats = getattr(_local, "stats", None)
+    _local.stats = None
+    return stats
+
+
+def current_stats():
+    return getattr(_local, "stats", None)
+
+
+def instrument_engine(engine):
+    """
+    Timing every statement of the engine into the QueryStats
+    being recorded in the thread that executes it
+    """
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def start_timer(conn, cursor, statement, parameters, context, many):
+        conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def stop_timer(conn, cursor, statement, parameters, context, many):
+        seconds = time.perf_counter() - conn.info["query_start"].pop()
+        stats = current_stats()
+        if stats is not None:
+            stats.record(statement, seconds)
+
+    @event.listens_for(engine, "handle_error")
+    def drop_timer(exception_context):
+        conn = exception_context.connection
+        if conn is not None and conn.info.get("query_start"):
+            conn.info["query_start"].pop()
+
+    return engine
@@ -0,0 +1,76 @@
+import threading
+import time
+from sqlalchemy.pool import QueuePool
+
+WAIT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5)
+
+
+class MeasuredQueuePool(QueuePool):
+    """
+    QueuePool that records how long every checkout waited for a
+    connection, in cumulative histogram buckets of WAIT_BUCKETS seconds
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._wait_lock = threading.Lock()
+        self._wait_counts = [0] * (len(WAIT_BUCKETS) + 1)
+        self._wait_sum = 0.0
+        self._wait_count = 0
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            self._observe_wait(time.perf_counter() - start)
+
+    def _observe_wait(self, seconds):
+        with self._wait_lock:
+            for index, bucket in enumerate(WAIT_BUCKETS):
+                if seconds <= bucket:
+                    break
+            else:
+                index = len(WAIT_BUCKETS)
+            self._wait_counts[index] += 1
+            self._wait_sum += seconds
+            self._wait_count += 1
+
+    def wait_histogram(self):
+        """
+        Returning the checkout wait histogram as cumulative
+        {"le": bucket, "count": N} buckets with the count and sum
+        """
+        with self._wait_lock:
+            counts = list(self._wait_counts)
+            wait_sum = self._wait_sum
+            wait_count = self._wait_count
+        buckets = []
+        cumulative = 0
+        for bucket, count in zip(WAIT_BUCKETS + ("+Inf",), counts):
+            cumulative += count
+            buckets.append({"le": bucket, "count": cumulative})
+        return {"buckets": buckets, "count": wait_count, "sum": wait_sum}
+
+
+def pool_status(engine, engine_options):
+    """
+    Returning the connection pool statistics of the engine,
+    created with the engine_options of its bind
+    """
+    pool = engine.pool
+    status = {"pool_class": type(pool).__name__}
+    if isinstance(pool, QueuePool):
+        status.update(
+            {
+                "size": pool.size(),
+                "checked_in": pool.checkedin(),
+                "checked_out": pool.checkedout(),
+                "overflow": pool.overflow(),
+                "max_overflow": engine_options.get("max_overflow"),
+                "timeout": pool.timeout(),
+            }
+        )
+    if isinstance(pool, MeasuredQueuePool):
+        status["checkout_wait_seconds"] = pool.wait_histogram()
+    return status
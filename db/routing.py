@@ -0,0 +1,66 @@
+import itertools
+import threading
+from sqlalchemy.orm import Session
+
+
+class ReplicaSet(object):
+    """
+    Read replica engines of a database bind, picked either "round_robin"
+    or by "least_connections" checked out of their pools
+    """
+
+    def __init__(self, engines, strategy="round_robin"):
+        if strategy not in ("round_robin", "least_connections"):
+            raise ValueError(f"Unknown replica routing strategy {strategy}")
+        self.engines = list(engines)
+        self.strategy = strategy
+        self._cycle = itertools.cycle(self.engines)
+        self._lock = threading.Lock()
+
+    def pick(self):
+        if self.strategy == "least_connections":
+            return min(
+                self.engines, key=lambda engine: engine.pool.checkedout()
+            )
+        with self._lock:
+            return next(self._cycle)
+
+
+class RoutingSession(Session):
+    """
+    Session that reads from one of the replicas while use_replica is set
+    and sends flushes and every other statement to the primary bind.
+    The replica is picked once, so a request reads from one replica.
+    """
+
+    def __init__(self, replicas=None, **kwargs):
+        super().__init__(**kwargs)
+        self.replicas = replicas
+        self.use_replica = False
+        self._replica = None
+
+    def get_bind(self, mapper=None, clause=None):
+        if self.use_replica and self.replicas and not self._flushing:
+            if self._replica is None:
+                self._replica = self.replicas.pick()
+            return self._replica
+        return super().get_bind(mapper=mapper, clause=clause)
+
+
+def route_reads(db_session, use_replica):
+    """
+    Sending the reads of the current scoped session to a replica,
+    or back to the primary
+    """
+    session = db_session()
+    if isinstance(session, RoutingSession):
+        session.use_replica = use_replica
+
+
+def session_engines(db_session):
+    """
+    Returning the (primary, [replicas]) engines of a scoped session
+    """
+    primary = db_session.session_factory.kw["bind"]
+    replicas = db_session.session_factory.kw.get("replicas")
+    return primary, replicas.engines if replicas else []
@@ -1,2 +1,5 @@
 #!/bin/sh
+if [ "$FLASK_CONFIG" = "production" ]; then
+    exec gunicorn --config gunicorn_conf.py wsgi:app
+fi
 tail -f /dev/null
\ No newline at end of file
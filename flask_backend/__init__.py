@@ -1,34 +1,98 @@
-from flask import Flask, g
+from flask import Flask, g, _app_ctx_stack
 from db import create_session
+from db.routing import session_engines
+from api.cache import create_cache
+from api.hashing import create_hasher
+from api.user_cache import create_user_cache
+from flask_backend.commands import register_commands
 from config import config
 
 
-def create_app(config_name):
+def create_app(config_name, replica_uris=None, engine_options=None):
+    """
+    Returning the flask app for the config_name config, replica_uris
+    ({bind_key: [uri, ...]}) overrides the SQLALCHEMY_BINDS_REPLICAS
+    read replicas of the config and engine_options ({bind_key: {...}})
+    its SQLALCHEMY_BINDS_ENGINE_OPTIONS.
+    Sessions are scoped like the app context, to the greenlet when
+    greenlet is installed, so gevent workers get one per request.
+    """
     app = Flask(__name__)
     ###
     app.config.from_object(config[config_name])
+    if replica_uris is not None:
+        app.config['SQLALCHEMY_BINDS_REPLICAS'] = replica_uris
+    if engine_options is not None:
+        app.config['SQLALCHEMY_BINDS_ENGINE_OPTIONS'] = engine_options
     ###
     flask_backend_session = create_session(
-            app.config['SQLALCHEMY_BINDS']['flask_backend']
+            app.config['SQLALCHEMY_BINDS']['flask_backend'],
+            app.config['SQLALCHEMY_BINDS_REPLICAS'].get('flask_backend'),
+            app.config['REPLICA_ROUTING'],
+            _app_ctx_stack.__ident_func__,
+            **app.config['SQLALCHEMY_BINDS_ENGINE_OPTIONS']['flask_backend']
         )
     hacker_news_session = create_session(
-            app.config['SQLALCHEMY_BINDS']['hacker_news']
+            app.config['SQLALCHEMY_BINDS']['hacker_news'],
+            app.config['SQLALCHEMY_BINDS_REPLICAS'].get('hacker_news'),
+            app.config['REPLICA_ROUTING'],
+            _app_ctx_stack.__ident_func__,
+            **app.config['SQLALCHEMY_BINDS_ENGINE_OPTIONS']['hacker_news']
         )
+    app.extensions["db_sessions"] = {
+        "flask_backend": flask_backend_session,
+        "hacker_news": hacker_news_session,
+    }
+    app.extensions["response_cache"] = create_cache(app.config)
+    app.extensions["password_hasher"] = create_hasher(app.config)
+    app.extensions["user_cache"] = create_user_cache(app.config)
+
+    if app.config['METRICS']:
+        from flask_backend.metrics import init_metrics
+        init_metrics(app)
+
+    if app.config['PROFILER_ENABLED']:
+        from flask_backend.profiling import init_profiler
+        init_profiler(app)
 
     @app.before_request
     def pass_session():
         g.flask_backend_session = flask_backend_session
         g.hacker_news_session = hacker_news_session
 
+    if app.config['SQL_INSTRUMENTATION']:
+        from flask_backend.instrument import init_query_instrumentation
+        init_query_instrumentation(app)
+
+    if any(app.config['SQLALCHEMY_BINDS_REPLICAS'].values()):
+        from flask_backend.replicas import init_replica_routing
+        init_replica_routing(app)
+
     with app.app_context():
         from api.bp import api_bp
+        from flask_backend.internal import internal_bp
         app.register_blueprint(api_bp)
+        app.register_blueprint(internal_bp)
+    register_commands(app)
 
     @app.teardown_appcontext
     def shutdown_session(exception=None):
-        if g.flask_backend_session:
+        # app contexts without a request, like CLI commands, have no sessions
+        if g.get("flask_backend_session"):
             g.flask_backend_session.remove()
-        if g.hacker_news_session:
+        if g.get("hacker_news_session"):
             g.hacker_news_session.remove()
 
     return app
+
+
+def dispose_engines(app):
+    """
+    Replacing the connection pools of every engine of the app, called
+    in forked workers so they never share the connections of the
+    process that created the app
+    """
+    for db_session in app.extensions["db_sessions"].values():
+        primary, replicas = session_engines(db_session)
+        for engine in [primary, *replicas]:
+            engine.dispose()
@@ -0,0 +1,56 @@
+import click
+from api.counters import reconcile_comment_counts
+from api.resources import hacker_news_top_story, hacker_news_new_story
+from api.models.blog_news import BlogNewsStory, BlogNewsStoryComment
+from api.models.hacker_news import (
+    HackerNewsTopStory,
+    HackerNewsTopStoryComment,
+    HackerNewsNewStory,
+    HackerNewsNewStoryComment,
+)
+
+# bind key, story key, comment model and response cache tag of the lists
+COMMENT_COUNTERS = (
+    (
+        "hacker_news",
+        HackerNewsTopStory.hn_id,
+        HackerNewsTopStoryComment,
+        hacker_news_top_story.CACHE_TAG,
+    ),
+    (
+        "hacker_news",
+        HackerNewsNewStory.hn_id,
+        HackerNewsNewStoryComment,
+        hacker_news_new_story.CACHE_TAG,
+    ),
+    ("flask_backend", BlogNewsStory.id, BlogNewsStoryComment, None),
+)
+
+
+def register_commands(app):
+    """
+    Adding the maintenance commands of the app to the flask CLI
+    """
+
+    @app.cli.command("reconcile-comment-counts")
+    def reconcile_comment_counts_command():
+        """
+        Setting local_comment_count of every story to the number
+        of its comment rows, repairing the drift left by writes
+        that bypassed the comment endpoints, like the parser`s
+        """
+        cache = app.extensions["response_cache"]
+        for bind_key, story_key, comment_model, cache_tag in COMMENT_COUNTERS:
+            db_session = app.extensions["db_sessions"][bind_key]
+            try:
+                repaired = reconcile_comment_counts(
+                    db_session, story_key, comment_model
+                )
+            finally:
+                db_session.remove()
+            if repaired and cache is not None and cache_tag is not None:
+                cache.invalidate([cache_tag])
+            click.echo(
+                f"{story_key.class_.__tablename__}: "
+                f"{repaired} stories repaired"
+            )
@@ -0,0 +1,13 @@
+def patch_green():
+    """
+    Making the standard library and psycopg2 cooperative for gevent:
+    sockets, locks and threading.local switch greenlets instead of
+    blocking, and psycopg2 waits for the database on the gevent hub,
+    so one process serves many slow requests with the same app
+    """
+    from gevent import monkey
+    from psycogreen.gevent import patch_psycopg
+
+    if not monkey.is_module_patched("socket"):
+        monkey.patch_all()
+    patch_psycopg()
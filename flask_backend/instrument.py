@@ -0,0 +1,65 @@
+import json
+from flask import request
+from db.instrument import start_recording, stop_recording
+
+
+def server_timing(stats):
+    """
+    Returning the Server-Timing header value of the QueryStats
+    """
+    return (
+        f"db;dur={stats.duration * 1000:.2f};"
+        f'desc="{stats.count} queries"'
+    )
+
+
+def init_query_instrumentation(app):
+    """
+    Counting and timing the SQL statements of every request, reported
+    in a Server-Timing header and, with SQL_REQUEST_LOG, a JSON log
+    line. A statement that runs SQL_N_PLUS_ONE_THRESHOLD times in one
+    request is logged as a warning, the mark of an N+1 query.
+    """
+    @app.before_request
+    def start_query_recording():
+        start_recording()
+
+    @app.after_request
+    def report_queries(response):
+        stats = stop_recording()
+        if stats is None:
+            return response
+        response.headers.add("Server-Timing", server_timing(stats))
+        duplicates = stats.duplicates()
+        threshold = app.config["SQL_N_PLUS_ONE_THRESHOLD"]
+        repeated = {
+            statement: count
+            for statement, count in duplicates.items()
+            if threshold and count >= threshold
+        }
+        if repeated:
+            app.logger.warning(
+                "N+1 queries in %s %s: %s",
+                request.method,
+                request.path,
+                json.dumps(repeated),
+            )
+        if app.config["SQL_REQUEST_LOG"]:
+            app.logger.info(
+                json.dumps(
+                    {
+                        "method": request.method,
+                        "path": request.path,
+                        "endpoint": request.endpoint,
+                        "status": response.status_code,
+                        "queries": stats.count,
+                        "db_ms": round(stats.duration * 1000, 2),
+                        "duplicates": duplicates,
+                    }
+                )
+            )
+        return response
+
+    @app.teardown_request
+    def drop_query_recording(exception=None):
+        stop_recording()
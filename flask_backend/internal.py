@@ -0,0 +1,85 @@
+from flask import Blueprint, abort, current_app, jsonify
+from api.auth import token_rejection
+from db.pool import pool_status
+from db.routing import session_engines
+from flask_backend.metrics import metrics_response
+
+internal_bp = Blueprint("internal", __name__, url_prefix="/internal")
+
+
+@internal_bp.before_request
+def require_internal_token():
+    """
+    Allowing the internal endpoints only to requests with an
+    'Authorization: Bearer' header holding INTERNAL_API_TOKEN, they
+    answer 404 while it is not configured. Behind the proxy every
+    request comes from loopback, so the address proves nothing.
+    """
+    return token_rejection("INTERNAL_API_TOKEN")
+
+
+@internal_bp.route("/pool")
+def pool_stats():
+    """
+    Getting GET requests on the '/internal/pool' endpoint, and returning
+    the connection pool statistics of every database bind
+    """
+    stats = {}
+    options = current_app.config["SQLALCHEMY_BINDS_ENGINE_OPTIONS"]
+    for bind_key, db_session in current_app.extensions["db_sessions"].items():
+        primary, replicas = session_engines(db_session)
+        stats[bind_key] = pool_status(primary, options[bind_key])
+        if replicas:
+            stats[bind_key]["replicas"] = [
+                pool_status(replica, options[bind_key])
+                for replica in replicas
+            ]
+    return jsonify(stats)
+
+
+@internal_bp.route("/user_cache")
+def user_cache_stats():
+    """
+    Getting GET requests on the '/internal/user_cache' endpoint, and
+    returning the hit and miss counters of the user cache of this worker
+    """
+    cache = current_app.extensions["user_cache"]
+    if cache is None:
+        return jsonify({"enabled": False})
+    return jsonify({"enabled": True, **cache.stats()})
+
+
+@internal_bp.route("/metrics")
+def metrics():
+    """
+    Getting GET requests on the '/internal/metrics' endpoint, and
+    returning the request and pool metrics in the prometheus text
+    exposition format, added up over every gunicorn worker
+    """
+    return metrics_response()
+
+
+@internal_bp.route("/profiles")
+def profiles():
+    """
+    Getting GET requests on the '/internal/profiles' endpoint, and
+    returning the summaries of the stored request profiles, newest first
+    """
+    store = current_app.extensions.get("profiles")
+    if store is None:
+        return jsonify({"enabled": False})
+    return jsonify({"enabled": True, "profiles": store.list()})
+
+
+@internal_bp.route("/profiles/<profile_id>")
+def profile_stacks(profile_id):
+    """
+    Getting GET requests on the '/internal/profiles/<profile_id>' endpoint,
+    and returning the folded stacks of the profile for flamegraph.pl
+    or speedscope
+    """
+    store = current_app.extensions.get("profiles")
+    stacks = store.get(profile_id) if store is not None else None
+    if stacks is None:
+        abort(404)
+    return stacks, 200, {"Content-Type": "text/plain; charset=utf-8"}
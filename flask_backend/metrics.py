@@ -0,0 +1,158 @@
+import os
+import time
+from flask import current_app, g, request
+from prometheus_client import (
+    CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Gauge,
+    Histogram, generate_latest,
+)
+from prometheus_client import multiprocess
+from db.pool import pool_status
+from db.routing import session_engines
+
+# gunicorn workers write their samples to files in this directory,
+# it must be set before prometheus_client is imported
+MULTIPROC_DIR = "prometheus_multiproc_dir"
+REQUEST_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+POOL_STATES = ("size", "checked_in", "checked_out", "overflow")
+
+REQUEST_LATENCY = Histogram(
+    "flask_backend_request_duration_seconds",
+    "Seconds from the start of a request to its response",
+    ["endpoint", "method"],
+    buckets=REQUEST_BUCKETS,
+)
+RESPONSE_SIZE = Histogram(
+    "flask_backend_response_size_bytes",
+    "Body size of the responses with a known content length",
+    ["endpoint", "method"],
+    buckets=SIZE_BUCKETS,
+)
+REQUESTS = Counter(
+    "flask_backend_requests_total",
+    "Finished requests by response status",
+    ["endpoint", "method", "status"],
+)
+IN_FLIGHT = Gauge(
+    "flask_backend_requests_in_flight",
+    "Requests being served",
+    ["endpoint", "method"],
+    multiprocess_mode="livesum",
+)
+POOL_CONNECTIONS = Gauge(
+    "flask_backend_db_pool_connections",
+    "Connections of the database pools by state",
+    ["bind", "engine", "state"],
+    multiprocess_mode="livesum",
+)
+
+
+def request_labels():
+    # 404 and 405 responses have no endpoint
+    return {
+        "endpoint": request.endpoint or "unmatched",
+        "method": request.method,
+    }
+
+
+def update_pool_gauges(app):
+    """
+    Setting the POOL_CONNECTIONS gauges of every engine of the app
+    from the pool statistics of this process
+    """
+    options = app.config["SQLALCHEMY_BINDS_ENGINE_OPTIONS"]
+    for bind_key, db_session in app.extensions["db_sessions"].items():
+        primary, replicas = session_engines(db_session)
+        engines = [("primary", primary)] + [
+            (f"replica_{index}", replica)
+            for index, replica in enumerate(replicas)
+        ]
+        for name, engine in engines:
+            status = pool_status(engine, options[bind_key])
+            for state in POOL_STATES:
+                if state in status:
+                    POOL_CONNECTIONS.labels(bind_key, name, state).set(
+                        status[state]
+                    )
+
+
+def init_metrics(app):
+    """
+    Measuring the latency, response size and status of every request
+    by endpoint (the resource) and method, the requests in flight and
+    the database pool connections, exported by metrics_response.
+    The pool gauges are set at most every METRICS_POOL_INTERVAL
+    seconds by the requests of a worker and on every collection.
+    Register it before the other before_request functions, so the
+    latency includes them.
+    """
+    pools_observed = [float("-inf")]
+
+    @app.before_request
+    def start_request_timer():
+        g.metrics_start = time.perf_counter()
+        g.metrics_labels = request_labels()
+        IN_FLIGHT.labels(**g.metrics_labels).inc()
+
+    @app.after_request
+    def observe_response(response):
+        labels = g.get("metrics_labels")
+        if labels is None:
+            return response
+        REQUEST_LATENCY.labels(**labels).observe(
+            time.perf_counter() - g.metrics_start
+        )
+        REQUESTS.labels(status=response.status_code, **labels).inc()
+        # streamed responses have no length until they are sent
+        if not response.is_streamed:
+            size = response.calculate_content_length()
+            if size is not None:
+                RESPONSE_SIZE.labels(**labels).observe(size)
+        return response
+
+    @app.teardown_request
+    def finish_request(exception=None):
+        labels = g.get("metrics_labels")
+        if labels is not None:
+            IN_FLIGHT.labels(**labels).dec()
+            g.metrics_labels = None
+
+    @app.teardown_appcontext
+    def observe_pools(exception=None):
+        # runs after the session teardowns registered later by
+        # create_app, so the connection of the request is checked in
+        if not g.get("flask_backend_session"):
+            return
+        now = time.monotonic()
+        if now - pools_observed[0] < app.config["METRICS_POOL_INTERVAL"]:
+            return
+        pools_observed[0] = now
+        update_pool_gauges(app)
+
+
+def metrics_registry():
+    """
+    Returning the registry to export, under gunicorn with the
+    prometheus_multiproc_dir environment variable one that adds
+    up the samples of every worker
+    """
+    if MULTIPROC_DIR not in os.environ:
+        return REGISTRY
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry)
+    return registry
+
+
+def metrics_response():
+    """
+    Returning the (body, status, headers) of the metrics in the
+    prometheus text exposition format
+    """
+    update_pool_gauges(current_app)
+    return (
+        generate_latest(metrics_registry()),
+        200,
+        {"Content-Type": CONTENT_TYPE_LATEST},
+    )
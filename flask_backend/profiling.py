@@ -0,0 +1,282 @@
+import hmac
+import importlib
+import json
+import os
+import random
+import sys
+import threading
+import time
+from collections import Counter, deque
+from uuid import uuid4
+from flask import g, request
+
+PROFILE_HEADER = "X-Profile"
+
+
+def original(module, name):
+    """
+    Returning module.name as it was before gevent monkey patched it
+    """
+    try:
+        from gevent import monkey
+    except ImportError:
+        return getattr(importlib.import_module(module), name)
+    return monkey.get_original(module, name)
+
+
+def current_greenlet():
+    """
+    Returning the running greenlet in gevent patched workers, None
+    while threads are real threads
+    """
+    try:
+        from gevent import monkey
+    except ImportError:
+        return None
+    if not monkey.is_module_patched("threading"):
+        return None
+    from greenlet import getcurrent
+    return getcurrent()
+
+
+def frame_name(frame):
+    code = frame.f_code
+    return (
+        f"{code.co_name} "
+        f"({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+    )
+
+
+def folded_stack(frame):
+    """
+    Returning the "root;...;leaf" names of the frame and its callers
+    """
+    names = []
+    while frame is not None:
+        names.append(frame_name(frame))
+        frame = frame.f_back
+    return ";".join(reversed(names))
+
+
+class Sampler(object):
+    """
+    Thread that records the stack of thread_id every interval seconds
+    until stop, the stacks are counted in the folded format of
+    flamegraph.pl and speedscope. It is an OS thread made with the
+    unpatched primitives, so it runs while gevent greenlets run, and
+    with a greenlet it records the stack of that greenlet: the frame of
+    the thread while the greenlet runs, the frame the greenlet waits in
+    while others run.
+    """
+
+    def __init__(self, thread_id, interval, greenlet=None):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.greenlet = greenlet
+        self.stacks = Counter()
+        self._stopped = False
+        self._running = original("_thread", "allocate_lock")()
+
+    def start(self):
+        self._running.acquire()
+        original("_thread", "start_new_thread")(self._run, ())
+        return self
+
+    def stop(self):
+        # waits at most one interval for the sampler thread to end
+        self._stopped = True
+        with self._running:
+            return self.stacks
+
+    def _frame(self):
+        if self.greenlet is not None:
+            frame = self.greenlet.gr_frame
+            if frame is not None:
+                return frame
+        return sys._current_frames().get(self.thread_id)
+
+    def _run(self):
+        sleep = original("time", "sleep")
+        try:
+            while True:
+                sleep(self.interval)
+                if self._stopped:
+                    break
+                frame = self._frame()
+                if frame is not None:
+                    self.stacks[folded_stack(frame)] += 1
+        finally:
+            self._running.release()
+
+
+def folded(stacks):
+    return "".join(
+        f"{stack} {count}\n" for stack, count in stacks.most_common()
+    )
+
+
+class MemoryProfiles(object):
+    """
+    Ring of the last max_profiles profiles of this process
+    """
+
+    def __init__(self, max_profiles):
+        self._profiles = deque(maxlen=max_profiles)
+        self._lock = threading.Lock()
+
+    def add(self, profile, stacks):
+        with self._lock:
+            self._profiles.append((profile, folded(stacks)))
+
+    def list(self):
+        with self._lock:
+            return [profile for profile, _ in reversed(self._profiles)]
+
+    def get(self, profile_id):
+        with self._lock:
+            for profile, stacks in self._profiles:
+                if profile["id"] == profile_id:
+                    return stacks
+        return None
+
+
+class DirectoryProfiles(object):
+    """
+    Profiles written as <id>.folded stacks with an <id>.json summary
+    to a directory, shared by the workers of one host, the oldest are
+    removed past max_profiles
+    """
+
+    def __init__(self, path, max_profiles):
+        self.path = path
+        self.max_profiles = max_profiles
+        os.makedirs(path, exist_ok=True)
+
+    def add(self, profile, stacks):
+        name = os.path.join(self.path, profile["id"])
+        with open(f"{name}.folded", "w") as stacks_file:
+            stacks_file.write(folded(stacks))
+        with open(f"{name}.json", "w") as profile_file:
+            json.dump(profile, profile_file)
+        self.prune()
+
+    def prune(self):
+        """
+        Removing the profiles written before the last max_profiles,
+        another worker may have removed them already
+        """
+        summaries = []
+        for entry in os.scandir(self.path):
+            if entry.name.endswith(".json"):
+                try:
+                    summaries.append((entry.stat().st_mtime_ns, entry.name))
+                except FileNotFoundError:
+                    continue
+        summaries.sort()
+        for _, entry in summaries[:max(len(summaries) - self.max_profiles, 0)]:
+            profile_id = entry[:-len(".json")]
+            for suffix in (".json", ".folded"):
+                try:
+                    os.remove(os.path.join(self.path, profile_id + suffix))
+                except FileNotFoundError:
+                    pass
+
+    def list(self):
+        profiles = []
+        for entry in sorted(os.listdir(self.path), reverse=True):
+            if entry.endswith(".json"):
+                with open(os.path.join(self.path, entry)) as profile_file:
+                    profiles.append(json.load(profile_file))
+        return profiles
+
+    def get(self, profile_id):
+        if os.path.basename(profile_id) != profile_id:
+            return None
+        try:
+            with open(os.path.join(self.path, f"{profile_id}.folded")) as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+
+def create_profiles(app_config):
+    """
+    Returning the store of the last PROFILER_MAX_PROFILES profiles,
+    in PROFILER_OUTPUT_DIR or in a ring in memory
+    """
+    if app_config["PROFILER_OUTPUT_DIR"]:
+        return DirectoryProfiles(
+            app_config["PROFILER_OUTPUT_DIR"],
+            app_config["PROFILER_MAX_PROFILES"],
+        )
+    return MemoryProfiles(app_config["PROFILER_MAX_PROFILES"])
+
+
+def profile_requested(app_config):
+    """
+    Returning True for the requests sent with the PROFILER_TOKEN in
+    the X-Profile header and for PROFILER_SAMPLE_RATE of the others
+    """
+    token = app_config["PROFILER_TOKEN"]
+    given = request.headers.get(PROFILE_HEADER)
+    if token and given and hmac.compare_digest(given.encode(), token.encode()):
+        return True
+    rate = app_config["PROFILER_SAMPLE_RATE"]
+    return rate > 0 and random.random() < rate
+
+
+def init_profiler(app):
+    """
+    Sampling the stacks of the chosen requests every PROFILER_INTERVAL
+    seconds, with their wall and CPU time. The profile id is returned
+    in the X-Profile-Id header and the profiles are listed at
+    /internal/profiles. Only called with PROFILER_ENABLED, so requests
+    pay nothing while it is off.
+    """
+    app.extensions["profiles"] = create_profiles(app.config)
+
+    @app.before_request
+    def start_profile():
+        if not profile_requested(app.config):
+            return
+        g.profile_start = (time.perf_counter(), time.thread_time())
+        g.profile_sampler = Sampler(
+            original("_thread", "get_ident")(),
+            app.config["PROFILER_INTERVAL"],
+            current_greenlet(),
+        ).start()
+
+    @app.after_request
+    def store_profile(response):
+        sampler = g.get("profile_sampler")
+        if sampler is None:
+            return response
+        g.profile_sampler = None
+        stacks = sampler.stop()
+        wall_start, cpu_start = g.profile_start
+        profile_id = (
+            f"{time.strftime('%Y%m%dT%H%M%S')}-{uuid4().hex[:12]}"
+        )
+        app.extensions["profiles"].add(
+            {
+                "id": profile_id,
+                "method": request.method,
+                "path": request.path,
+                "endpoint": request.endpoint,
+                "status": response.status_code,
+                "wall_seconds": round(time.perf_counter() - wall_start, 6),
+                "cpu_seconds": round(time.thread_time() - cpu_start, 6),
+                "samples": sum(stacks.values()),
+                "interval": sampler.interval,
+            },
+            stacks,
+        )
+        response.headers["X-Profile-Id"] = profile_id
+        return response
+
+    @app.teardown_request
+    def stop_profile(exception=None):
+        sampler = g.get("profile_sampler")
+        if sampler is not None:
+            g.profile_sampler = None
+            sampler.stop()
@@ -0,0 +1,46 @@
+import time
+from flask import current_app, request
+from db.routing import route_reads
+
+READ_PRIMARY_COOKIE = "read_primary_until"
+WRITE_METHODS = ("POST", "PUT", "PATCH", "DELETE")
+
+
+def reads_pinned_to_primary():
+    """
+    Returning True while the client is inside the read-your-writes
+    window of its last successful write request
+    """
+    try:
+        until = float(request.cookies.get(READ_PRIMARY_COOKIE, 0))
+    except ValueError:
+        return False
+    return until > time.time()
+
+
+def init_replica_routing(app):
+    """
+    Sending the reads of GET requests to the read replicas, and pinning
+    a client to the primary for REPLICA_STICKY_SECONDS after it writes
+    """
+
+    @app.before_request
+    def route_reads_to_replicas():
+        use_replica = (
+            request.method in ("GET", "HEAD")
+            and not reads_pinned_to_primary()
+        )
+        for db_session in current_app.extensions["db_sessions"].values():
+            route_reads(db_session, use_replica)
+
+    @app.after_request
+    def pin_reads_to_primary(response):
+        if request.method in WRITE_METHODS and response.status_code < 400:
+            sticky_seconds = current_app.config["REPLICA_STICKY_SECONDS"]
+            response.set_cookie(
+                READ_PRIMARY_COOKIE,
+                str(time.time() + sticky_seconds),
+                max_age=sticky_seconds,
+                httponly=True,
+            )
+        return response
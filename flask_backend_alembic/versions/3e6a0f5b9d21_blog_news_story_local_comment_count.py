@@ -0,0 +1,37 @@
+"""blog news story local_comment_count column
+
+Revision ID: 3e6a0f5b9d21
+Revises: 8c1f4a9d2e67
+Create Date: 2026-10-18 14:35:07.530918
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "3e6a0f5b9d21"
+down_revision = "8c1f4a9d2e67"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column(
+        "blog_news_story",
+        sa.Column(
+            "local_comment_count",
+            sa.Integer(),
+            nullable=False,
+            server_default="0",
+        ),
+    )
+    op.execute(
+        "UPDATE blog_news_story SET local_comment_count = ("
+        "SELECT count(*) FROM blog_news_story_comment "
+        "WHERE blog_news_story_comment.parent = blog_news_story.id)"
+    )
+
+
+def downgrade():
+    op.drop_column("blog_news_story", "local_comment_count")
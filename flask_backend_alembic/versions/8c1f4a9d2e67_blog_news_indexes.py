@@ -0,0 +1,54 @@
+"""blog_news indexes
+
+Revision ID: 8c1f4a9d2e67
+Revises: 19040462bb9b
+Create Date: 2026-10-18 10:07:41.902551
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "8c1f4a9d2e67"
+down_revision = "19040462bb9b"
+branch_labels = None
+depends_on = None
+
+INDEXES = [
+    (
+        "ix_blog_news_story_time_id",
+        "blog_news_story",
+        [sa.text('"time" DESC'), sa.text("id DESC")],
+    ),
+    (
+        "ix_blog_news_story_by_time_id",
+        "blog_news_story",
+        ["by", sa.text('"time" DESC'), sa.text("id DESC")],
+    ),
+    (
+        "ix_blog_news_story_comment_parent_id",
+        "blog_news_story_comment",
+        ["parent", sa.text("id DESC")],
+    ),
+    (
+        "ix_blog_news_story_comment_by_time_id",
+        "blog_news_story_comment",
+        ["by", sa.text('"time" DESC'), sa.text("id DESC")],
+    ),
+]
+
+
+def upgrade():
+    # CONCURRENTLY keeps the tables writable, it can not run in a transaction
+    with op.get_context().autocommit_block():
+        for name, table, columns in INDEXES:
+            op.create_index(
+                name, table, columns, postgresql_concurrently=True
+            )
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        for name, table, _ in reversed(INDEXES):
+            op.drop_index(name, table, postgresql_concurrently=True)
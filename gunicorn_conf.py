@@ -0,0 +1,107 @@
+"""
+Gunicorn settings of the production server, read from GUNICORN_*
+environment variables:
+
+    gunicorn --config gunicorn_conf.py wsgi:app
+
+GUNICORN_WORKER_CLASS picks the worker model: "sync" (one request per
+process), "gthread" (GUNICORN_THREADS requests per process, keep the
+database pool_size + max_overflow at least that large) or "gevent"
+(GUNICORN_WORKER_CONNECTIONS greenlets per process). gevent serves
+thousands of slow clients on a few processes, while the database
+pool_size + max_overflow of each worker bounds how many of them query
+the database at once.
+
+With GUNICORN_PRELOAD the app is created once in the master and the
+workers fork from it, post_fork gives each worker new connection pools.
+"kill -HUP <master>" restarts the workers gracefully, it loads new code
+only when GUNICORN_PRELOAD is off, with preload use "kill -USR2" to
+start a new master and "kill -QUIT" the old one after it is ready.
+
+Set the prometheus_multiproc_dir environment variable to an empty
+directory for /internal/metrics to add up the metrics of every worker,
+the master empties it on start and drops the gauges of exited workers.
+"""
+import glob
+import multiprocessing
+import os
+
+WORKER_CLASSES = ("sync", "gthread", "gevent")
+
+
+def env_flag(name, default):
+    return os.environ.get(name, default).lower() in ("1", "true", "yes")
+
+
+worker_class = os.environ.get("GUNICORN_WORKER_CLASS", "sync")
+if worker_class not in WORKER_CLASSES:
+    raise ValueError(f"Unknown gunicorn worker class {worker_class}")
+
+bind = os.environ.get("GUNICORN_BIND", "0.0.0.0:4000")
+workers = int(
+    os.environ.get("GUNICORN_WORKERS", multiprocessing.cpu_count() * 2 + 1)
+)
+threads = int(
+    os.environ.get("GUNICORN_THREADS", 4 if worker_class == "gthread" else 1)
+)
+worker_connections = int(os.environ.get("GUNICORN_WORKER_CONNECTIONS", 1000))
+preload_app = env_flag("GUNICORN_PRELOAD", "true")
+timeout = int(os.environ.get("GUNICORN_TIMEOUT", 30))
+graceful_timeout = int(os.environ.get("GUNICORN_GRACEFUL_TIMEOUT", 30))
+keepalive = int(os.environ.get("GUNICORN_KEEPALIVE", 5))
+max_requests = int(os.environ.get("GUNICORN_MAX_REQUESTS", 0))
+max_requests_jitter = int(os.environ.get("GUNICORN_MAX_REQUESTS_JITTER", 0))
+accesslog = os.environ.get("GUNICORN_ACCESSLOG", "-")
+loglevel = os.environ.get("GUNICORN_LOGLEVEL", "info")
+
+
+def on_starting(server):
+    """
+    Removing the metrics the workers of a previous run left
+    """
+    metrics_dir = os.environ.get("prometheus_multiproc_dir")
+    if metrics_dir:
+        for path in glob.glob(os.path.join(metrics_dir, "*.db")):
+            os.remove(path)
+
+
+def post_fork(server, worker):
+    """
+    Dropping the connection pools a preloaded app brought from the
+    master, the worker opens its own connections
+    """
+    app = getattr(server.app, "callable", None)
+    if app is not None:
+        from flask_backend import dispose_engines
+        dispose_engines(app)
+
+
+def post_worker_init(worker):
+    """
+    Making psycopg2 yield to other greenlets while it waits
+    for the database in gevent workers. The pools post_fork made
+    before the worker was monkey patched hold OS locks, a greenlet
+    waiting there for a connection would block every greenlet of the
+    worker, so they are replaced by pools with patched locks.
+    """
+    if worker_class == "gevent":
+        from flask_backend.green import patch_green
+        patch_green()
+        app = getattr(worker, "wsgi", None)
+        if app is not None:
+            from flask_backend import dispose_engines
+            dispose_engines(app)
+
+
+def on_reload(server):
+    server.log.info("Reloading workers, preload_app=%s", preload_app)
+
+
+def child_exit(server, worker):
+    """
+    Dropping the in flight and pool gauges of an exited worker,
+    its counters and histograms are still added up
+    """
+    if os.environ.get("prometheus_multiproc_dir"):
+        from prometheus_client import multiprocess
+        multiprocess.mark_process_dead(worker.pid)
@@ -0,0 +1,54 @@
+"""hn stories and comments indexes
+
+Revision ID: 5b8d0e3c71f4
+Revises: e36f87c2b225
+Create Date: 2026-10-18 10:05:12.418203
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "5b8d0e3c71f4"
+down_revision = "e36f87c2b225"
+branch_labels = None
+depends_on = None
+
+INDEXES = [
+    (
+        "ix_hacker_news_top_story_parsed_time_id",
+        "hacker_news_top_story",
+        [sa.text("parsed_time DESC"), sa.text("id DESC")],
+    ),
+    (
+        "ix_hacker_news_top_story_comment_parent_parsed_time",
+        "hacker_news_top_story_comment",
+        ["parent", sa.text("parsed_time DESC")],
+    ),
+    (
+        "ix_hacker_news_new_story_parsed_time_id",
+        "hacker_news_new_story",
+        [sa.text("parsed_time DESC"), sa.text("id DESC")],
+    ),
+    (
+        "ix_hacker_news_new_story_comment_parent_parsed_time",
+        "hacker_news_new_story_comment",
+        ["parent", sa.text("parsed_time DESC")],
+    ),
+]
+
+
+def upgrade():
+    # CONCURRENTLY keeps the tables writable, it can not run in a transaction
+    with op.get_context().autocommit_block():
+        for name, table, columns in INDEXES:
+            op.create_index(
+                name, table, columns, postgresql_concurrently=True
+            )
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        for name, table, _ in reversed(INDEXES):
+            op.drop_index(name, table, postgresql_concurrently=True)
@@ -0,0 +1,44 @@
+"""hn stories local_comment_count column
+
+Revision ID: 7d2e9b4a1c58
+Revises: 5b8d0e3c71f4
+Create Date: 2026-10-18 14:32:40.127455
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "7d2e9b4a1c58"
+down_revision = "5b8d0e3c71f4"
+branch_labels = None
+depends_on = None
+
+TABLES = [
+    ("hacker_news_top_story", "hacker_news_top_story_comment"),
+    ("hacker_news_new_story", "hacker_news_new_story_comment"),
+]
+
+
+def upgrade():
+    for story_table, comment_table in TABLES:
+        op.add_column(
+            story_table,
+            sa.Column(
+                "local_comment_count",
+                sa.Integer(),
+                nullable=False,
+                server_default="0",
+            ),
+        )
+        op.execute(
+            f"UPDATE {story_table} SET local_comment_count = ("
+            f"SELECT count(*) FROM {comment_table} "
+            f"WHERE {comment_table}.parent = {story_table}.hn_id)"
+        )
+
+
+def downgrade():
+    for story_table, _ in TABLES:
+        op.drop_column(story_table, "local_comment_count")
@@ -0,0 +1,245 @@
+import os
+import functools
+import logging
+import pytest
+from dotenv import load_dotenv
+from sqlalchemy import create_engine, event
+from sqlalchemy.exc import ProgrammingError, OperationalError
+
+TEST_DATABASE_URIS = (
+    "TEST_FLASK_BACKEND_DATABASE_URI",
+    "TEST_HACKER_NEWS_DATABASE_URI",
+)
+
+# every pytest-xdist worker gets its own databases, renamed before
+# config reads the environment
+load_dotenv()
+WORKER = os.environ.get("PYTEST_XDIST_WORKER")
+if WORKER:
+    for name in TEST_DATABASE_URIS:
+        uri = os.environ.get(name)
+        if uri and not uri.endswith(f"_{WORKER}"):
+            os.environ[name] = f"{uri}_{WORKER}"
+
+
+def pytest_addoption(parser):
+    parser.addoption(
+        "--serving-mode",
+        choices=("sync", "gevent"),
+        default=os.environ.get("SERVING_MODE", "sync"),
+        help="run the tests with the app patched for gevent workers",
+    )
+
+
+def pytest_configure(config):
+    if config.getoption("--serving-mode") == "gevent":
+        from flask_backend.green import patch_green
+        patch_green()
+
+
+def create_db(default_postgres_db_uri, test_db_name):
+    default_engine = create_engine(default_postgres_db_uri)
+    default_engine = default_engine.execution_options(
+        isolation_level="AUTOCOMMIT"
+    )
+    conn = default_engine.connect()
+    # Try to delete Database
+    try:
+        conn.execute(
+            f"DROP DATABASE "
+            f"{test_db_name};"
+        )
+    except ProgrammingError as err:
+        logging.debug(err)
+        conn.execute("ROLLBACK")
+    except OperationalError as err:
+        logging.debug(err)
+        conn.execute("ROLLBACK")
+    # Try to create Database
+    try:
+        conn.execute(
+            f"CREATE DATABASE "
+            f"{test_db_name} "
+            f"ENCODING 'utf8' TEMPLATE template1"
+        )
+    except ProgrammingError as err:
+        logging.debug(err)
+        conn.execute("ROLLBACK")
+    except OperationalError as err:
+        logging.debug(err)
+        conn.execute("ROLLBACK")
+    conn.close()
+    default_engine.dispose()
+    return
+
+
+def delete_db(default_postgres_db_uri, test_db_name):
+    default_engine = create_engine(default_postgres_db_uri)
+    default_engine = default_engine.execution_options(
+        isolation_level="AUTOCOMMIT"
+    )
+    conn = default_engine.connect()
+    try:
+        conn.execute(
+            f"DROP DATABASE "
+            f"{test_db_name};"
+        )
+    except ProgrammingError as err:
+        logging.debug(err)
+        conn.execute("ROLLBACK")
+    except OperationalError as err:
+        logging.debug(err)
+        conn.execute("ROLLBACK")
+    conn.close()
+    default_engine.dispose()
+    return
+
+
+@pytest.fixture(scope='session')
+def databases():
+    """
+    Creating the test databases with every table once per session
+    (per xdist worker), and dropping them at its end
+    """
+    from config import config
+    from api.models import blog_news, hacker_news, user # noqa
+    from db import flask_backend_Base, hacker_news_Base
+    testing_config = config['testing']
+    default_postgres_db_uri = testing_config.POSTGRES_DATABASE_URI
+    bases = {
+        "flask_backend": flask_backend_Base,
+        "hacker_news": hacker_news_Base,
+    }
+    sequences = {}
+    for bind_key, db_uri in testing_config.SQLALCHEMY_BINDS.items():
+        create_db(
+            default_postgres_db_uri=default_postgres_db_uri,
+            test_db_name=db_uri.split('/')[-1],
+        )
+        engine = create_engine(db_uri)
+        bases[bind_key].metadata.create_all(engine)
+        sequences[bind_key] = [
+            row[0] for row in engine.execute(
+                "SELECT sequence_name FROM information_schema.sequences"
+            )
+        ]
+        engine.dispose()
+    yield sequences
+    for db_uri in testing_config.SQLALCHEMY_BINDS.values():
+        delete_db(
+            default_postgres_db_uri=default_postgres_db_uri,
+            test_db_name=db_uri.split('/')[-1],
+        )
+
+
+def restart_savepoint(session, transaction):
+    # a commit or rollback of the app ends the savepoint,
+    # the next statements go to a new one
+    if transaction.nested and not transaction._parent.nested:
+        session.expire_all()
+        session.begin_nested()
+
+
+def savepoint_session(session_factory, connection):
+    """
+    Returning a session of the connection that runs in a savepoint
+    """
+    session = session_factory(bind=connection)
+    event.listen(session, 'after_transaction_end', restart_savepoint)
+    session.begin_nested()
+    return session
+
+
+class Transactions(object):
+    """
+    One connection per database bind of an app with a transaction that
+    is rolled back after the test, the sessions of the app run in
+    savepoints of it, so their commits and rollbacks stay inside
+    """
+
+    def __init__(self, sequences):
+        self.sequences = sequences
+        self.bound = []
+        self.connections = {}
+
+    def bind(self, app):
+        from db.routing import session_engines
+        for bind_key, db_session in app.extensions['db_sessions'].items():
+            primary, _ = session_engines(db_session)
+            connection = primary.connect()
+            transaction = connection.begin()
+            # sequences are not rolled back, every test counts ids from 1
+            for sequence in self.sequences[bind_key]:
+                connection.execute(f"ALTER SEQUENCE {sequence} RESTART")
+            db_session.remove()
+            db_session.registry.createfunc = functools.partial(
+                savepoint_session, db_session.session_factory, connection
+            )
+            self.bound.append((db_session, connection, transaction))
+            self.connections[bind_key] = connection
+        return app
+
+    def seed(self, rows):
+        """
+        Inserting the (model, row) pairs through the connection of their
+        database bind, under the savepoints of the app sessions
+        """
+        from db import flask_backend_Base, hacker_news_Base
+        bind_keys = {
+            flask_backend_Base.metadata: "flask_backend",
+            hacker_news_Base.metadata: "hacker_news",
+        }
+        for model, row in rows:
+            connection = self.connections[bind_keys[model.metadata]]
+            connection.execute(model.__table__.insert(), row)
+
+    def rollback(self):
+        for db_session, connection, transaction in self.bound:
+            db_session.remove()
+            transaction.rollback()
+            connection.close()
+            db_session.session_factory.kw['bind'].dispose()
+        self.bound = []
+        self.connections = {}
+
+
+@pytest.fixture(scope='function')
+def transactions(databases):
+    """
+    Returning the Transactions that bind apps to the session databases,
+    everything the test writes is rolled back after it
+    """
+    transactions = Transactions(databases)
+    yield transactions
+    transactions.rollback()
+
+
+@pytest.fixture(scope='function')
+def app(transactions):
+    """
+    Returning the testing app bound to the transactions,
+    modules override it to set their test config
+    """
+    from flask_backend import create_app
+    return transactions.bind(create_app(config_name="testing"))
+
+
+@pytest.fixture(scope='function')
+def seed_rows():
+    """
+    Returning the (model, row) pairs seeded before the test,
+    modules override it with their test rows
+    """
+    return []
+
+
+@pytest.fixture(scope='function')
+def client(app, transactions, seed_rows):
+    """
+    Returning the test client of the app, with the seed rows written
+    once through the transactions before its first request
+    """
+    transactions.seed(seed_rows)
+    with app.test_client() as client:
+        logging.debug('Starting the test.')
+        yield client
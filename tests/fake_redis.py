@@ -0,0 +1,49 @@
+import time
+from fnmatch import fnmatchcase
+
+
+class FakeRedis(object):
+    '''
+    in-process stand-in for the redis client calls used by SharedCache
+    '''
+    def __init__(self):
+        self.values = {}
+        self.sets = {}
+        self.expires = {}
+
+    def _alive(self, key):
+        expires_at = self.expires.get(key)
+        if expires_at is not None and expires_at <= time.monotonic():
+            self.values.pop(key, None)
+            self.sets.pop(key, None)
+            self.expires.pop(key, None)
+        return key in self.values or key in self.sets
+
+    def get(self, key):
+        return self.values.get(key) if self._alive(key) else None
+
+    def set(self, key, value, ex=None):
+        self.values[key] = value
+        if ex is not None:
+            self.expires[key] = time.monotonic() + ex
+
+    def sadd(self, key, *members):
+        self._alive(key)
+        self.sets.setdefault(key, set()).update(members)
+
+    def smembers(self, key):
+        return set(self.sets.get(key, ())) if self._alive(key) else set()
+
+    def expire(self, key, seconds):
+        self.expires[key] = time.monotonic() + seconds
+
+    def delete(self, *keys):
+        for key in keys:
+            self.values.pop(key, None)
+            self.sets.pop(key, None)
+            self.expires.pop(key, None)
+
+    def scan_iter(self, match=None, count=None):
+        for key in list(self.values) + list(self.sets):
+            if self._alive(key) and (match is None or fnmatchcase(key, match)):
+                yield key
@@ -0,0 +1,54 @@
+import re
+from contextlib import contextmanager
+from sqlalchemy import event
+
+SERVER_TIMING_DB = re.compile(r"db;dur=[\d.]+;desc=\"(\d+) queries\"")
+# the test transactions run the app sessions in savepoints,
+# statements a deployed app does not send
+SAVEPOINTS = ("SAVEPOINT", "RELEASE SAVEPOINT", "ROLLBACK TO SAVEPOINT")
+
+
+def query_count(response):
+    """
+    return the number of SQL statements the request of the response
+    ran, read from its Server-Timing header
+    """
+    match = SERVER_TIMING_DB.search(response.headers.get("Server-Timing", ""))
+    assert match, "response has no db Server-Timing"
+    return int(match.group(1))
+
+
+@contextmanager
+def app_statements(app):
+    """
+    yield the list that collects the SQL statements the app sends
+    while the block runs, without the savepoints of the test
+    transactions
+    """
+    statements = []
+
+    def collect(conn, cursor, statement, parameters, context, executemany):
+        if not statement.startswith(SAVEPOINTS):
+            statements.append(statement)
+
+    binds = [
+        db_session.get_bind()
+        for db_session in app.extensions["db_sessions"].values()
+    ]
+    for bind in binds:
+        event.listen(bind, "after_cursor_execute", collect)
+    try:
+        yield statements
+    finally:
+        for bind in binds:
+            event.remove(bind, "after_cursor_execute", collect)
+
+
+def assert_max_queries(statements, max_queries):
+    """
+    assert at most max_queries SQL statements were collected
+    """
+    count = len(statements)
+    assert count <= max_queries, (
+        f"{count} queries, expected at most {max_queries}: {statements}"
+    )
@@ -0,0 +1,123 @@
+import os
+import sys
+import pytest
+import json
+from sqlalchemy import event
+from tests.hacker_news_test_data import test_row, test_comment_row
+sys.path.append(os.getcwd())
+from tests.query_budget import SAVEPOINTS # noqa
+from api.models import hacker_news, blog_news # noqa
+
+
+# pytest -s -o log_cli=true -o log_level=DEBUG
+
+
+@pytest.fixture(scope='function')
+def app(app):
+    app.config['test_data'] = test_row
+    return app
+
+
+@pytest.fixture(scope='function')
+def seed_rows():
+    return [
+        (hacker_news.HackerNewsTopStory, test_row),
+        (
+            blog_news.BlogNewsStory,
+            dict(id=1, by='bob', title='story', time=1, origin='my_blog'),
+        ),
+    ]
+
+
+def capture_statements(client, bind_key):
+    """
+    Returning the list that collects the SQL statements
+    sent to the bind_key database
+    """
+    statements = []
+    db_session = client.application.extensions['db_sessions'][bind_key]
+
+    @event.listens_for(db_session.get_bind(), 'before_cursor_execute')
+    def collect(conn, cursor, statement, parameters, context, executemany):
+        if not statement.startswith(SAVEPOINTS):
+            statements.append(statement)
+
+    return statements
+
+
+def post_comment(client, path, text):
+    return client.post(
+        path,
+        data=json.dumps({'by': 'bob', 'text': text}),
+        content_type='application/json',
+    )
+
+
+def test_hn_comment_count_follows_post_and_delete(client):
+    """
+    Test /api/hackernews/topstories/?pagenumber=N endpoint reads
+    comments_count from the counter kept by the comment endpoints
+    """
+    story_id = test_row['hn_id']
+    path = f'/api/hackernews/topstories/{story_id}/comments'
+    for number in range(3):
+        request = post_comment(client, path, f'comment {number}')
+        assert 201 == request.status_code
+    comments = json.loads(client.get(path).data)
+    request = client.delete(f"{path}/{comments[0]['id']}")
+    assert 200 == request.status_code
+    statements = capture_statements(client, 'hacker_news')
+    request = client.get('/api/hackernews/topstories/?pagenumber=1')
+    response = json.loads(request.data)
+    assert 2 == response['items'][0]['comments_count']
+    assert not [
+        statement for statement in statements if 'GROUP BY' in statement
+    ]
+    request = client.get(
+        '/api/hackernews/topstories/?pagenumber=1&fields=hn_id,comments_count'
+    )
+    response = json.loads(request.data)
+    assert {'hn_id': story_id, 'comments_count': 2} == response['items'][0]
+
+
+def test_blog_comment_count_follows_post_and_delete(client):
+    """
+    Test /api/blognews/?pagenumber=N endpoint reads comments_count
+    from the counter kept by the comment endpoints
+    """
+    path = '/api/blognews/1/comments'
+    for number in range(2):
+        request = post_comment(client, path, f'comment {number}')
+        assert 201 == request.status_code
+    comments = json.loads(client.get(path).data)
+    request = client.delete(f"{path}/{comments[0]['id']}")
+    assert 200 == request.status_code
+    request = client.get('/api/blognews/?pagenumber=1')
+    response = json.loads(request.data)
+    assert 1 == response['items'][0]['comments_count']
+
+
+def test_reconcile_comment_counts_command(client):
+    """
+    Test the reconcile-comment-counts command repairs the counters
+    of comments written around the comment endpoints
+    """
+    client.get('/api/hackernews/topstories/?pagenumber=1')
+    db_session = client.application.extensions['db_sessions']['hacker_news']
+    db_session.add(
+        hacker_news.HackerNewsTopStoryComment(
+            **dict(test_comment_row, id=1)
+        )
+    )
+    db_session.commit()
+    db_session.remove()
+    runner = client.application.test_cli_runner()
+    result = runner.invoke(args=['reconcile-comment-counts'])
+    assert 0 == result.exit_code
+    assert 'hacker_news_top_story: 1 stories repaired' in result.output
+    assert 'blog_news_story: 0 stories repaired' in result.output
+    request = client.get('/api/hackernews/topstories/?pagenumber=1')
+    response = json.loads(request.data)
+    assert 1 == response['items'][0]['comments_count']
+    result = runner.invoke(args=['reconcile-comment-counts'])
+    assert 'hacker_news_top_story: 0 stories repaired' in result.output
@@ -0,0 +1,156 @@
+import os
+import sys
+import pytest
+import json
+from tests.hacker_news_test_data import test_row
+from tests.fake_redis import FakeRedis
+sys.path.append(os.getcwd())
+from api.models import hacker_news # noqa
+from api.cache import MemoryCache, SharedCache # noqa
+
+
+# pytest -s -o log_cli=true -o log_level=DEBUG
+
+
+@pytest.fixture(scope='function')
+def app(app):
+    app.config['test_data'] = test_row
+    return app
+
+
+@pytest.fixture(scope='function')
+def seed_rows():
+    return [
+        (hacker_news.HackerNewsTopStory, test_row),
+        (
+            hacker_news.HackerNewsTopStory,
+            dict(
+                test_row,
+                id="2403",
+                hn_id=test_row['hn_id'] + 1,
+                parsed_time="2020-09-27T08:20:23.918000",
+            ),
+        ),
+    ]
+
+
+def test_hn_cache_story_served_from_cache(client):
+    """
+    test GET /api/hackernews/topstories/<story_id> endpoint
+    is served from the cache without touching the database
+    """
+    story_url = f"/api/hackernews/topstories/{test_row['hn_id']}"
+    first_response = client.get(story_url)
+    db_session = client.application.extensions['db_sessions']['hacker_news']
+    db_session.query(hacker_news.HackerNewsTopStory).delete()
+    db_session.commit()
+    db_session.remove()
+    second_response = client.get(story_url)
+    assert 200 == second_response.status_code
+    assert first_response.data == second_response.data
+
+
+def test_hn_cache_comment_post_invalidates_story_and_page(client):
+    """
+    test POST /api/hackernews/topstories/<story_id>/comments endpoint
+    drops the cached story and list pages
+    """
+    story_url = f"/api/hackernews/topstories/{test_row['hn_id']}"
+    page_url = "/api/hackernews/topstories/?pagenumber=1"
+    assert 0 == json.loads(client.get(story_url).data)['comments_count']
+    page = json.loads(client.get(page_url).data)
+    assert 0 == page['items'][0]['comments_count']
+    response = client.post(
+        f"{story_url}/comments",
+        data=json.dumps({'by': 'test_user', 'text': 'test comment'}),
+        content_type='application/json',
+    )
+    assert 201 == response.status_code
+    assert 1 == json.loads(client.get(story_url).data)['comments_count']
+    page = json.loads(client.get(page_url).data)
+    assert 1 == page['items'][0]['comments_count']
+
+
+def test_hn_cache_comment_delete_invalidates_parent_story(client):
+    """
+    test DELETE /api/hackernews/topstories/<story_id>/comments/<comment_id>
+    endpoint drops the cached story the comment belongs to
+    """
+    story_url = f"/api/hackernews/topstories/{test_row['hn_id']}"
+    other_url = f"/api/hackernews/topstories/{test_row['hn_id'] + 1}"
+    response = client.post(
+        f"{other_url}/comments",
+        data=json.dumps({'by': 'test_user', 'text': 'test comment'}),
+        content_type='application/json',
+    )
+    assert 201 == response.status_code
+    assert 1 == json.loads(client.get(other_url).data)['comments_count']
+    db_session = client.application.extensions['db_sessions']['hacker_news']
+    comment = db_session.query(hacker_news.HackerNewsTopStoryComment).one()
+    db_session.remove()
+    response = client.delete(f"{story_url}/comments/{comment.id}")
+    assert 200 == response.status_code
+    assert 0 == json.loads(client.get(other_url).data)['comments_count']
+
+
+def test_hn_cache_errors_not_cached(client):
+    """
+    test GET /api/hackernews/topstories/<story_id> endpoint
+    does not cache not found responses
+    """
+    assert 404 == client.get("/api/hackernews/topstories/1").status_code
+    assert [] == list(
+        client.application.extensions['response_cache']._entries
+    )
+
+
+def test_memory_cache_lru_and_ttl():
+    """
+    test MemoryCache evicts the least recently used entry
+    and expires entries after the ttl
+    """
+    cache = MemoryCache(max_entries=2, ttl=30)
+    cache.set('a', b'1', {'tag:a'})
+    cache.set('b', b'2', {'tag:b'})
+    assert b'1' == cache.get('a')
+    cache.set('c', b'3', {'tag:c'})
+    assert cache.get('b') is None
+    assert b'1' == cache.get('a')
+    cache.invalidate(['tag:a'])
+    assert cache.get('a') is None
+    cache = MemoryCache(max_entries=2, ttl=0)
+    cache.set('a', b'1', {'tag:a'})
+    assert cache.get('a') is None
+
+
+def test_shared_cache_invalidate_by_tag():
+    """
+    test SharedCache stores bodies and tag sets in the shared client
+    """
+    cache = SharedCache(FakeRedis(), ttl=30)
+    cache.set('/story/1', b'1', {'story:1', 'stories'})
+    cache.set('/story/2', b'2', {'story:2', 'stories'})
+    assert b'1' == cache.get('/story/1')
+    cache.invalidate(['story:1'])
+    assert cache.get('/story/1') is None
+    assert b'2' == cache.get('/story/2')
+    cache.invalidate(['stories'])
+    assert cache.get('/story/2') is None
+
+
+def test_shared_cache_clear():
+    """
+    test SharedCache.clear deletes every key under its prefix
+    and keeps the keys of other prefixes
+    """
+    client = FakeRedis()
+    client.set('other:key', b'x')
+    cache = SharedCache(client, ttl=30)
+    cache.CLEAR_BATCH_SIZE = 2
+    for number in range(5):
+        cache.set(f'/story/{number}', b'1', {f'story:{number}', 'stories'})
+    cache.clear()
+    for number in range(5):
+        assert cache.get(f'/story/{number}') is None
+    assert set() == client.smembers(cache.prefix + 'tag:stories')
+    assert ['other:key'] == list(client.scan_iter())
@@ -0,0 +1,162 @@
+import os
+import sys
+import pytest
+import json
+from sqlalchemy import event
+from tests.hacker_news_test_data import test_row
+from datetime import datetime, timedelta
+sys.path.append(os.getcwd())
+from tests.query_budget import SAVEPOINTS # noqa
+from api.models import hacker_news # noqa
+
+
+# pytest -s -o log_cli=true -o log_level=DEBUG
+
+
+@pytest.fixture(scope='function')
+def app(app):
+    app.config['test_data'] = test_row
+    return app
+
+
+@pytest.fixture(scope='function')
+def seed_rows():
+    rows = generate_test_rows()
+    return [(hacker_news.HackerNewsTopStory, row) for row in rows] + [
+        (hacker_news.HackerNewsNewStory, row) for row in rows
+    ]
+
+
+def generate_test_rows(count=3):
+    """
+    return test_row copies with unique ids and parsed_time
+    """
+    rows = []
+    parsed_time = datetime(2020, 9, 28, 8, 20, 23)
+    for number in range(count):
+        row = dict(test_row)
+        row['id'] = number + 1
+        row['hn_id'] = test_row['hn_id'] + number
+        row['parsed_time'] = parsed_time + timedelta(minutes=number)
+        rows.append(row)
+    return rows
+
+
+def capture_statements(client):
+    """
+    Returning the list that collects the SQL statements
+    sent to the hacker_news database
+    """
+    statements = []
+    db_session = client.application.extensions['db_sessions']['hacker_news']
+
+    @event.listens_for(db_session.get_bind(), 'before_cursor_execute')
+    def collect(conn, cursor, statement, parameters, context, executemany):
+        if not statement.startswith(SAVEPOINTS):
+            statements.append(statement.split()[0])
+
+    return statements
+
+
+def test_hn_top_stories_comments_batch(client):
+    """
+    Test /api/hackernews/topstories/comments endpoint adds the comments
+    of two stories with one SELECT, one INSERT and one UPDATE
+    of their comment counts
+    """
+    client.get('/api/hackernews/topstories/?pagenumber=1')
+    story_id = test_row['hn_id']
+    comments = [
+        {"story_id": story_id, "by": "bob", "text": f"comment {number}"}
+        for number in range(5)
+    ]
+    comments.append(
+        {"story_id": story_id + 1, "by": "bob", "text": "other story"}
+    )
+    statements = capture_statements(client)
+    request = client.post(
+        '/api/hackernews/topstories/comments',
+        data=json.dumps(comments),
+        content_type='application/json',
+    )
+    assert 201 == request.status_code
+    response = json.loads(request.data)
+    assert 6 == response['created']
+    assert [201] * 6 == [item['status'] for item in response['items']]
+    assert ['SELECT', 'INSERT', 'UPDATE'] == statements
+    request = client.get(f'/api/hackernews/topstories/{story_id}/comments')
+    response = json.loads(request.data)
+    assert 5 == len(response)
+    assert {f"comment {number}" for number in range(5)} == {
+        comment['text'] for comment in response
+    }
+    assert 'my_blog' == response[0]['origin']
+
+
+def test_hn_top_stories_comments_batch_statuses(client):
+    """
+    Test /api/hackernews/topstories/comments endpoint answers 207 with
+    the status of each comment when some of them are not added
+    """
+    story_id = test_row['hn_id']
+    comments = [
+        {"story_id": story_id, "by": "bob", "text": "first"},
+        {"story_id": story_id, "by": "bob"},
+        {"story_id": 1, "by": "bob", "text": "no story"},
+        "not a comment",
+        {"story_id": story_id, "by": "bob", "text": "last"},
+    ]
+    request = client.post(
+        '/api/hackernews/topstories/comments',
+        data=json.dumps(comments),
+        content_type='application/json',
+    )
+    assert 207 == request.status_code
+    response = json.loads(request.data)
+    items = response['items']
+    assert 2 == response['created']
+    assert [201, 400, 404, 400, 201] == [item['status'] for item in items]
+    assert [0, 1, 2, 3, 4] == [item['index'] for item in items]
+    assert {
+        'text': ['Missing data for required field.']
+    } == items[1]['errors']
+    assert 'Story not found' == items[2]['message']
+    assert items[0]['id'] < items[4]['id']
+
+
+def test_hn_top_stories_comments_batch_not_list(client):
+    """
+    Test /api/hackernews/topstories/comments endpoint with a body that
+    is not a list, an empty list and too many comments
+    """
+    client.application.config['COMMENTS_BATCH_MAX_ITEMS'] = 2
+    comment = {"story_id": test_row['hn_id'], "by": "bob", "text": "text"}
+    for body in (comment, [], [comment] * 3):
+        request = client.post(
+            '/api/hackernews/topstories/comments',
+            data=json.dumps(body),
+            content_type='application/json',
+        )
+        assert 400 == request.status_code
+        assert {
+            'message': 'Expected a list of 1 to 2 comments', 'code': 400,
+        } == json.loads(request.data)
+
+
+def test_hn_new_stories_comments_batch(client):
+    """
+    Test /api/hackernews/newstories/comments endpoint adds the comments
+    """
+    story_id = test_row['hn_id'] + 2
+    comments = [
+        {"story_id": story_id, "by": "bob", "text": f"comment {number}"}
+        for number in range(3)
+    ]
+    request = client.post(
+        '/api/hackernews/newstories/comments',
+        data=json.dumps(comments),
+        content_type='application/json',
+    )
+    assert 201 == request.status_code
+    request = client.get(f'/api/hackernews/newstories/{story_id}/comments')
+    assert 3 == len(json.loads(request.data))
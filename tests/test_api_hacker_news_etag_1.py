@@ -0,0 +1,119 @@
+import os
+import sys
+import pytest
+import json
+from sqlalchemy import event
+from tests.hacker_news_test_data import test_row
+sys.path.append(os.getcwd())
+from api.models import hacker_news # noqa
+from tests.query_budget import SAVEPOINTS # noqa
+
+
+# pytest -s -o log_cli=true -o log_level=DEBUG
+
+
+@pytest.fixture(scope='function')
+def app(app):
+    app.config['test_data'] = test_row
+    return app
+
+
+@pytest.fixture(scope='function')
+def seed_rows():
+    return [(hacker_news.HackerNewsTopStory, test_row)]
+
+
+def test_hn_etag_story_not_modified(client):
+    """
+    test GET /api/hackernews/topstories/<story_id> endpoint
+    answers 304 when If-None-Match holds its ETag
+    """
+    story_url = f"/api/hackernews/topstories/{test_row['hn_id']}"
+    response = client.get(story_url)
+    assert 200 == response.status_code
+    etag = response.headers['ETag']
+    assert response.headers['Last-Modified']
+    response = client.get(story_url, headers={'If-None-Match': etag})
+    assert 304 == response.status_code
+    assert b'' == response.data
+    assert etag == response.headers['ETag']
+    client.application.extensions['response_cache'].clear()
+    response = client.get(story_url, headers={'If-None-Match': etag})
+    assert 304 == response.status_code
+    assert etag == response.headers['ETag']
+
+
+def test_hn_etag_changes_after_comment_post(client):
+    """
+    test POST /api/hackernews/topstories/<story_id>/comments endpoint
+    changes the ETag of the story and list pages
+    """
+    story_url = f"/api/hackernews/topstories/{test_row['hn_id']}"
+    page_url = "/api/hackernews/topstories/?pagenumber=1"
+    story_etag = client.get(story_url).headers['ETag']
+    page_etag = client.get(page_url).headers['ETag']
+    assert story_etag != page_etag
+    response = client.post(
+        f"{story_url}/comments",
+        data=json.dumps({'by': 'test_user', 'text': 'test comment'}),
+        content_type='application/json',
+    )
+    assert 201 == response.status_code
+    response = client.get(story_url, headers={'If-None-Match': story_etag})
+    assert 200 == response.status_code
+    assert story_etag != response.headers['ETag']
+    response = client.get(page_url, headers={'If-None-Match': page_etag})
+    assert 200 == response.status_code
+    assert page_etag != response.headers['ETag']
+
+
+def test_hn_etag_page_version_scoped_to_page(client):
+    """
+    test GET /api/hackernews/topstories/ endpoint answers 304 by page
+    number and by cursor with only LIMIT queries over the page rows
+    """
+    for page_url in (
+        "/api/hackernews/topstories/?pagenumber=1",
+        "/api/hackernews/topstories/?cursor=",
+        "/api/hackernews/topstories/?pagenumber=1&include=comments",
+    ):
+        etag = client.get(page_url).headers['ETag']
+        client.application.extensions['response_cache'].clear()
+        statements = []
+        db_session = client.application.extensions['db_sessions'][
+            'hacker_news'
+        ]
+
+        @event.listens_for(db_session.get_bind(), 'before_cursor_execute')
+        def collect(conn, cursor, statement, parameters, context, many):
+            if not statement.startswith(SAVEPOINTS):
+                statements.append(statement)
+
+        response = client.get(page_url, headers={'If-None-Match': etag})
+        event.remove(db_session.get_bind(), 'before_cursor_execute', collect)
+        assert 304 == response.status_code
+        assert statements
+        for statement in statements:
+            assert 'LIMIT' in statement or 'IN (' in statement
+
+
+def test_hn_etag_not_found_has_no_etag(client):
+    """
+    test GET /api/hackernews/topstories/<story_id> endpoint
+    does not send an ETag with not found responses
+    """
+    response = client.get("/api/hackernews/topstories/1")
+    assert 404 == response.status_code
+    assert 'ETag' not in response.headers
+
+
+def test_api_body_etag_not_modified(client):
+    """
+    test GET /api/ endpoint gets an ETag of its body
+    and answers 304 when If-None-Match holds it
+    """
+    response = client.get("/api/")
+    assert 200 == response.status_code
+    etag = response.headers['ETag']
+    response = client.get("/api/", headers={'If-None-Match': etag})
+    assert 304 == response.status_code
@@ -0,0 +1,132 @@
+import os
+import sys
+import pytest
+import json
+from sqlalchemy import event
+from tests.hacker_news_test_data import test_row
+sys.path.append(os.getcwd())
+from tests.query_budget import SAVEPOINTS # noqa
+from api.models import hacker_news # noqa
+
+
+# pytest -s -o log_cli=true -o log_level=DEBUG
+
+
+@pytest.fixture(scope='function')
+def app(app):
+    app.config['test_data'] = test_row
+    return app
+
+
+@pytest.fixture(scope='function')
+def seed_rows():
+    return [(hacker_news.HackerNewsTopStory, test_row)]
+
+
+def capture_statements(client):
+    """
+    Returning the list that collects the SQL statements
+    sent to the hacker_news database
+    """
+    statements = []
+    db_session = client.application.extensions['db_sessions']['hacker_news']
+
+    @event.listens_for(db_session.get_bind(), 'before_cursor_execute')
+    def collect(conn, cursor, statement, parameters, context, executemany):
+        if not statement.startswith(SAVEPOINTS):
+            statements.append(statement)
+
+    return statements
+
+
+def test_hn_fields_list_page(client):
+    """
+    test GET /api/hackernews/topstories/?pagenumber=1&fields= endpoint
+    dumps and selects only the requested columns
+    """
+    client.get("/api/hackernews/topstories/?pagenumber=1")
+    statements = capture_statements(client)
+    response = client.get(
+        "/api/hackernews/topstories/?pagenumber=1&fields=title,hn_id"
+    )
+    assert 200 == response.status_code
+    items = json.loads(response.data)['items']
+    assert [{'title': test_row['title'], 'hn_id': test_row['hn_id']}] == items
+    story_selects = [
+        statement for statement in statements
+        if 'FROM hacker_news_top_story ' in statement
+    ]
+    assert story_selects
+    for statement in story_selects:
+        assert 'hacker_news_top_story.kids' not in statement
+        assert 'hacker_news_top_story.text' not in statement
+    assert not [
+        statement for statement in statements
+        if 'GROUP BY hacker_news_top_story_comment.parent' in statement
+    ]
+
+
+def test_hn_fields_comments_count(client):
+    """
+    test GET /api/hackernews/topstories/?cursor=&fields= endpoint
+    adds comments_count when it is requested
+    """
+    response = client.get(
+        "/api/hackernews/topstories/?cursor=&fields=title,comments_count"
+    )
+    assert 200 == response.status_code
+    items = json.loads(response.data)['items']
+    assert [{'title': test_row['title'], 'comments_count': 0}] == items
+
+
+def test_hn_fields_story(client):
+    """
+    test GET /api/hackernews/topstories/<story_id>?fields= endpoint
+    dumps only the requested fields, with comments when requested
+    """
+    story_url = f"/api/hackernews/topstories/{test_row['hn_id']}"
+    response = client.get(f"{story_url}?fields=url,score")
+    assert 200 == response.status_code
+    assert {
+        'url': test_row['url'], 'score': test_row['score'],
+    } == json.loads(response.data)
+    response = client.get(f"{story_url}?fields=score,comments")
+    assert 200 == response.status_code
+    assert {
+        'score': test_row['score'], 'comments': [],
+    } == json.loads(response.data)
+
+
+def test_hn_fields_page_count(client):
+    """
+    test GET /api/hackernews/topstories/?pagenumber=2&fields= endpoint
+    counts the stories of a projected query
+    """
+    response = client.get(
+        "/api/hackernews/topstories/?pagenumber=2&fields=title"
+    )
+    assert 404 == response.status_code
+    assert {
+        'message': 'Pagination page not found', 'code': 404,
+    } == json.loads(response.data)
+
+
+def test_hn_fields_unknown(client):
+    """
+    test GET /api/hackernews/topstories/?pagenumber=1&fields= endpoint
+    with unknown and empty fields
+    """
+    response = client.get(
+        "/api/hackernews/topstories/?pagenumber=1&fields=title,password"
+    )
+    assert 400 == response.status_code
+    assert {
+        'fields': ['Unknown field password.'],
+    } == json.loads(response.data)
+    response = client.get(
+        "/api/hackernews/topstories/?pagenumber=1&fields=,"
+    )
+    assert 400 == response.status_code
+    assert {
+        'fields': ['Field may not be empty.'],
+    } == json.loads(response.data)
@@ -2,13 +2,8 @@ import os
 import sys
 import pytest
 import json
-import logging
-from flask import g
-from sqlalchemy import create_engine
-from sqlalchemy.exc import ProgrammingError, OperationalError
 from tests.hacker_news_test_data import test_row
 sys.path.append(os.getcwd())
-from flask_backend import create_app # noqa
 from api.models import hacker_news # noqa
 
 
@@ -16,105 +11,14 @@ from api.models import hacker_news # noqa
 
 
 @pytest.fixture(scope='function')
-def client(request):
-    app = create_app(config_name="testing")
+def app(app):
     app.config['test_data'] = test_row
-    with app.test_client() as client:
-        logging.debug('Starting the test.')
-        default_postgres_db_uri = app.config['POSTGRES_DATABASE_URI']
-        test_db_name = list(
-            app.config['SQLALCHEMY_BINDS'].values()
-        )[1].split('/')[-1]
-        create_db(
-            default_postgres_db_uri=default_postgres_db_uri,
-            test_db_name=test_db_name,
-        )
-
-        @app.before_request
-        def create_tables():
-            engine = g.hacker_news_session.get_bind()
-            hacker_news.Base.metadata.create_all(engine)
-            db_session = g.hacker_news_session
-            db_session.add(
-                hacker_news.HackerNewsNewStory(**test_row)
-            )
-            db_session.commit()
-
-        yield client
-
-        @app.teardown_appcontext
-        def shutdown_session_and_delete_db(exception=None):
-            logging.debug('Shutting down the test.')
-            if g.flask_backend_session:
-                g.flask_backend_session.remove()
-                engine = g.flask_backend_session.get_bind()
-                engine.dispose()
-            if g.hacker_news_session:
-                g.hacker_news_session.remove()
-                engine = g.hacker_news_session.get_bind()
-                engine.dispose()
-            delete_db(
-                default_postgres_db_uri=default_postgres_db_uri,
-                test_db_name=test_db_name,
-            )
-
-
-def create_db(default_postgres_db_uri, test_db_name):
-    default_engine = create_engine(default_postgres_db_uri)
-    default_engine = default_engine.execution_options(
-        isolation_level="AUTOCOMMIT"
-    )
-    conn = default_engine.connect()
-    # Try to delete Database
-    try:
-        conn.execute(
-            f"DROP DATABASE "
-            f"{test_db_name};"
-        )
-    except ProgrammingError as err:
-        logging.debug(err)
-        conn.execute("ROLLBACK")
-    except OperationalError as err:
-        logging.debug(err)
-        conn.execute("ROLLBACK")
-    # Try to create Database
-    try:
-        conn.execute(
-            f"CREATE DATABASE "
-            f"{test_db_name} "
-            f"ENCODING 'utf8' TEMPLATE template1"
-        )
-    except ProgrammingError as err:
-        logging.debug(err)
-        conn.execute("ROLLBACK")
-    except OperationalError as err:
-        logging.debug(err)
-        conn.execute("ROLLBACK")
-    conn.close()
-    default_engine.dispose()
-    return
-
-
-def delete_db(default_postgres_db_uri, test_db_name):
-    default_engine = create_engine(default_postgres_db_uri)
-    default_engine = default_engine.execution_options(
-        isolation_level="AUTOCOMMIT"
-    )
-    conn = default_engine.connect()
-    try:
-        conn.execute(
-            f"DROP DATABASE "
-            f"{test_db_name};"
-        )
-    except ProgrammingError as err:
-        logging.debug(err)
-        conn.execute("ROLLBACK")
-    except OperationalError as err:
-        logging.debug(err)
-        conn.execute("ROLLBACK")
-    conn.close()
-    default_engine.dispose()
-    return
+    return app
+
+
+@pytest.fixture(scope='function')
+def seed_rows():
+    return [(hacker_news.HackerNewsNewStory, test_row)]
 
 
 def test_hn_new_stories_get_no_pagenumber(client):
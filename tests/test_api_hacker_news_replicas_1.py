@@ -0,0 +1,116 @@
+import os
+import sys
+import pytest
+import json
+import logging
+from sqlalchemy import create_engine
+from tests.hacker_news_test_data import test_row
+from tests.conftest import create_db, delete_db
+sys.path.append(os.getcwd())
+from flask_backend import create_app # noqa
+from config import config # noqa
+from db.routing import ReplicaSet, session_engines # noqa
+from api.models import hacker_news # noqa
+
+
+# pytest -s -o log_cli=true -o log_level=DEBUG
+
+
+@pytest.fixture(scope='module')
+def replica_db_uri(databases):
+    testing_config = config['testing']
+    default_postgres_db_uri = testing_config.POSTGRES_DATABASE_URI
+    primary_db_uri = testing_config.SQLALCHEMY_BINDS['hacker_news']
+    replica_db_uri = f"{primary_db_uri}_replica"
+    create_db(
+        default_postgres_db_uri=default_postgres_db_uri,
+        test_db_name=replica_db_uri.split('/')[-1],
+    )
+    engine = create_engine(replica_db_uri)
+    hacker_news.Base.metadata.create_all(engine)
+    with engine.begin() as conn:
+        conn.execute(
+            hacker_news.HackerNewsTopStory.__table__.insert(),
+            dict(test_row, title='replica story'),
+        )
+    engine.dispose()
+    yield replica_db_uri
+    delete_db(
+        default_postgres_db_uri=default_postgres_db_uri,
+        test_db_name=replica_db_uri.split('/')[-1],
+    )
+
+
+@pytest.fixture(scope='function')
+def client(request, transactions, replica_db_uri):
+    app = transactions.bind(create_app(
+        config_name="testing",
+        replica_uris={"hacker_news": [replica_db_uri]},
+    ))
+    db_session = app.extensions['db_sessions']['hacker_news']
+    db_session.execute(
+        hacker_news.HackerNewsTopStory.__table__.insert(),
+        dict(test_row, title='primary story'),
+    )
+    db_session.commit()
+    db_session.remove()
+    with app.test_client() as client:
+        logging.debug('Starting the test.')
+        yield client
+    logging.debug('Shutting down the test.')
+    for db_session in app.extensions['db_sessions'].values():
+        _, replicas = session_engines(db_session)
+        for engine in replicas:
+            engine.dispose()
+
+
+def test_hn_replica_get_reads_from_replica(client):
+    """
+    test GET /api/hackernews/topstories/<story_id> endpoint
+    reads from the replica
+    """
+    response = client.get(f"/api/hackernews/topstories/{test_row['hn_id']}")
+    response = json.loads(response.data)
+    assert 'replica story' == response['title']
+
+
+def test_hn_replica_read_your_writes(client):
+    """
+    test GET /api/hackernews/topstories/<story_id> endpoint
+    reads from the primary after a POST by the same client
+    """
+    response = client.post(
+        f"/api/hackernews/topstories/{test_row['hn_id']}/comments",
+        data=json.dumps({'by': 'test_user', 'text': 'test comment'}),
+        content_type='application/json',
+    )
+    assert 201 == response.status_code
+    response = client.get(
+        f"/api/hackernews/topstories/{test_row['hn_id']}?include=comments"
+    )
+    response = json.loads(response.data)
+    assert 'primary story' == response['title']
+    assert 'test comment' == response['comments'][0]['text']
+
+
+def test_hn_replica_least_connections():
+    """
+    test ReplicaSet picks the replica with the fewest checked out
+    connections
+    """
+    class FakePool(object):
+        def __init__(self, checked_out):
+            self.checked_out = checked_out
+
+        def checkedout(self):
+            return self.checked_out
+
+    class FakeEngine(object):
+        def __init__(self, checked_out):
+            self.pool = FakePool(checked_out)
+
+    busy, idle = FakeEngine(3), FakeEngine(1)
+    replicas = ReplicaSet([busy, idle], "least_connections")
+    assert idle is replicas.pick()
+    replicas = ReplicaSet([busy, idle], "round_robin")
+    assert [busy, idle, busy] == [replicas.pick() for _ in range(3)]
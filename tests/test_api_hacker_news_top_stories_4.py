@@ -0,0 +1,156 @@
+import os
+import sys
+import pytest
+import json
+from tests.hacker_news_test_data import test_row
+from datetime import datetime, timedelta
+sys.path.append(os.getcwd())
+from api.models import hacker_news # noqa
+
+
+# pytest -s -o log_cli=true -o log_level=DEBUG
+
+
+@pytest.fixture(scope='function')
+def app(app):
+    app.config['test_data'] = test_row
+    return app
+
+
+@pytest.fixture(scope='function')
+def seed_rows():
+    return [
+        (hacker_news.HackerNewsTopStory, row)
+        for row in generate_test_rows()
+    ]
+
+
+def generate_test_rows(count=65):
+    """
+    return test_row copies with unique ids and parsed_time
+    """
+    rows = []
+    parsed_time = datetime(2020, 9, 28, 8, 20, 23)
+    for number in range(count):
+        row = dict(test_row)
+        row['id'] = number + 1
+        row['hn_id'] = test_row['hn_id'] + number
+        row['parsed_time'] = parsed_time + timedelta(minutes=number)
+        rows.append(row)
+    return rows
+
+
+def test_hn_top_stories_cursor_first_page(client):
+    """
+    test /api/hackernews/topstories/?cursor= endpoint
+    with an empty cursor
+    """
+    response = client.get("/api/hackernews/topstories/?cursor=",)
+    response = json.loads(response.data)
+    assert 30 == len(response['items'])
+    assert test_row['hn_id'] + 64 == response['items'][0]['hn_id']
+    assert response['has_next'] is True
+    assert response['has_previous'] is False
+    assert response['previous_cursor'] is None
+    assert 'total' not in response
+
+
+def test_hn_top_stories_cursor_walk_forward_and_back(client):
+    """
+    test /api/hackernews/topstories/?cursor=C endpoint
+    following next_cursor to the last page and previous_cursor back
+    """
+    first_page = json.loads(
+        client.get("/api/hackernews/topstories/?cursor=").data
+    )
+    second_page = json.loads(
+        client.get(
+            f"/api/hackernews/topstories/"
+            f"?cursor={first_page['next_cursor']}"
+        ).data
+    )
+    third_page = json.loads(
+        client.get(
+            f"/api/hackernews/topstories/"
+            f"?cursor={second_page['next_cursor']}"
+        ).data
+    )
+    assert test_row['hn_id'] + 34 == second_page['items'][0]['hn_id']
+    assert 5 == len(third_page['items'])
+    assert third_page['has_next'] is False
+    assert third_page['next_cursor'] is None
+    assert test_row['hn_id'] == third_page['items'][-1]['hn_id']
+    back_page = json.loads(
+        client.get(
+            f"/api/hackernews/topstories/"
+            f"?cursor={third_page['previous_cursor']}"
+        ).data
+    )
+    assert second_page['items'] == back_page['items']
+    assert back_page['has_previous'] is True
+    assert back_page['has_next'] is True
+
+
+def test_hn_top_stories_cursor_skips_null_parsed_time(client):
+    """
+    test /api/hackernews/topstories/?cursor=C endpoint
+    walks every page past a story without parsed_time
+    """
+    client.get("/api/hackernews/topstories/?cursor=")
+    db_session = client.application.extensions['db_sessions']['hacker_news']
+    db_session.add(
+        hacker_news.HackerNewsTopStory(
+            **dict(test_row, id=66, hn_id=1, parsed_time=None)
+        )
+    )
+    db_session.commit()
+    db_session.remove()
+    client.application.extensions['response_cache'].clear()
+    cursor = ""
+    hn_ids = []
+    for _ in range(3):
+        response = client.get(f"/api/hackernews/topstories/?cursor={cursor}")
+        assert 200 == response.status_code
+        page = json.loads(response.data)
+        hn_ids.extend(item['hn_id'] for item in page['items'])
+        cursor = page['next_cursor']
+    assert cursor is None
+    assert 65 == len(hn_ids)
+    assert 1 not in hn_ids
+
+
+def test_hn_top_stories_cursor_not_valid(client):
+    """
+    test /api/hackernews/topstories/?cursor=C endpoint
+    with a malformed cursor
+    """
+    response = client.get("/api/hackernews/topstories/?cursor=abc",)
+    assert 400 == response.status_code
+    response = json.loads(response.data)
+    assert {"cursor": ["Not a valid cursor."]} == response
+
+
+def test_hn_top_stories_cursor_pagenumber_still_valid(client):
+    """
+    test /api/hackernews/topstories/?pagenumber=N endpoint
+    keeps the offset pagination when no cursor is given
+    """
+    response = client.get("/api/hackernews/topstories/?pagenumber=3",)
+    response = json.loads(response.data)
+    assert 5 == len(response['items'])
+    assert 65 == response['total']
+
+
+def test_hn_top_stories_pagenumber_full_page(client):
+    """
+    test /api/hackernews/topstories/?pagenumber=N endpoint
+    with a full page in the middle of the stories
+    """
+    response = client.get("/api/hackernews/topstories/?pagenumber=2",)
+    response = json.loads(response.data)
+    assert 30 == len(response['items'])
+    assert test_row['hn_id'] + 34 == response['items'][0]['hn_id']
+    assert 65 == response['total']
+    assert 3 == response['pages']
+    assert 3 == response['next_page']
+    assert 1 == response['previous_page']
@@ -0,0 +1,112 @@
+import os
+import sys
+import pytest
+import json
+from tests.hacker_news_test_data import test_row, test_comment_row
+from datetime import datetime, timedelta
+sys.path.append(os.getcwd())
+from api.models import hacker_news # noqa
+
+
+# pytest -s -o log_cli=true -o log_level=DEBUG
+
+
+@pytest.fixture(scope='function')
+def app(app):
+    app.config['test_data'] = test_row
+    app.config['test_comment_data'] = test_comment_row
+    return app
+
+
+@pytest.fixture(scope='function')
+def seed_rows():
+    comment_rows = generate_test_comment_rows()
+    story_row = dict(test_row, local_comment_count=len(comment_rows))
+    return [(hacker_news.HackerNewsTopStory, story_row)] + [
+        (hacker_news.HackerNewsTopStoryComment, row)
+        for row in comment_rows
+    ]
+
+
+def generate_test_comment_rows(count=3):
+    """
+    return test_comment_row copies with unique ids and parsed_time
+    """
+    rows = []
+    parsed_time = datetime(2020, 9, 28, 14, 18, 18)
+    for number in range(count):
+        row = dict(test_comment_row)
+        row['id'] = number + 1
+        row['hn_id'] = int(test_comment_row['hn_id']) + number
+        row['parsed_time'] = parsed_time + timedelta(minutes=number)
+        rows.append(row)
+    return rows
+
+
+def test_hn_top_stories_page_comments_count(client):
+    """
+    test /api/hackernews/topstories/?pagenumber=N endpoint
+    returns comments_count and no comments by default
+    """
+    response = client.get("/api/hackernews/topstories/?pagenumber=1",)
+    response = json.loads(response.data)
+    assert 3 == response['items'][0]['comments_count']
+    assert 'comments' not in response['items'][0]
+
+
+def test_hn_top_stories_page_include_comments(client):
+    """
+    test /api/hackernews/topstories/?pagenumber=N endpoint
+    with ?include=comments&comments_limit=N
+    """
+    response = client.get(
+        "/api/hackernews/topstories/"
+        "?pagenumber=1&include=comments&comments_limit=2",
+    )
+    response = json.loads(response.data)
+    comments = response['items'][0]['comments']
+    assert 2 == len(comments)
+    assert str(int(test_comment_row['hn_id']) + 2) == comments[0]['hn_id']
+    assert 3 == response['items'][0]['comments_count']
+
+
+def test_hn_top_stories_page_include_not_valid(client):
+    """
+    test /api/hackernews/topstories/?pagenumber=N endpoint
+    with not valid ?include= and ?comments_limit= values
+    """
+    response = client.get(
+        "/api/hackernews/topstories/?pagenumber=1&include=kids",
+    )
+    assert 400 == response.status_code
+    response = json.loads(response.data)
+    assert {"include": ["Must be one of: comments."]} == response
+    response = client.get(
+        "/api/hackernews/topstories/?pagenumber=1&comments_limit=-1",
+    )
+    assert 400 == response.status_code
+
+
+def test_hn_top_stories_story_first_comments(client):
+    """
+    test /api/hackernews/topstories/<story_id> endpoint
+    returns the first STORY_COMMENTS_LIMIT comments
+    """
+    client.application.config['STORY_COMMENTS_LIMIT'] = 1
+    response = client.get(f"/api/hackernews/topstories/{test_row['hn_id']}",)
+    response = json.loads(response.data)
+    assert 1 == len(response['comments'])
+    assert 3 == response['comments_count']
+
+
+def test_hn_top_stories_story_include_all_comments(client):
+    """
+    test /api/hackernews/topstories/<story_id> endpoint
+    with ?include=comments and no comments_limit
+    """
+    client.application.config['STORY_COMMENTS_LIMIT'] = 1
+    response = client.get(
+        f"/api/hackernews/topstories/{test_row['hn_id']}?include=comments",
+    )
+    response = json.loads(response.data)
+    assert 3 == len(response['comments'])
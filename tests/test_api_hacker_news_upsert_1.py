@@ -0,0 +1,147 @@
+import os
+import sys
+import pytest
+import json
+from tests.hacker_news_test_data import test_row
+sys.path.append(os.getcwd())
+from api.models import hacker_news # noqa
+from api.ingest import upsert_stories # noqa
+
+
+# pytest -s -o log_cli=true -o log_level=DEBUG
+
+
+@pytest.fixture(scope='function')
+def app(app):
+    app.config['test_data'] = test_row
+    app.config['INGEST_API_TOKEN'] = 'parser-token'
+    return app
+
+
+def generate_stories(first_hn_id, count, score=1):
+    """
+    return HN stories as the parser sends them
+    """
+    return [
+        {
+            "hn_id": first_hn_id + number,
+            "by": "bob",
+            "type": "story",
+            "time": test_row['time'],
+            "title": f"story {number}",
+            "url": "https://example.com",
+            "score": score,
+            "descendants": 0,
+            "kids": [],
+            "origin": "news.ycombinator.com",
+        }
+        for number in range(count)
+    ]
+
+
+def upsert(client, stories, token='parser-token'):
+    return client.post(
+        '/api/hackernews/topstories/upsert',
+        data=json.dumps(stories),
+        content_type='application/json',
+        headers={'Authorization': f'Bearer {token}'},
+    )
+
+
+def test_hn_top_stories_upsert(client):
+    """
+    Test /api/hackernews/topstories/upsert endpoint inserts new stories
+    and refreshes the score of the stored ones
+    """
+    request = upsert(client, generate_stories(100, 3))
+    assert 200 == request.status_code
+    assert {
+        'message': 'Stories upserted', 'code': 200,
+        'inserted': 3, 'updated': 0,
+    } == json.loads(request.data)
+    stories = generate_stories(101, 3, score=50)
+    del stories[0]['title']
+    request = upsert(client, stories)
+    response = json.loads(request.data)
+    assert 1 == response['inserted']
+    assert 2 == response['updated']
+    request = client.get('/api/hackernews/topstories/101')
+    response = json.loads(request.data)
+    assert 50 == response['score']
+    assert 'story 1' == response['title']
+    request = client.get('/api/hackernews/topstories/?pagenumber=1')
+    assert 4 == json.loads(request.data)['total']
+
+
+def test_hn_top_stories_upsert_refreshes_cached_list(client):
+    """
+    Test /api/hackernews/topstories/upsert endpoint drops the cached
+    list pages of the upserted stories
+    """
+    upsert(client, generate_stories(100, 2))
+    request = client.get('/api/hackernews/topstories/?pagenumber=1')
+    assert 2 == json.loads(request.data)['total']
+    upsert(client, generate_stories(102, 1))
+    request = client.get('/api/hackernews/topstories/?pagenumber=1')
+    assert 3 == json.loads(request.data)['total']
+
+
+def test_hn_top_stories_upsert_not_authorized(client):
+    """
+    Test /api/hackernews/topstories/upsert endpoint without the token,
+    with a wrong token and with no token configured
+    """
+    request = client.post(
+        '/api/hackernews/topstories/upsert',
+        data=json.dumps(generate_stories(100, 1)),
+        content_type='application/json',
+    )
+    assert 401 == request.status_code
+    assert 'Bearer' == request.headers['WWW-Authenticate']
+    request = upsert(client, generate_stories(100, 1), token='wrong')
+    assert 401 == request.status_code
+    client.application.config['INGEST_API_TOKEN'] = None
+    request = upsert(client, generate_stories(100, 1))
+    assert 404 == request.status_code
+
+
+def test_hn_top_stories_upsert_not_valid(client):
+    """
+    Test /api/hackernews/topstories/upsert endpoint rejects the whole
+    batch when a story is not valid
+    """
+    stories = generate_stories(100, 2)
+    del stories[1]['hn_id']
+    request = upsert(client, stories)
+    assert 400 == request.status_code
+    assert {
+        '1': {'hn_id': ['Missing data for required field.']}
+    } == json.loads(request.data)
+    request = upsert(client, {})
+    assert 400 == request.status_code
+    request = client.get('/api/hackernews/topstories/?pagenumber=1')
+    assert 404 == request.status_code
+
+
+def test_upsert_stories_chunks(client):
+    """
+    test upsert_stories upserts in chunks and keeps the last
+    of the stories with the same hn_id
+    """
+    client.get('/api/hackernews/topstories/?pagenumber=1')
+    db_session = client.application.extensions['db_sessions']['hacker_news']
+    stories = generate_stories(100, 5)
+    stories.append(dict(stories[0], score=7))
+    counts = upsert_stories(
+        db_session, hacker_news.HackerNewsTopStory, stories, chunk_size=2
+    )
+    assert {'inserted': 5, 'updated': 0} == counts
+    counts = upsert_stories(
+        db_session, hacker_news.HackerNewsTopStory, stories, chunk_size=2
+    )
+    assert {'inserted': 0, 'updated': 5} == counts
+    story = db_session.query(hacker_news.HackerNewsTopStory).filter_by(
+        hn_id=100
+    ).one()
+    assert 7 == story.score
+    db_session.remove()
@@ -0,0 +1,156 @@
+import os
+import sys
+import pytest
+import json
+from datetime import datetime
+from flask import Flask, jsonify
+from marshmallow import Schema, fields, post_dump
+from tests.hacker_news_test_data import test_row
+sys.path.append(os.getcwd())
+from api.models import hacker_news # noqa
+from api.models.blog_news import BlogNewsStory, BlogNewsStoryComment # noqa
+from api.models.user import UserModel # noqa
+from api.schemas.hacker_news import ( # noqa
+    HackerNewsStorySchema,
+    HackerNewsCommentSchema,
+)
+from api.schemas.blog_news import ( # noqa
+    BlogNewsStorySchema,
+    BlogNewsCommentSchema,
+)
+from api.schemas.user import UserSchema # noqa
+from api.serialization import compile_schema, json_response # noqa
+from config import config # noqa
+
+
+# pytest -s -o log_cli=true -o log_level=DEBUG
+
+
+@pytest.fixture(scope='function')
+def app(app):
+    app.config['test_data'] = test_row
+    return app
+
+
+@pytest.fixture(scope='function')
+def seed_rows():
+    return [(hacker_news.HackerNewsTopStory, test_row)]
+
+
+def make_comment(**kwargs):
+    comment = {
+        'id': 7,
+        'hn_id': 24611767,
+        'by': 'test_user',
+        'text': 'na\u00efve \u2713 "quoted" \x7f\x1f\n',
+        'dead': False,
+        'deleted': None,
+        'kids': [1, 2],
+        'parent': test_row['hn_id'],
+        'time': 1601253055,
+        'parsed_time': datetime(2020, 9, 28, 8, 20, 23, 918000),
+        'updated_time': None,
+    }
+    comment.update(kwargs)
+    return hacker_news.HackerNewsTopStoryComment(**comment)
+
+
+def test_compiled_schema_matches_marshmallow():
+    """
+    test compile_schema dumps the same data as schema.dump
+    for the story, comment and user schemas
+    """
+    story_row = dict(test_row)
+    story_row['parsed_time'] = datetime(2020, 9, 28, 8, 20, 23, 918000)
+    story = hacker_news.HackerNewsTopStory(**story_row)
+    story.comments = [make_comment(), make_comment(id=8, text=None)]
+    schemas = [
+        (HackerNewsStorySchema(), story),
+        (HackerNewsStorySchema(many=True, exclude=['comments']), [story]),
+        (HackerNewsCommentSchema(many=True), story.comments),
+        (HackerNewsStorySchema(many=True), story.comments),
+        (
+            BlogNewsStorySchema(),
+            BlogNewsStory(
+                id=1, by='bob', title='title', kids=None,
+                comments=[BlogNewsStoryComment(id=2, by='bob', dead=True)],
+            ),
+        ),
+        (BlogNewsCommentSchema(many=True), []),
+        (
+            UserSchema(exclude=['password']),
+            UserModel(
+                id=1, username='bob', email_address='bob@example.com',
+                is_activated=False,
+            ),
+        ),
+    ]
+    for schema, obj in schemas:
+        assert schema.dump(obj) == compile_schema(schema)(obj)
+
+
+def test_compile_schema_with_dump_processors():
+    """
+    test compile_schema refuses schemas with dump processors
+    """
+    class ProcessedSchema(Schema):
+        name = fields.Str()
+
+        @post_dump
+        def upper(self, data, **kwargs):
+            return data
+
+    with pytest.raises(ValueError):
+        compile_schema(ProcessedSchema())
+
+
+def test_json_response_matches_jsonify():
+    """
+    test json_response encodes the same bytes as jsonify
+    """
+    app = Flask(__name__)
+    app.config.from_object(config['testing'])
+    app.config['FAST_JSON_ENDPOINTS'] = ['*']
+    payloads = [
+        {'b': 1, 'a': [None, True, False, 'text'], 'c': {'z': 1, 'y': 2}},
+        [{'text': 'control \x1f\x00 \b\f\n\r\t "\\ /'}],
+        {'text': 'na\u00efve \u2713 \u2028 \x7f'},
+        {'total': 2 ** 40, 'items': []},
+    ]
+    for as_ascii in (True, False):
+        app.config['JSON_AS_ASCII'] = as_ascii
+        with app.test_request_context('/'):
+            for payload in payloads:
+                response = json_response(payload, 201)
+                assert 201 == response.status_code
+                assert response.mimetype == 'application/json'
+                assert jsonify(payload).get_data() == response.get_data()
+
+
+def test_fast_json_story_matches_default(client):
+    """
+    test GET /api/hackernews/topstories/<story_id> endpoint returns
+    the same body with FAST_JSON_ENDPOINTS on and off
+    """
+    story_url = f"/api/hackernews/topstories/{test_row['hn_id']}"
+    response = client.post(
+        f"{story_url}/comments",
+        data=json.dumps({'by': 'test_user', 'text': 'na\u00efve \u2713'}),
+        content_type='application/json',
+    )
+    assert 201 == response.status_code
+    urls = [
+        story_url,
+        f"{story_url}/comments",
+        "/api/hackernews/topstories/?pagenumber=1&include=comments",
+    ]
+    app = client.application
+    for url in urls:
+        app.extensions['response_cache'].clear()
+        app.config['FAST_JSON_ENDPOINTS'] = []
+        default_response = client.get(url)
+        app.extensions['response_cache'].clear()
+        app.config['FAST_JSON_ENDPOINTS'] = ['*']
+        fast_response = client.get(url)
+        assert 200 == fast_response.status_code
+        assert default_response.data == fast_response.data
@@ -0,0 +1,128 @@
+import os
+import sys
+import json
+import pytest
+from sqlalchemy import event
+sys.path.append(os.getcwd())
+from api.models import user # noqa
+from api.cache import SharedCache # noqa
+from api.user_cache import UserCache # noqa
+from tests.fake_redis import FakeRedis # noqa
+
+# pytest -s -o log_cli=true -o log_level=DEBUG
+
+INTERNAL_API_TOKEN = "test-internal-token"
+
+
+@pytest.fixture(scope='function')
+def app(app):
+    app.config['INTERNAL_API_TOKEN'] = INTERNAL_API_TOKEN
+    return app
+
+
+def capture_statements(client):
+    """
+    Returning the list that collects the SQL statements
+    sent to the users table
+    """
+    statements = []
+    db_session = client.application.extensions['db_sessions']['flask_backend']
+
+    @event.listens_for(db_session.get_bind(), 'before_cursor_execute')
+    def collect(conn, cursor, statement, parameters, context, executemany):
+        verb = statement.split()[0]
+        if verb in ("SELECT", "INSERT") and "users" in statement:
+            statements.append(verb)
+
+    return statements
+
+
+def register(client, username, email_address):
+    return client.post(
+        "/api/users",
+        data=json.dumps(
+            {
+                "username": username,
+                "password": "123456",
+                "email_address": email_address,
+            }
+        ),
+        content_type="application/json",
+    )
+
+
+def test_user_cache_get(client):
+    """
+    Test /api/users/<username> endpoint serves the user without its
+    password, and reads the database only on the first request
+    """
+    register(client, "bob_2", "bob_2@gmail.com")
+    statements = capture_statements(client)
+    request = client.get("/api/users/bob_2")
+    assert 200 == request.status_code
+    first = json.loads(request.data)
+    assert "password" not in first
+    assert "bob_2@gmail.com" == first["email_address"]
+    assert ["SELECT"] == statements
+    request = client.get("/api/users/bob_2")
+    assert first == json.loads(request.data)
+    assert ["SELECT"] == statements
+    request = client.get(
+        "/internal/user_cache",
+        headers={"Authorization": f"Bearer {INTERNAL_API_TOKEN}"},
+    )
+    assert {
+        "enabled": True, "hits": 1, "misses": 1,
+    } == json.loads(request.data)
+
+
+def test_user_cache_invalidated_on_delete(client):
+    """
+    Test /api/users/<username> endpoint answers 404 after
+    the cached user is deleted
+    """
+    register(client, "bob_2", "bob_2@gmail.com")
+    assert 200 == client.get("/api/users/bob_2").status_code
+    request = client.delete("/api/users/bob_2")
+    assert 200 == request.status_code
+    request = client.get("/api/users/bob_2")
+    assert 404 == request.status_code
+
+
+def test_user_cache_invalidated_on_patch(client):
+    """
+    Test PATCH /api/users/<username> endpoint drops the cached user
+    """
+    register(client, "bob_2", "bob_2@gmail.com")
+    client.get("/api/users/bob_2")
+    cache = client.application.extensions["user_cache"]
+    assert cache.get("username", "bob_2") is not None
+    request = client.patch(
+        "/api/users/bob_2",
+        data=json.dumps({"password": "654321"}),
+        content_type="application/json",
+    )
+    assert 200 == request.status_code
+    assert cache.get("username", "bob_2") is None
+
+
+def test_user_cache_shared_backend():
+    """
+    test UserCache finds a user by username in the shared backend,
+    keeps no user_uuid key, and invalidate drops the user
+    """
+    cache = UserCache(SharedCache(FakeRedis(), 60, "flask_backend:users:"))
+    user_row = {
+        "id": 1,
+        "username": "bob_2",
+        "user_uuid": "uuid-1",
+        "email_address": "bob_2@gmail.com",
+        "is_activated": False,
+        "origin": "my_blog",
+    }
+    cache.set(user_row)
+    assert user_row == cache.get("username", "bob_2")
+    assert cache.get("user_uuid", "uuid-1") is None
+    cache.invalidate(1)
+    assert cache.get("username", "bob_2") is None
+    assert {"hits": 1, "misses": 2} == cache.stats()
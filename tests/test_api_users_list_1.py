@@ -0,0 +1,87 @@
+import os
+import sys
+import json
+sys.path.append(os.getcwd())
+from api.models import user # noqa
+
+# pytest -s -o log_cli=true -o log_level=DEBUG
+
+
+def add_users(client, count):
+    """
+    Adding count users to the database, bob_0 to bob_<count - 1>
+    """
+    client.get("/api/users")
+    db_session = client.application.extensions['db_sessions']['flask_backend']
+    for number in range(count):
+        db_session.add(
+            user.UserModel(
+                username=f"bob_{number}",
+                password="not a hash",
+                user_uuid=f"uuid-{number}",
+                email_address=f"bob_{number}@gmail.com",
+                origin="my_blog",
+            )
+        )
+    db_session.commit()
+    db_session.remove()
+
+
+def test_users_cursor_pages(client):
+    """
+    Test /api/users endpoint pages the users by cursor, newest first
+    """
+    add_users(client, 35)
+    request = client.get("/api/users")
+    assert 200 == request.status_code
+    response = json.loads(request.data)
+    assert 30 == len(response["items"])
+    assert "bob_34" == response["items"][0]["username"]
+    assert "password" not in response["items"][0]
+    assert response["has_next"]
+    assert not response["has_previous"]
+    request = client.get(
+        f"/api/users?cursor={response['next_cursor']}"
+    )
+    response = json.loads(request.data)
+    assert [
+        f"bob_{number}" for number in range(4, -1, -1)
+    ] == [item["username"] for item in response["items"]]
+    assert not response["has_next"]
+    assert response["has_previous"]
+    request = client.get(
+        f"/api/users?cursor={response['previous_cursor']}"
+    )
+    response = json.loads(request.data)
+    assert "bob_34" == response["items"][0]["username"]
+
+
+def test_users_bad_arguments(client):
+    """
+    Test /api/users endpoint with a malformed cursor and format
+    """
+    request = client.get("/api/users?cursor=abc")
+    assert 400 == request.status_code
+    assert {"cursor": ["Not a valid cursor."]} == json.loads(request.data)
+    request = client.get("/api/users?format=csv")
+    assert 400 == request.status_code
+    assert "format" in json.loads(request.data)
+
+
+def test_users_ndjson_export(client):
+    """
+    Test /api/users?format=ndjson endpoint streams every user
+    as a JSON line, oldest first
+    """
+    add_users(client, 35)
+    request = client.get("/api/users?format=ndjson")
+    assert 200 == request.status_code
+    assert "application/x-ndjson" == request.mimetype
+    assert "ETag" not in request.headers
+    lines = request.data.decode().splitlines()
+    assert 35 == len(lines)
+    users = [json.loads(line) for line in lines]
+    assert [f"bob_{number}" for number in range(35)] == [
+        item["username"] for item in users
+    ]
+    assert "password" not in users[0]
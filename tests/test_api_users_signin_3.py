@@ -0,0 +1,135 @@
+import os
+import sys
+import pytest
+import json
+from faker import Faker
+import random
+sys.path.append(os.getcwd())
+from api.models import user # noqa
+from api.hashing import PasswordHasher, HashingBusy # noqa
+
+# pytest -s -o log_cli=true -o log_level=DEBUG
+
+
+@pytest.fixture(scope='function')
+def app(app):
+    app.config['test_data'] = generate_test_data()
+    return app
+
+
+def generate_test_data():
+    '''
+    return Faker's test data user
+    '''
+    fake = Faker()
+    fake_user = fake.profile()
+    fake_user['password'] = fake.password(
+        length=random.randrange(6, 32)
+    )
+    return fake_user
+
+
+def test_password_hasher_process_pool():
+    """
+    test PasswordHasher hashes with the configured argon2 costs
+    in its process pool and verifies the hashes
+    """
+    hasher = PasswordHasher(
+        max_workers=1, max_pending=2, time_cost=1, memory_cost=1024,
+    )
+    password_hash = hasher.hash("123456")
+    assert "m=1024,t=1" in password_hash
+    assert hasher.verify("123456", password_hash)
+    assert not hasher.verify("1234567", password_hash)
+    hasher.executor().shutdown()
+
+
+def test_password_hasher_busy():
+    """
+    test PasswordHasher refuses calls over max_pending
+    """
+    hasher = PasswordHasher(max_workers=0, max_pending=1)
+    hasher._pending.acquire()
+    with pytest.raises(HashingBusy):
+        hasher.hash("123456")
+    hasher._pending.release()
+    assert hasher.verify("123456", hasher.hash("123456"))
+
+
+def test_signin_hasher_busy(client):
+    """
+    Test /api/users/signin endpoint answers 429 with Retry-After
+    while the password hasher is saturated
+    """
+    request = client.post(
+        "/api/users",
+        data=json.dumps(
+            {
+                "username": "bob_2",
+                "password": "123456",
+                "email_address": "bob_2@gmail.com",
+            }
+        ),
+        content_type="application/json",
+    )
+    response = json.loads(request.data)
+    assert "Registration succesfull bob_2" == response["message"]
+    hasher = client.application.extensions["password_hasher"]
+    for _ in range(client.application.config["PASSWORD_HASH_MAX_PENDING"]):
+        hasher._pending.acquire()
+    request = client.post(
+        "/api/users/signin",
+        data=json.dumps(
+            {
+                "username": "bob_2",
+                "password": "123456",
+                "email_address": "bob_2@gmail.com",
+            }
+        ),
+        content_type="application/json",
+    )
+    assert 429 == request.status_code
+    assert "1" == request.headers["Retry-After"]
+    assert {
+        "message": "Too many sign in requests", "code": 429,
+    } == json.loads(request.data)
+
+
+def test_signin_rehashes_password(client):
+    """
+    Test /api/users/signin endpoint stores the password hashed with
+    the new argon2 parameters after they change
+    """
+    request = client.post(
+        "/api/users",
+        data=json.dumps(
+            {
+                "username": "bob_2",
+                "password": "123456",
+                "email_address": "bob_2@gmail.com",
+            }
+        ),
+        content_type="application/json",
+    )
+    response = json.loads(request.data)
+    assert "Registration succesfull bob_2" == response["message"]
+    hasher = client.application.extensions["password_hasher"]
+    hasher.settings = {"time_cost": 1, "memory_cost": 1024}
+    request = client.post(
+        "/api/users/signin",
+        data=json.dumps(
+            {
+                "username": "bob_2",
+                "password": "123456",
+                "email_address": "bob_2@gmail.com",
+            }
+        ),
+        content_type="application/json",
+    )
+    assert 200 == request.status_code
+    session = client.application.extensions["db_sessions"]["flask_backend"]
+    db_user = session.query(user.UserModel).filter_by(
+        username="bob_2"
+    ).first()
+    assert "m=1024,t=1" in db_user.password
+    session.remove()
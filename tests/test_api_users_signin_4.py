@@ -0,0 +1,111 @@
+import os
+import sys
+import json
+from sqlalchemy import event
+sys.path.append(os.getcwd())
+from api.models import user # noqa
+
+# pytest -s -o log_cli=true -o log_level=DEBUG
+
+
+def capture_statements(client):
+    """
+    Returning the list that collects the SQL statements
+    sent to the users table
+    """
+    statements = []
+    db_session = client.application.extensions['db_sessions']['flask_backend']
+
+    @event.listens_for(db_session.get_bind(), 'before_cursor_execute')
+    def collect(conn, cursor, statement, parameters, context, executemany):
+        verb = statement.split()[0]
+        if verb in ("SELECT", "INSERT") and "users" in statement:
+            statements.append(verb)
+
+    return statements
+
+
+def register(client, username, email_address):
+    return client.post(
+        "/api/users",
+        data=json.dumps(
+            {
+                "username": username,
+                "password": "123456",
+                "email_address": email_address,
+            }
+        ),
+        content_type="application/json",
+    )
+
+
+def test_register_single_insert(client):
+    """
+    Test /api/users endpoint registers a user with one INSERT
+    and no SELECT
+    """
+    statements = capture_statements(client)
+    request = register(client, "bob_2", "bob_2@gmail.com")
+    assert 201 == request.status_code
+    assert ["INSERT"] == statements
+
+
+def test_register_duplicate_single_read(client):
+    """
+    Test /api/users endpoint answers a taken username or email
+    address with one SELECT after the failed INSERT
+    """
+    register(client, "bob_2", "bob_2@gmail.com")
+    statements = capture_statements(client)
+    request = register(client, "bob_2", "bob_3@gmail.com")
+    response = json.loads(request.data)
+    assert "User with this username already exist" == response["message"]
+    assert ["INSERT", "SELECT"] == statements
+    del statements[:]
+    request = register(client, "bob_3", "bob_2@gmail.com")
+    response = json.loads(request.data)
+    assert "User with this email already exist" == response["message"]
+    assert ["INSERT", "SELECT"] == statements
+    del statements[:]
+    request = register(client, "bob_2", "bob_2@gmail.com")
+    response = json.loads(request.data)
+    assert "User with this username already exist" == response["message"]
+
+
+def test_signin_single_read(client):
+    """
+    Test /api/users/signin endpoint finds the user by username
+    or by email address with one SELECT
+    """
+    register(client, "bob_2", "bob_2@gmail.com")
+    register(client, "bob_3", "bob_3@gmail.com")
+    statements = capture_statements(client)
+    request = client.post(
+        "/api/users/signin",
+        data=json.dumps(
+            {
+                "username": "bob_3",
+                "password": "123456",
+                "email_address": "bob_2@gmail.com",
+            }
+        ),
+        content_type="application/json",
+    )
+    response = json.loads(request.data)
+    assert "Login succesfull bob_3" == response["message"]
+    assert ["SELECT"] == statements
+    del statements[:]
+    request = client.post(
+        "/api/users/signin",
+        data=json.dumps(
+            {
+                "username": "bob_4",
+                "password": "123456",
+                "email_address": "bob_2@gmail.com",
+            }
+        ),
+        content_type="application/json",
+    )
+    response = json.loads(request.data)
+    assert "Login succesfull bob_2@gmail.com" == response["message"]
+    assert ["SELECT"] == statements
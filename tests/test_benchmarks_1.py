@@ -0,0 +1,123 @@
+import os
+import sys
+import random
+import argparse
+import pytest
+import logging
+sys.path.append(os.getcwd())
+from config import config # noqa
+from benchmarks.dataset import comment_fanout, create_bench_app, seed # noqa
+from benchmarks.bench_routes import ( # noqa
+    ROUTES, WsgiClient, compare, discover, measure,
+)
+
+
+# pytest -s -o log_cli=true -o log_level=DEBUG
+
+USERS = 20
+
+
+@pytest.fixture(scope='function')
+def app(request, transactions):
+    app = transactions.bind(create_bench_app("testing"))
+    logging.debug('Starting the test.')
+    args = argparse.Namespace(
+        stories=60,
+        comments_per_story=4,
+        blog_stories=20,
+        users=USERS,
+        seed=1,
+        chunk_size=50,
+        reset=False,
+    )
+    app.config['seeded'] = seed(app, args)
+    yield app
+    logging.debug('Shutting down the test.')
+
+
+def test_comment_fanout_is_reproducible():
+    """
+    test the comment fan-out follows the seed, leaves stories
+    without comments and keeps the mean near the asked one
+    """
+    first = [comment_fanout(random.Random(7), 10) for _ in range(5)]
+    second = [comment_fanout(random.Random(7), 10) for _ in range(5)]
+    assert first == second
+    rng = random.Random(1)
+    fanouts = [comment_fanout(rng, 10) for _ in range(20000)]
+    assert 0 in fanouts
+    assert max(fanouts) > 100
+    assert 8 < sum(fanouts) / len(fanouts) < 12
+
+
+def test_bench_app_keeps_the_config_engine_options(monkeypatch, tmp_path):
+    """
+    test create_bench_app gives the sqlite binds of its app their
+    thread options without changing the shared config class
+    """
+    app_config = config['testing']
+    monkeypatch.setattr(
+        app_config,
+        'SQLALCHEMY_BINDS',
+        {
+            bind_key: f"sqlite:///{tmp_path / bind_key}.db"
+            for bind_key in app_config.SQLALCHEMY_BINDS
+        },
+    )
+    engine_options = app_config.SQLALCHEMY_BINDS_ENGINE_OPTIONS
+    app = create_bench_app("testing")
+    for bind_key, options in engine_options.items():
+        assert 'connect_args' not in options
+        assert {'check_same_thread': False} == app.config[
+            'SQLALCHEMY_BINDS_ENGINE_OPTIONS'
+        ][bind_key]['connect_args']
+    assert engine_options is app_config.SQLALCHEMY_BINDS_ENGINE_OPTIONS
+    for db_session in app.extensions['db_sessions'].values():
+        db_session.remove()
+        db_session.get_bind().dispose()
+
+
+def test_seed_writes_every_table(app):
+    """
+    test the dataset fills the stories, comments and users tables
+    """
+    seeded = app.config['seeded']
+    assert 60 == seeded['hacker_news_top_story']
+    assert 60 == seeded['hacker_news_new_story']
+    assert 20 == seeded['blog_news_story']
+    assert USERS == seeded['users']
+    assert seeded['hacker_news_top_story_comment'] > 0
+
+
+def test_every_route_answers_as_expected(app):
+    """
+    test every benchmarked route answers with its expected status
+    on the seeded dataset
+    """
+    client = WsgiClient(app)
+    app.config['INGEST_API_TOKEN'] = 'benchmark-token'
+    client.headers['Authorization'] = 'Bearer benchmark-token'
+    ctx = discover(client, USERS)
+    for route in ROUTES:
+        result = measure(client, ctx, route, 1, 1, 0, 1)
+        assert 0 == result['errors'], route.name
+
+
+def test_compare_reports_regressions():
+    """
+    test compare flags a slower p95 or fewer requests per second
+    beyond the tolerance
+    """
+    baseline = {
+        "routes": {
+            "fast": {"p95_ms": 10.0, "rps": 100.0},
+            "slow": {"p95_ms": 10.0, "rps": 100.0},
+            "fewer": {"p95_ms": 10.0, "rps": 100.0},
+        }
+    }
+    results = {
+        "fast": {"p95_ms": 10.5, "rps": 98.0},
+        "slow": {"p95_ms": 12.0, "rps": 100.0},
+        "fewer": {"p95_ms": 10.0, "rps": 80.0},
+    }
+    assert ["slow", "fewer"] == compare(results, baseline, 0.1)
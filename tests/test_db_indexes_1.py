@@ -0,0 +1,132 @@
+import os
+import sys
+import pytest
+from sqlalchemy import event
+from tests.hacker_news_test_data import test_row
+sys.path.append(os.getcwd())
+from api.models import hacker_news, blog_news # noqa
+
+
+# pytest -s -o log_cli=true -o log_level=DEBUG
+
+
+@pytest.fixture(scope='function')
+def app(app):
+    app.config['RESPONSE_CACHE_BACKEND'] = None
+    app.extensions['response_cache'] = None
+    return app
+
+
+@pytest.fixture(scope='function')
+def seed_rows():
+    return [
+        (hacker_news.HackerNewsTopStory, test_row),
+        (hacker_news.HackerNewsNewStory, test_row),
+        (blog_news.BlogNewsStory, dict(id=1, by='bob', time=1)),
+        (
+            blog_news.BlogNewsStoryComment,
+            dict(id=1, parent=1, by='bob', time=1),
+        ),
+    ]
+
+
+def query_plans(client, url):
+    """
+    Returning the EXPLAIN plans, with sequential scans and sorts
+    disabled, of every SELECT statement sent to the databases by GET url
+    """
+    statements = []
+
+    def collect(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().startswith('SELECT'):
+            statements.append((conn.engine, statement, parameters))
+
+    engines = [
+        db_session.get_bind()
+        for db_session in client.application.extensions['db_sessions']
+        .values()
+    ]
+    for engine in engines:
+        event.listen(engine, 'after_cursor_execute', collect)
+    try:
+        response = client.get(url)
+    finally:
+        for engine in engines:
+            event.remove(engine, 'after_cursor_execute', collect)
+    assert 200 == response.status_code
+    plans = []
+    for engine, statement, parameters in statements:
+        connection = engine.raw_connection()
+        try:
+            cursor = connection.cursor()
+            cursor.execute('SET enable_seqscan TO off')
+            cursor.execute('SET enable_sort TO off')
+            cursor.execute('EXPLAIN ' + statement, parameters)
+            plans.append('\n'.join(row[0] for row in cursor.fetchall()))
+            connection.rollback()
+        finally:
+            connection.close()
+    return plans
+
+
+@pytest.mark.parametrize(
+    'url, index',
+    [
+        (
+            '/api/hackernews/topstories/?pagenumber=1',
+            'ix_hacker_news_top_story_parsed_time_id',
+        ),
+        (
+            '/api/hackernews/topstories/?cursor=',
+            'ix_hacker_news_top_story_parsed_time_id',
+        ),
+        (
+            f"/api/hackernews/topstories/{test_row['hn_id']}/comments",
+            'ix_hacker_news_top_story_comment_parent_parsed_time',
+        ),
+        (
+            f"/api/hackernews/topstories/{test_row['hn_id']}",
+            'ix_hacker_news_top_story_comment_parent_parsed_time',
+        ),
+        (
+            '/api/hackernews/newstories/?pagenumber=1',
+            'ix_hacker_news_new_story_parsed_time_id',
+        ),
+        (
+            '/api/hackernews/newstories/?cursor=',
+            'ix_hacker_news_new_story_parsed_time_id',
+        ),
+        (
+            f"/api/hackernews/newstories/{test_row['hn_id']}/comments",
+            'ix_hacker_news_new_story_comment_parent_parsed_time',
+        ),
+        (
+            f"/api/hackernews/newstories/{test_row['hn_id']}",
+            'ix_hacker_news_new_story_comment_parent_parsed_time',
+        ),
+        ('/api/blognews/?pagenumber=1', 'ix_blog_news_story_time_id'),
+        ('/api/blognews/?cursor=', 'ix_blog_news_story_time_id'),
+        ('/api/blognews/1/comments', 'ix_blog_news_story_comment_parent_id'),
+        ('/api/blognews/1', 'ix_blog_news_story_comment_parent_id'),
+        (
+            '/api/users/bob/stories/?pagenumber=1',
+            'ix_blog_news_story_by_time_id',
+        ),
+        ('/api/users/bob/stories/?cursor=', 'ix_blog_news_story_by_time_id'),
+        (
+            '/api/users/bob/comments/?pagenumber=1',
+            'ix_blog_news_story_comment_by_time_id',
+        ),
+        (
+            '/api/users/bob/comments/?cursor=',
+            'ix_blog_news_story_comment_by_time_id',
+        ),
+    ],
+)
+def test_resource_queries_use_indexes(client, url, index):
+    """
+    test the SELECT statements of GET url scan the index
+    that was added for them
+    """
+    plans = query_plans(client, url)
+    assert [plan for plan in plans if index in plan], plans
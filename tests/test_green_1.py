@@ -0,0 +1,69 @@
+import os
+import sys
+import time
+import pytest
+from flask import _app_ctx_stack
+sys.path.append(os.getcwd())
+from flask_backend import create_app # noqa
+from db import create_session # noqa
+from config import TestingConfig # noqa
+
+gevent = pytest.importorskip("gevent")
+pytest.importorskip("psycogreen")
+from gevent import monkey # noqa
+
+
+@pytest.fixture(scope='function')
+def green():
+    if not monkey.is_module_patched("socket"):
+        pytest.skip("run with --serving-mode=gevent")
+
+
+def test_green_sessions_query_concurrently(green):
+    """
+    test greenlets get their own sessions and wait
+    for the database concurrently
+    """
+    app = create_app(config_name="testing")
+    db_session = create_session(
+        app.config['POSTGRES_DATABASE_URI'],
+        scopefunc=_app_ctx_stack.__ident_func__,
+        pool_size=10,
+    )
+    sessions = set()
+
+    def slow_query():
+        with app.app_context():
+            sessions.add(id(db_session()))
+            db_session.execute("SELECT pg_sleep(0.2)")
+            db_session.remove()
+
+    start = time.monotonic()
+    gevent.joinall([gevent.spawn(slow_query) for _ in range(10)])
+    assert 10 == len(sessions)
+    assert time.monotonic() - start < 1
+    db_session.get_bind().dispose()
+
+
+def test_green_profiler_samples_greenlets(green, monkeypatch):
+    """
+    test the profiler records the stack of a request
+    that waits on the gevent hub
+    """
+    monkeypatch.setattr(TestingConfig, "PROFILER_ENABLED", True)
+    monkeypatch.setattr(TestingConfig, "PROFILER_TOKEN", "token")
+    monkeypatch.setattr(TestingConfig, "PROFILER_INTERVAL", 0.001)
+    app = create_app(config_name="testing")
+
+    def green_view():
+        gevent.sleep(0.05)
+        return "done"
+
+    app.add_url_rule("/green", "green", green_view)
+    with app.test_client() as client:
+        response = client.get("/green", headers={"X-Profile": "token"})
+        profile_id = response.headers["X-Profile-Id"]
+        profile = app.extensions["profiles"].list()[0]
+        assert profile["samples"] > 0
+        stacks = app.extensions["profiles"].get(profile_id)
+        assert "green_view (test_green_1.py:" in stacks
@@ -0,0 +1,88 @@
+import os
+import sys
+import pytest
+import json
+import logging
+sys.path.append(os.getcwd())
+from flask_backend import create_app # noqa
+from config import engine_options # noqa
+
+# pytest -s -o log_cli=true -o log_level=DEBUG
+
+INTERNAL_API_TOKEN = "test-internal-token"
+
+
+@pytest.fixture(scope='function')
+def client(request):
+    app = create_app(config_name="testing")
+    app.config["INTERNAL_API_TOKEN"] = INTERNAL_API_TOKEN
+    with app.test_client() as client:
+        client.environ_base["HTTP_AUTHORIZATION"] = (
+            f"Bearer {INTERNAL_API_TOKEN}"
+        )
+        logging.debug('Starting the test.')
+        yield client
+        for db_session in app.extensions['db_sessions'].values():
+            db_session.remove()
+            db_session.get_bind().dispose()
+
+
+def test_internal_pool_stats(client):
+    """
+    test /internal/pool endpoint
+    returns pool statistics for both binds
+    """
+    response = client.get("/internal/pool")
+    response = json.loads(response.data)
+    assert {"flask_backend", "hacker_news"} == set(response)
+    pool = response["hacker_news"]
+    assert "MeasuredQueuePool" == pool["pool_class"]
+    assert 0 == pool["checked_out"]
+    assert (
+        client.application.config["SQLALCHEMY_BINDS_ENGINE_OPTIONS"][
+            "hacker_news"
+        ]["max_overflow"]
+        == pool["max_overflow"]
+    )
+    assert "+Inf" == pool["checkout_wait_seconds"]["buckets"][-1]["le"]
+
+
+def test_internal_pool_stats_without_token(client):
+    """
+    test /internal/pool endpoint
+    from loopback with a wrong token
+    """
+    response = client.get(
+        "/internal/pool",
+        headers={"Authorization": "Bearer wrong-token"},
+        environ_base={"REMOTE_ADDR": "127.0.0.1"},
+    )
+    assert 401 == response.status_code
+
+
+def test_internal_pool_stats_token_not_configured(client):
+    """
+    test /internal/pool endpoint
+    while INTERNAL_API_TOKEN is not set
+    """
+    client.application.config["INTERNAL_API_TOKEN"] = None
+    response = client.get("/internal/pool")
+    assert 404 == response.status_code
+
+
+def test_engine_options_from_environment(monkeypatch):
+    """
+    test engine_options reads the pool settings of a bind
+    from the environment
+    """
+    monkeypatch.setenv("TEST_BIND_POOL_SIZE", "20")
+    monkeypatch.setenv("TEST_BIND_POOL_PRE_PING", "true")
+    monkeypatch.setenv("TEST_BIND_STATEMENT_TIMEOUT", "5000")
+    options = engine_options("TEST_BIND")
+    assert 20 == options["pool_size"]
+    assert 10 == options["max_overflow"]
+    assert options["pool_pre_ping"] is True
+    assert (
+        {"options": "-c statement_timeout=5000"}
+        == options["connect_args"]
+    )
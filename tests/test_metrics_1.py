@@ -0,0 +1,147 @@
+import os
+import sys
+import subprocess
+import pytest
+import logging
+sys.path.append(os.getcwd())
+from flask_backend import create_app # noqa
+from flask_backend.metrics import REGISTRY # noqa
+
+# pytest -s -o log_cli=true -o log_level=DEBUG
+
+INTERNAL_API_TOKEN = "test-internal-token"
+
+
+@pytest.fixture(scope='function')
+def client(request):
+    app = create_app(config_name="testing")
+    app.config["INTERNAL_API_TOKEN"] = INTERNAL_API_TOKEN
+    with app.test_client() as client:
+        client.environ_base["HTTP_AUTHORIZATION"] = (
+            f"Bearer {INTERNAL_API_TOKEN}"
+        )
+        logging.debug('Starting the test.')
+        yield client
+        for db_session in app.extensions['db_sessions'].values():
+            db_session.remove()
+            db_session.get_bind().dispose()
+
+
+def sample(name, **labels):
+    return REGISTRY.get_sample_value(name, labels) or 0
+
+
+def test_metrics_count_requests_by_endpoint(client):
+    """
+    test the requests of an endpoint are counted by status
+    and timed, with none of them left in flight
+    """
+    labels = {"endpoint": "internal.pool_stats", "method": "GET"}
+    count = sample(
+        "flask_backend_requests_total", status="200", **labels
+    )
+    timed = sample(
+        "flask_backend_request_duration_seconds_count", **labels
+    )
+    sized = sample("flask_backend_response_size_bytes_count", **labels)
+    client.get("/internal/pool")
+    client.get("/internal/pool")
+    assert count + 2 == sample(
+        "flask_backend_requests_total", status="200", **labels
+    )
+    assert timed + 2 == sample(
+        "flask_backend_request_duration_seconds_count", **labels
+    )
+    assert sized + 2 == sample(
+        "flask_backend_response_size_bytes_count", **labels
+    )
+    # the test client tears the last request down on the next one
+    client.get("/no_such_route")
+    assert 0 == sample("flask_backend_requests_in_flight", **labels)
+
+
+def test_metrics_unmatched_route(client):
+    """
+    test a request without a route is counted
+    under the unmatched endpoint
+    """
+    labels = {"endpoint": "unmatched", "method": "GET", "status": "404"}
+    count = sample("flask_backend_requests_total", **labels)
+    response = client.get("/no_such_route")
+    assert 404 == response.status_code
+    assert count + 1 == sample("flask_backend_requests_total", **labels)
+
+
+def test_internal_metrics_exposition(client):
+    """
+    test /internal/metrics endpoint
+    returns the metrics in the text exposition format
+    """
+    client.get("/internal/pool")
+    response = client.get("/internal/metrics")
+    assert 200 == response.status_code
+    assert response.content_type.startswith("text/plain")
+    body = response.data.decode()
+    assert "# TYPE flask_backend_request_duration_seconds histogram" in body
+    assert (
+        'flask_backend_requests_total{endpoint="internal.pool_stats",'
+        'method="GET",status="200"}'
+    ) in body
+    assert (
+        'flask_backend_db_pool_connections{bind="hacker_news",'
+        'engine="primary",state="checked_out"} 0.0'
+    ) in body
+
+
+def test_metrics_pool_gauges_throttled(client, monkeypatch):
+    """
+    test the requests of a worker set the pool gauges at most
+    once every METRICS_POOL_INTERVAL seconds
+    """
+    updates = []
+    monkeypatch.setattr(
+        "flask_backend.metrics.update_pool_gauges", updates.append
+    )
+    client.application.config["METRICS_POOL_INTERVAL"] = 3600
+    for _ in range(3):
+        client.get("/internal/pool")
+    # the test client tears the last request down on the next one
+    client.get("/no_such_route")
+    assert [client.application] == updates
+
+
+def test_internal_metrics_without_token(client):
+    """
+    test /internal/metrics endpoint
+    from loopback without the token
+    """
+    response = client.get(
+        "/internal/metrics",
+        environ_base={"REMOTE_ADDR": "127.0.0.1", "HTTP_AUTHORIZATION": ""},
+    )
+    assert 401 == response.status_code
+
+
+def test_metrics_add_up_processes(tmpdir):
+    """
+    test the metrics of several processes sharing
+    prometheus_multiproc_dir are added up
+    """
+    env = dict(os.environ, prometheus_multiproc_dir=str(tmpdir))
+    count = (
+        "from flask_backend.metrics import REQUESTS; "
+        "REQUESTS.labels('api.test', 'GET', 200).inc()"
+    )
+    for _ in range(2):
+        subprocess.run([sys.executable, "-c", count], env=env, check=True)
+    export = (
+        "from flask_backend.metrics import metrics_registry; "
+        "print(metrics_registry().get_sample_value("
+        "'flask_backend_requests_total', "
+        "{'endpoint': 'api.test', 'method': 'GET', 'status': '200'}))"
+    )
+    output = subprocess.run(
+        [sys.executable, "-c", export],
+        env=env, check=True, stdout=subprocess.PIPE,
+    ).stdout
+    assert "2.0" == output.decode().strip()
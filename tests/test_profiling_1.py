@@ -0,0 +1,195 @@
+import os
+import sys
+import time
+import pytest
+import json
+import logging
+from types import SimpleNamespace
+sys.path.append(os.getcwd())
+from flask_backend import create_app # noqa
+from config import TestingConfig # noqa
+from flask_backend.profiling import Sampler, original # noqa
+
+# pytest -s -o log_cli=true -o log_level=DEBUG
+
+PROFILER_TOKEN = "test-profiler-token"
+INTERNAL_API_TOKEN = "test-internal-token"
+INTERNAL_HEADERS = {"Authorization": f"Bearer {INTERNAL_API_TOKEN}"}
+
+
+def slow_view():
+    deadline = time.perf_counter() + 0.05
+    while time.perf_counter() < deadline:
+        pass
+    return "done"
+
+
+def make_client(monkeypatch, **settings):
+    monkeypatch.setattr(TestingConfig, "PROFILER_ENABLED", True)
+    monkeypatch.setattr(TestingConfig, "PROFILER_TOKEN", PROFILER_TOKEN)
+    monkeypatch.setattr(TestingConfig, "PROFILER_INTERVAL", 0.001)
+    monkeypatch.setattr(
+        TestingConfig, "INTERNAL_API_TOKEN", INTERNAL_API_TOKEN
+    )
+    for name, value in settings.items():
+        monkeypatch.setattr(TestingConfig, name, value)
+    app = create_app(config_name="testing")
+    app.add_url_rule("/slow", "slow", slow_view)
+    return app
+
+
+@pytest.fixture(scope='function')
+def client(monkeypatch):
+    app = make_client(monkeypatch)
+    with app.test_client() as client:
+        logging.debug('Starting the test.')
+        yield client
+        for db_session in app.extensions['db_sessions'].values():
+            db_session.remove()
+            db_session.get_bind().dispose()
+
+
+def test_profile_with_token_header(client):
+    """
+    test a request with the X-Profile token header
+    is profiled and its folded stacks are returned
+    """
+    response = client.get("/slow", headers={"X-Profile": PROFILER_TOKEN})
+    assert 200 == response.status_code
+    profile_id = response.headers["X-Profile-Id"]
+    profiles = json.loads(
+        client.get("/internal/profiles", headers=INTERNAL_HEADERS).data
+    )
+    assert profiles["enabled"] is True
+    profile = profiles["profiles"][0]
+    assert profile_id == profile["id"]
+    assert "slow" == profile["endpoint"]
+    assert 200 == profile["status"]
+    assert profile["samples"] > 0
+    assert profile["wall_seconds"] >= 0.05
+    assert profile["cpu_seconds"] > 0
+    stacks = client.get(
+        f"/internal/profiles/{profile_id}", headers=INTERNAL_HEADERS
+    )
+    assert 200 == stacks.status_code
+    assert "slow_view (test_profiling_1.py:" in stacks.data.decode()
+
+
+def test_no_profile_without_token(client):
+    """
+    test requests without the token or with a wrong one
+    are not profiled
+    """
+    response = client.get("/slow")
+    assert "X-Profile-Id" not in response.headers
+    response = client.get("/slow", headers={"X-Profile": "wrong"})
+    assert "X-Profile-Id" not in response.headers
+    profiles = json.loads(
+        client.get("/internal/profiles", headers=INTERNAL_HEADERS).data
+    )
+    assert [] == profiles["profiles"]
+
+
+def test_unknown_profile(client):
+    """
+    test /internal/profiles/<profile_id> endpoint
+    with a profile id that is not stored
+    """
+    response = client.get(
+        "/internal/profiles/no-such-profile", headers=INTERNAL_HEADERS
+    )
+    assert 404 == response.status_code
+
+
+def test_profile_sample_rate(monkeypatch):
+    """
+    test PROFILER_SAMPLE_RATE profiles requests without the header
+    """
+    app = make_client(monkeypatch, PROFILER_SAMPLE_RATE=1.0)
+    with app.test_client() as client:
+        response = client.get("/slow")
+        assert "X-Profile-Id" in response.headers
+
+
+def test_profile_output_dir(monkeypatch, tmpdir):
+    """
+    test profiles are written to PROFILER_OUTPUT_DIR
+    """
+    app = make_client(monkeypatch, PROFILER_OUTPUT_DIR=str(tmpdir))
+    with app.test_client() as client:
+        response = client.get(
+            "/slow", headers={"X-Profile": PROFILER_TOKEN}
+        )
+        profile_id = response.headers["X-Profile-Id"]
+        assert tmpdir.join(f"{profile_id}.folded").check()
+        profile = json.loads(tmpdir.join(f"{profile_id}.json").read())
+        assert "/slow" == profile["path"]
+        profiles = json.loads(
+            client.get("/internal/profiles", headers=INTERNAL_HEADERS).data
+        )
+        assert profile_id == profiles["profiles"][0]["id"]
+
+
+def test_profile_output_dir_keeps_max_profiles(monkeypatch, tmpdir):
+    """
+    test the oldest profiles in PROFILER_OUTPUT_DIR are removed
+    past PROFILER_MAX_PROFILES
+    """
+    app = make_client(
+        monkeypatch, PROFILER_OUTPUT_DIR=str(tmpdir), PROFILER_MAX_PROFILES=2
+    )
+    with app.test_client() as client:
+        profile_ids = [
+            client.get(
+                "/slow", headers={"X-Profile": PROFILER_TOKEN}
+            ).headers["X-Profile-Id"]
+            for _ in range(3)
+        ]
+    assert not tmpdir.join(f"{profile_ids[0]}.json").check()
+    assert not tmpdir.join(f"{profile_ids[0]}.folded").check()
+    assert sorted(
+        f"{profile_id}{suffix}"
+        for profile_id in profile_ids[1:]
+        for suffix in (".folded", ".json")
+    ) == sorted(os.listdir(tmpdir))
+
+
+def test_profiler_disabled():
+    """
+    test /internal/profiles endpoint
+    while the profiler is disabled
+    """
+    app = create_app(config_name="testing")
+    app.config["INTERNAL_API_TOKEN"] = INTERNAL_API_TOKEN
+    with app.test_client() as client:
+        response = client.get(
+            "/internal/profiles",
+            headers={"X-Profile": PROFILER_TOKEN, **INTERNAL_HEADERS},
+        )
+        assert "X-Profile-Id" not in response.headers
+        assert {"enabled": False} == json.loads(response.data)
+
+
+def waiting_for_database():
+    yield
+
+
+def test_sampler_follows_suspended_greenlet():
+    """
+    test the Sampler records the frame a suspended greenlet waits in,
+    and the frame of the thread while the greenlet runs
+    """
+    suspended = waiting_for_database()
+    next(suspended)
+    greenlet = SimpleNamespace(gr_frame=suspended.gi_frame)
+    thread_id = original("_thread", "get_ident")()
+    sampler = Sampler(thread_id, 0.001, greenlet).start()
+    slow_view()
+    stacks = sampler.stop()
+    assert stacks
+    assert all(stack.startswith("waiting_for_database") for stack in stacks)
+    greenlet.gr_frame = None
+    sampler = Sampler(thread_id, 0.001, greenlet).start()
+    slow_view()
+    stacks = sampler.stop()
+    assert any("slow_view (test_profiling_1.py:" in stack for stack in stacks)
@@ -0,0 +1,141 @@
+import os
+import sys
+import pytest
+import json
+import logging
+from flask import g, jsonify
+from tests.hacker_news_test_data import test_row, test_comment_row
+from datetime import datetime, timedelta
+sys.path.append(os.getcwd())
+from api.models import hacker_news # noqa
+from db.instrument import fingerprint, QueryStats # noqa
+from tests.query_budget import ( # noqa
+    app_statements,
+    assert_max_queries,
+    query_count,
+)
+
+
+# pytest -s -o log_cli=true -o log_level=DEBUG
+
+
+@pytest.fixture(scope='function')
+def app(app):
+    app.config['test_data'] = test_row
+    app.config['test_comment_data'] = test_comment_row
+    return app
+
+
+@pytest.fixture(scope='function')
+def seed_rows():
+    comment_rows = generate_test_comment_rows()
+    story_row = dict(test_row, local_comment_count=len(comment_rows))
+    return [(hacker_news.HackerNewsTopStory, story_row)] + [
+        (hacker_news.HackerNewsTopStoryComment, row)
+        for row in comment_rows
+    ]
+
+
+def generate_test_comment_rows(count=3):
+    """
+    return test_comment_row copies with unique ids and parsed_time
+    """
+    rows = []
+    parsed_time = datetime(2020, 9, 28, 14, 18, 18)
+    for number in range(count):
+        row = dict(test_comment_row)
+        row['id'] = number + 1
+        row['hn_id'] = int(test_comment_row['hn_id']) + number
+        row['parsed_time'] = parsed_time + timedelta(minutes=number)
+        rows.append(row)
+    return rows
+
+
+def test_server_timing_header(client):
+    """
+    Test every response reports its SQL statements and their time
+    in the Server-Timing header
+    """
+    client.get('/api/hackernews/topstories/?pagenumber=1')
+    client.application.extensions['response_cache'] = None
+    with app_statements(client.application) as statements:
+        request = client.get('/api/hackernews/topstories/?pagenumber=1')
+    assert 'db;dur=' in request.headers['Server-Timing']
+    assert len(statements) <= query_count(request)
+    assert_max_queries(statements, 2)
+    request = client.get('/api/')
+    assert 0 == query_count(request)
+
+
+def test_query_budget_comment_patch(client):
+    """
+    Test PATCH /api/hackernews/topstories/<story_id>/comments/<comment_id>
+    endpoint stays within its statement budget
+    """
+    client.get('/api/hackernews/topstories/?pagenumber=1')
+    with app_statements(client.application) as statements:
+        request = client.patch(
+            f"/api/hackernews/topstories/{test_row['hn_id']}/comments/1",
+            data=json.dumps({'text': 'edited'}),
+            content_type='application/json',
+        )
+    assert 200 == request.status_code
+    assert_max_queries(statements, 3)
+
+
+def test_n_plus_one_warning(client, caplog):
+    """
+    Test a request that runs the same statement for every row
+    logs an N+1 warning and the JSON request log line
+    """
+    app = client.application
+    app.config['SQL_N_PLUS_ONE_THRESHOLD'] = 3
+    app.config['SQL_REQUEST_LOG'] = True
+
+    @app.route('/n-plus-one')
+    def n_plus_one():
+        db_session = g.hacker_news_session
+        stories = db_session.query(hacker_news.HackerNewsTopStory).all()
+        comments = db_session.query(
+            hacker_news.HackerNewsTopStoryComment
+        ).all()
+        for comment in comments:
+            comment.hacker_news_top_story
+            db_session.expire(stories[0])
+        return jsonify(len(comments))
+
+    client.get('/api/hackernews/topstories/?pagenumber=1')
+    caplog.clear()
+    caplog.set_level(logging.INFO)
+    request = client.get('/n-plus-one')
+    assert 5 <= query_count(request)
+    warnings = [
+        record.getMessage() for record in caplog.records
+        if record.levelno == logging.WARNING
+    ]
+    assert 1 == len(warnings)
+    assert warnings[0].startswith('N+1 queries in GET /n-plus-one')
+    log_line = json.loads([
+        record.getMessage() for record in caplog.records
+        if record.levelno == logging.INFO
+    ][-1])
+    assert '/n-plus-one' == log_line['path']
+    assert log_line['queries'] == query_count(request)
+    assert 3 <= max(log_line['duplicates'].values())
+
+
+def test_query_fingerprints():
+    """
+    test statements that differ only in their parameters and IN list
+    lengths share a fingerprint, and duplicates counts them
+    """
+    stats = QueryStats()
+    stats.record('SELECT a FROM t WHERE id IN (%(id_1)s, %(id_2)s)', 0.5)
+    stats.record('SELECT a FROM t\n WHERE id IN (%(id_1)s)', 0.25)
+    stats.record('SELECT b FROM t', 0.25)
+    assert 3 == stats.count
+    assert 1.0 == stats.duration
+    assert {
+        'SELECT a FROM t WHERE id IN (?)': 2
+    } == stats.duplicates()
+    assert 'SELECT b FROM t' == fingerprint(' SELECT  b\nFROM t ')
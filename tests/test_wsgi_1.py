@@ -0,0 +1,94 @@
+import os
+import sys
+import importlib
+import threading
+import pytest
+from types import SimpleNamespace
+sys.path.append(os.getcwd())
+from flask_backend import create_app # noqa
+from db.routing import session_engines # noqa
+import gunicorn_conf # noqa
+
+
+@pytest.fixture(scope='function')
+def conf(monkeypatch):
+    def load(**environ):
+        for name, value in environ.items():
+            monkeypatch.setenv(name, value)
+        return importlib.reload(gunicorn_conf)
+
+    yield load
+    monkeypatch.undo()
+    importlib.reload(gunicorn_conf)
+
+
+def test_gunicorn_conf_worker_classes(conf):
+    """
+    test gunicorn_conf reads the worker class settings
+    """
+    settings = conf(GUNICORN_WORKER_CLASS='gthread', GUNICORN_WORKERS='3')
+    assert 'gthread' == settings.worker_class
+    assert 3 == settings.workers
+    assert 4 == settings.threads
+    assert settings.preload_app is True
+    settings = conf(GUNICORN_WORKER_CLASS='sync', GUNICORN_PRELOAD='false')
+    assert 1 == settings.threads
+    assert settings.preload_app is False
+
+
+def test_gunicorn_conf_unknown_worker_class(conf):
+    """
+    test gunicorn_conf refuses unknown worker classes
+    """
+    with pytest.raises(ValueError):
+        conf(GUNICORN_WORKER_CLASS='eventlet')
+
+
+def test_gunicorn_post_fork_replaces_pools():
+    """
+    test gunicorn_conf.post_fork gives the forked worker
+    new connection pools of the preloaded app
+    """
+    app = create_app(config_name="testing")
+    db_sessions = app.extensions['db_sessions'].values()
+    pools = [session_engines(db_session)[0].pool for db_session in db_sessions]
+    server = SimpleNamespace(app=SimpleNamespace(callable=app))
+    gunicorn_conf.post_fork(server, None)
+    for db_session, pool in zip(db_sessions, pools):
+        new_pool = session_engines(db_session)[0].pool
+        assert pool is not new_pool
+        assert type(pool) is type(new_pool)
+        assert pool.size() == new_pool.size()
+
+
+def test_gunicorn_post_worker_init_green_pools(conf, monkeypatch):
+    """
+    test gunicorn_conf.post_worker_init of gevent workers replaces the
+    pools made before the monkey patching by pools with patched locks
+    """
+    settings = conf(GUNICORN_WORKER_CLASS='gevent')
+    app = create_app(config_name="testing")
+    server = SimpleNamespace(app=SimpleNamespace(callable=app))
+    settings.post_fork(server, None)
+    green_locks = []
+
+    def green(lock_factory):
+        def make_lock(*args, **kwargs):
+            lock = lock_factory(*args, **kwargs)
+            green_locks.append(lock)
+            return lock
+        return make_lock
+
+    def patch_green():
+        for name in ("Lock", "RLock", "Condition"):
+            monkeypatch.setattr(
+                threading, name, green(getattr(threading, name))
+            )
+
+    monkeypatch.setattr("flask_backend.green.patch_green", patch_green)
+    settings.post_worker_init(SimpleNamespace(wsgi=app))
+    for db_session in app.extensions['db_sessions'].values():
+        pool = session_engines(db_session)[0].pool
+        assert any(lock is pool._pool.mutex for lock in green_locks)
+        assert any(lock is pool._overflow_lock for lock in green_locks)
+        assert any(lock is pool._wait_lock for lock in green_locks)
@@ -0,0 +1,4 @@
+import os
+from flask_backend import create_app
+
+app = create_app(os.environ.get("FLASK_CONFIG", "production"))